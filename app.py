@@ -1,272 +1,114 @@
 import streamlit as st
-import google.generativeai as genai
+import json
 import os
-from dotenv import load_dotenv
-from enum import Enum
-
-# Step 상수 정의
-class Step(Enum):
-    TOPIC_QUESTION = "topic_question"
-    TOPIC_CONFIRM = "topic_confirm"
-    KEYWORD_QUESTION = "keyword_question"
-    KEYWORD_CONFIRM = "keyword_confirm"
-    STYLE_QUESTION = "style_question"
-    STYLE_CONFIRM = "style_confirm"
-    FLOW_SUGGEST = "flow_suggest"           # 새로운 단계: 글 흐름 제안
-    FLOW_CONFIRM = "flow_confirm"           # 새로운 단계: 글 흐름 확인
-    SECTION_EDIT = "section_edit"           # 새로운 단계: 섹션 수정
-    INTRO_WRITE = "intro_write"             # 새로운 단계: 도입부 작성
-    INTRO_CONFIRM = "intro_confirm"         # 새로운 단계: 도입부 확인
-    SECTION_WRITE = "section_write"         # 새로운 단계: 섹션 작성
-    SECTION_CONFIRM = "section_confirm"     # 새로운 단계: 섹션 확인
-    FULL_DRAFT = "full_draft"
-    DONE = "done"
-
-# 환경 변수 로드
-load_dotenv()
-
-# Gemini API 키 설정
-genai.configure(api_key=st.secrets["GOOGLE_API_KEY"])
-
-# 시스템 프롬프트
-REACT_SYSTEM_PROMPT = """
-당신은 기술 블로그 작성을 도와주는 챗봇입니다.
-사용자의 입력을 이해하고, 자연스러운 대화를 통해 사용자가 블로그 글을 작성할 수 있도록 도와주세요.
-
-사용자의 의견과 요청을 항상 확인하고, 모호하거나 불명확한 내용은 추가 질문을 통해 명확히 해주세요.
-다음 단계로 넘어가기 전에 항상 현재 내용이 맞는지 사용자에게 확인을 받으세요.
-
-블로그 작성은 다음 순서로 진행됩니다:
-1. 주제 파악하기
-2. 키워드 추천 및 선택하기
-3. 문체와 스타일 설정하기
-4. 글의 흐름 제안하기
-5. 도입부 작성하기
-6. 각 섹션 작성하기
-7. 전체 초안 확인하기
-
-기술 블로그 작성 시 다음 사항을 고려해주세요:
-- 기술적 정확성을 유지하세요.
-- 실제 작동하는 코드 예제를 포함하세요.
-- 다른 기술이나 접근법과 비교 분석해주세요.
-- 실무에서의 활용 사례를 포함하세요.
-- 이전 섹션과의 일관성을 유지하세요.
-
-사용자와 자연스러운 대화를 통해 단계별로 블로그 작성을 도와주세요.
-모든 응답은 구조화된 형식(1, 2, 3 번호 매기기)이나 특수 이모지 없이 자연스러운 대화체로 작성해주세요.
-"""
-
-# 단계별 프롬프트 템플릿
-
-PROMPT_TOPIC_QUESTION = """
-안녕하세요! 저는 기술 블로그 초안 작성을 도와드리는 챗봇입니다. 😊
-먼저, 어떤 주제로 블로그를 작성하고 싶으신가요?
-간단히 말씀해 주세요.
-"""
-
-PROMPT_TOPIC_CONFIRM = """
-제가 이해한 주제는 다음과 같습니다:  
-**"{inferred_topic}"**
-
-이 주제로 블로그를 작성하시는 게 맞을까요?
-맞으면 "네", 아니면 다시 말씀해주세요.
-"""
-
-PROMPT_KEYWORD_QUESTION = """
-주제 "**{topic}**"와 관련해서 아래와 같은 키워드를 추천드려요:
-
-🔎 추천 키워드:
-{recommended_keywords}
-
-이 중에서 다루고 싶은 키워드를 **복수로 선택**해주시고,
-추천 키워드에 없더라도 추가하고 싶은 키워드가 있다면 자유롭게 말씀해주세요!
-예: "API, Mock 서버, 실습 예제"
-"""
-
-PROMPT_KEYWORD_CONFIRM = """
-제가 이해한 최종 키워드는 다음과 같습니다:  
-{selected_keywords}
-
-이 키워드를 중심으로 글을 작성해도 괜찮을까요?
-수정하거나 추가하고 싶은 키워드가 있다면 알려주세요!
-"""
-
-PROMPT_STYLE_QUESTION = """
-이번엔 블로그의 스타일을 정해볼게요.
-아래는 참고할 수 있는 예시입니다:
-
-- 형식: 튜토리얼, 기술 리뷰, 문제 해결 사례
-- 문체: 친근한, 공식적인, 중립적
-- 독자 대상: 초보자, 중급 개발자, 전문가
-
-예시에서 골라도 좋고, 자유롭게 원하는 스타일로 작성해주셔도 괜찮습니다.
-예: "튜토리얼 형식, 친근한 톤, 초보자 대상"
-"""
-
-PROMPT_STYLE_CONFIRM = """
-제가 이해한 스타일은 다음과 같습니다:
-
-- 형식: **{format_style}**
-- 문체: **{tone}**
-- 대상 독자: **{audience}**
-
-이 스타일로 글을 작성해도 괜찮을까요?
-자유롭게 수정하거나 추가하고 싶은 요소가 있다면 말씀해주세요.
-"""
-
-PROMPT_FLOW_SUGGEST = """
-위의 주제, 키워드, 스타일을 바탕으로 아래와 같은 글 흐름을 제안드려요:
-
-📝 제안된 흐름:
-{suggested_flow}
-
-이 흐름은 참고용이니, 마음껏 수정하셔도 좋아요!
-섹션을 추가하거나 순서를 바꾸고 싶으시면 알려주세요.
-"""
-
-PROMPT_FLOW_CONFIRM = """
-아래는 각 섹션의 흐름입니다:
-
-흐름 목록:
-{finalized_flow}
-
-이 흐름대로 글을 작성해도 괜찮을까요?
-수정하거나 추가하고 싶은 항목이 있다면 말씀해주세요!
-"""
-
-PROMPT_SECTION_EDIT = """
-섹션 "{section_title}"에 대해 다음과 같은 수정을 제안해드릴게요:
-
-```
-{suggested_changes}
-```
-
-이 수정이 마음에 드시나요?
-수정하거나 다시 작성하고 싶으면 말씀해주세요!
-"""
-
-PROMPT_INTRO_WRITE = """
-이 글의 서론 부분인 "{section_title}"에 대한 초안을 작성해주세요.
-
-다음 요소를 포함해주세요:
-1. 주제에 대한 간결한 소개와 중요성
-2. 독자가 이 글을 읽어야 하는 이유
-3. 글에서 다룰 내용에 대한 간략한 개요
-4. 독자의 관심을 끌 수 있는 흥미로운 시작점
-
-주제: {topic}
-키워드: {keywords}
-스타일: {style}
-"""
-
-PROMPT_INTRO_CONFIRM = """
-제가 이해한 도입부는 다음과 같습니다:
-
-```
-{intro_content}
-```
-
-이 도입부로 글을 작성해도 괜찮을까요?
-수정하거나 추가하고 싶은 요소가 있다면 말씀해주세요.
-"""
-
-PROMPT_SECTION_WRITE = """
-이 글의 본문 부분인 "{section_title}"에 대한 초안을 작성해주세요.
-
-다음 요소를 포함해주세요:
-1. 해당 섹션의 핵심 개념 설명
-2. 실제 작동하는 코드 예제와 설명
-3. 다른 접근법과의 비교 분석
-4. 실무 적용 사례 또는 예시
-
-이전 섹션 내용을 참고하여 일관성을 유지하세요:
-{previous_sections}
-
-주제: {topic}
-키워드: {keywords}
-스타일: {style}
-"""
-
-PROMPT_SECTION_CONFIRM = """
-제가 이해한 섹션은 다음과 같습니다:
-
-```
-{section_content}
-```
-
-이 섹션으로 진행해도 괜찮을까요?
-수정하거나 추가하고 싶은 요소가 있다면 말씀해주세요.
-"""
-
-# 수정 요청에 대한 프롬프트
-PROMPT_REVISION = """
-다음 섹션의 초안을 수정해주세요:
-섹션 제목: {section_title}
-
-사용자 요청: {user_request}
-
-기존 초안:
-{original_draft}
-
-이전 섹션 내용:
-{previous_sections}
-
-수정 시 다음 사항을 고려해주세요:
-1. 사용자의 요청사항을 정확히 반영해주세요.
-2. 기술적 정확성을 유지하면서도 이해하기 쉽게 작성해주세요.
-3. 글의 전체적인 흐름과 일관성을 유지해주세요.
-4. 코드 예제가 있다면 정확하고 실행 가능하게 수정해주세요.
-5. 기존 초안의 좋은 부분은 그대로 유지해주세요.
-6. 사용자가 특정 부분만 수정을 요청했다면, 그 부분만 수정하고 나머지는 그대로 두세요.
-
-주제: {topic}
-키워드: {keywords}
-스타일: {style}
-
-수정된 내용은 마크다운 형식으로 작성해주세요.
-"""
-
-# Gemini 모델 불러오기
-def get_chat_model():
-    return genai.GenerativeModel("gemini-1.5-pro")
+import re
+import time
+import uuid
+from code_checks import ERROR, OK, TIMEOUT, format_check_result
+from draft_blocks import (context_around, fence_block, find_target_blocks, format_target_blocks,
+                          parse_revised_blocks, patch_blocks, split_blocks, unified_diff)
+from draft_document import EXPORT_MIME_TYPES, DraftDocument, clean_title
+from draft_store import DraftStore, apply_delta, make_delta
+from generation import (compose_previous_sections, compose_system_instruction, estimate_tokens,
+                        format_style_text, generate_candidates, generate_text)
+from jobs import JobCancelled
+from metrics import percentile
+from prompts import (PROMPT_BLOCK_REVISION, PROMPT_BLOG_TITLE, PROMPT_FLOW_CONFIRM, PROMPT_FLOW_GENERATE,
+                     PROMPT_FLOW_REFINE, PROMPT_FLOW_REFINED, PROMPT_FLOW_REVISE, PROMPT_FLOW_SUGGEST,
+                     PROMPT_INTRO_CONFIRM, PROMPT_INTRO_WRITE, PROMPT_KEYWORD_CONFIRM, PROMPT_KEYWORD_QUESTION,
+                     PROMPT_KEYWORD_RECOMMEND, PROMPT_KEYWORD_REFINE, PROMPT_KEYWORDS_REFINED, PROMPT_REVISION,
+                     PROMPT_SECTION_CONFIRM, PROMPT_SECTION_SUMMARY, PROMPT_SECTION_WRITE, PROMPT_SECTION_WRITE_BATCH,
+                     PROMPT_STYLE_CONFIRM, PROMPT_STYLE_QUESTION, PROMPT_TOPIC_CONFIRM, PROMPT_TOPIC_INFER,
+                     PROMPT_TOPIC_QUESTION)
+from resources import (SDK_WARMUP, get_code_validator, get_draft_index, get_gemini_client, get_job_queue, get_metrics,
+                       get_output_budgets, get_request_scheduler, get_response_cache, get_semantic_cache,
+                       get_session_store, start_sdk_warmup)
+from scheduler import PRIORITY_BATCH, PRIORITY_INTERACTIVE, PRIORITY_SPECULATIVE, is_rate_limit_error
+from step_engine import (STEP_ENGINE, Step, format_numbered, looks_like_flow, parse_flow, parse_keywords,
+                         parse_style)
+from ui_assets import STYLE_HTML, sidebar_steps_html
+
+# 이번 재실행 시작 시각 (재실행 시간 기록용)
+RERUN_STARTED_AT = time.perf_counter()
+
+# 수정 대상 블록이 초안에서 이 비율을 넘으면 섹션 전체를 다시 작성
+BLOCK_REVISION_MAX_RATIO = float(os.getenv("BLOCK_REVISION_MAX_RATIO", "0.6"))
+
+# 세션 컨텍스트 캐시 유지 시간(초)
+SESSION_CONTEXT_TTL = int(os.getenv("SESSION_CONTEXT_TTL", "3600"))
 
 # 전체 초안 표시 함수
 def show_full_draft():
-    """전체 초안을 생성하고 표시하는 함수"""
+    """섹션이 확정될 때마다 조립해 둔 전체 초안을 표시하는 함수
+
+    제목은 글 흐름을 확정할 때 백그라운드에서 미리 생성하므로 보통은 모델 호출 없이 바로 표시하고,
+    제목이 아직 생성 중이면 그 작업을 이어받으며, 없으면 이때 요청합니다 (완료 후 assemble_full_draft).
+    """
     try:
         # 필수 데이터 검증
         if not st.session_state.collected.get("finalized_flow") or not st.session_state.collected.get("user_topic"):
             bot_say("죄송합니다. 아직 모든 섹션이 완성되지 않았어요. 각 섹션을 순서대로 작성해주세요.")
             return
 
-        # 제목 생성
-        title_prompt = f"다음 주제에 대한 기술 블로그 제목을 생성해주세요: {st.session_state.collected['user_topic']}"
-        title = process_model_request(title_prompt)
-        if not title:
-            title = st.session_state.collected['user_topic']
-
-        # 전체 초안 생성
-        full_draft = f"# {title}\n\n"
-        for section_title in st.session_state.collected["finalized_flow"]:
-            section_content = st.session_state.generated_drafts.get(section_title)
-            if not section_content:
-                bot_say(f"'{section_title}' 섹션의 내용이 없습니다. 모든 섹션을 작성해주세요.")
-                return
-            full_draft += f"## {section_title}\n{section_content}\n\n"
+        st.session_state.step = Step.FULL_DRAFT.value
+        title_job = take_title_job()
+        title = current_blog_title()
+        if title:
+            assemble_full_draft(title)
+        elif title_job is not None:
+            attach_pending_job(title_job, "full_draft_title", label="title", stream=False)
+        else:
+            title_prompt = PROMPT_BLOG_TITLE.format(topic=st.session_state.collected['user_topic'])
+            process_model_request(title_prompt, "full_draft_title", label="title",
+                                  semantic_text=st.session_state.collected['user_topic'])
+    except Exception as e:
+        st.error(f"전체 초안 생성 중 오류가 발생했습니다: {str(e)}")
+        bot_say("죄송합니다. 전체 초안을 생성하는 중에 문제가 발생했습니다. 다시 시도해주세요.")
 
-        # 초안 저장 및 표시
-        st.session_state.full_draft = full_draft
+# 모델 작업 완료 처리 함수 등록
+JOB_HANDLERS = {}
+
+def job_handler(name):
+    """모델 작업이 끝났을 때 호출될 함수를 이름으로 등록하는 데코레이터"""
+    def register(func):
+        JOB_HANDLERS[name] = func
+        return func
+    return register
+
+@job_handler("full_draft_title")
+def assemble_full_draft(title):
+    """제목을 넣어 전체 초안을 마무리하고 표시하는 함수 (섹션은 확정될 때마다 이미 조립되어 있음)"""
+    try:
+        topic = st.session_state.collected['user_topic']
+        if title in MODEL_FAILURE_MESSAGES or not clean_title(title or ""):
+            title = topic
+        elif title != current_blog_title():
+            title = clean_title(title)
+            st.session_state.blog_title = {"topic": topic, "title": title}
+
+        document = get_full_document()
+        document.set_title(title)
+        full_draft = document.markdown()
+
+        # 초안 저장 및 표시 (다음 추천을 위해 주제/키워드/흐름을 색인에 추가)
+        st.session_state.full_draft_ref = save_draft(full_draft)
+        get_draft_index().add(topic, st.session_state.collected.get("user_keywords", []), document.flow_items)
         st.session_state.step = Step.DONE.value
-        
-        bot_say("전체 초안이 완성되었습니다!")
+
+        missing = document.missing()
+        if missing:
+            bot_say(f"전체 초안을 조립했어요. 다음 섹션은 아직 내용이 없어 자리만 표시해두었습니다: {', '.join(missing)}")
+        else:
+            bot_say("전체 초안이 완성되었습니다!")
         with st.expander("📋 전체 초안 (클릭하여 복사하기)", expanded=True):
             st.code(full_draft, language="markdown")
             st.info("위 코드 블록을 클릭하면 전체 내용을 복사할 수 있습니다.")
-        
-        bot_say("""이제 블로그 작성이 완료되었습니다! 
+
+        bot_say("""이제 블로그 작성이 완료되었습니다!
 - 전체 초안은 위의 확장 패널에서 확인하실 수 있습니다.
+- 사이드바의 '📥 내보내기'에서 Markdown, HTML, ZIP 파일로 받으실 수 있습니다.
 - 언제든지 '전체 초안'이라고 입력하시면 다시 볼 수 있습니다.
-- 새로운 블로그를 작성하시려면 페이지를 새로고침해주세요.""")
+- 새로운 블로그를 작성하시려면 사이드바의 '🆕 새 글 시작' 버튼을 눌러주세요.""")
     except Exception as e:
         st.error(f"전체 초안 생성 중 오류가 발생했습니다: {str(e)}")
         bot_say("죄송합니다. 전체 초안을 생성하는 중에 문제가 발생했습니다. 다시 시도해주세요.")
@@ -289,6 +131,53 @@ def bot_say(message):
     except Exception as e:
         st.error(f"메시지 표시 중 오류 발생: {str(e)}")
 
+# 초안 확인 메시지 종류별 템플릿
+DRAFT_CONFIRM_TEMPLATES = {
+    "intro": (PROMPT_INTRO_CONFIRM, "intro_content"),
+    "section": (PROMPT_SECTION_CONFIRM, "section_content"),
+}
+
+# 수정되어 더 이상 현재 초안이 아닌 확인 메시지 대신 표시할 문구
+SUPERSEDED_DRAFT_MESSAGE = "_(수정 전 초안입니다. '되돌려줘'라고 말씀하시면 이 버전으로 복원할 수 있어요.)_"
+
+# 메시지 본문 꺼내기
+def message_content(msg):
+    """메시지의 표시용 본문을 반환하는 함수
+
+    초안 확인 메시지는 저장소에서 본문을 불러와 템플릿에 넣습니다. 재실행마다 다시
+    그리는 작성 중인 초안만 결과를 캐시해 압축 해제와 포맷을 반복하지 않고, 펼쳐 볼 때만
+    그리는 이전 초안은 캐시하지 않아 압축해 둔 본문이 세션에 풀린 채 쌓이지 않게 합니다.
+    """
+    if "draft_ref" not in msg:
+        return msg["content"]
+    key = (msg["template"], msg["draft_ref"])
+    cached = st.session_state.get("render_cache")
+    if cached and cached[0] == key:
+        return cached[1]
+    template, field = DRAFT_CONFIRM_TEMPLATES[msg["template"]]
+    rendered = template.format(**{field: load_draft(msg["draft_ref"])})
+    if msg["draft_ref"] == st.session_state.draft_ref:
+        st.session_state.render_cache = (key, rendered)
+    return rendered
+
+# 초안 확인 메시지 전송 함수
+def bot_say_draft(template, draft_ref):
+    """초안 본문 대신 참조를 담은 확인 메시지를 추가하고 즉시 표시하는 함수"""
+    try:
+        message = {"role": "assistant", "template": template, "draft_ref": draft_ref,
+                   "section": st.session_state.get("current_section")}
+        st.session_state.messages.append(message)
+        start_code_check(draft_ref)
+
+        with st.chat_message("assistant"):
+            st.markdown(message_content(message))
+
+        st.session_state.is_typing = False
+        st.session_state.processed = True
+
+    except Exception as e:
+        st.error(f"메시지 표시 중 오류 발생: {str(e)}")
+
 # 사용자 입력 처리 함수
 def user_say():
     if prompt := st.chat_input("메시지를 입력하세요..."):
@@ -296,131 +185,1330 @@ def user_say():
         st.session_state.is_typing = True
         st.session_state.processed = False
 
-# AI 모델에 요청하고 응답 받는 공통 함수
-def process_model_request(prompt):
-    """AI 모델에 요청하고 응답을 받는 함수"""
+# 모델 작업 시간 제한(초)과 진행 상황 갱신 주기(초)
+MODEL_JOB_TIMEOUT = int(os.getenv("MODEL_JOB_TIMEOUT", "180"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "0.5"))
+# 사용자가 기다리지 않는 작업(추천 다듬기, 코드 예제 검사)만 남았을 때의 갱신 주기(초)
+BACKGROUND_POLL_INTERVAL = float(os.getenv("BACKGROUND_POLL_INTERVAL", "3"))
+
+# 모델 호출 실패 시 안내 메시지
+MODEL_EMPTY_MESSAGE = "죄송합니다. 응답을 생성하지 못했습니다. 다시 시도해주세요."
+MODEL_ERROR_MESSAGE = "죄송합니다. 응답을 생성하는 중에 문제가 발생했습니다. 다시 시도해주세요."
+MODEL_CANCELLED_MESSAGE = "작성이 중단되었습니다. '다시 작성해줘'라고 말씀하시면 새로 작성해드릴게요."
+MODEL_FAILURE_MESSAGES = (MODEL_EMPTY_MESSAGE, MODEL_ERROR_MESSAGE, MODEL_CANCELLED_MESSAGE)
+
+# 사이드바에 성능 지표 패널 표시 여부
+METRICS_DEBUG_PANEL = os.getenv("METRICS_DEBUG_PANEL", "0") == "1"
+
+# 섹션 후보를 한 번에 몇 개 받을지와 받는 방식 (single: candidate_count 한 번, parallel: 동시 호출)
+SECTION_CANDIDATES = int(os.getenv("SECTION_CANDIDATES", "3"))
+SECTION_CANDIDATE_MODE = os.getenv("SECTION_CANDIDATE_MODE", "single")
+
+# 이전 초안 색인으로 추천한 키워드/글 흐름을 모델로 한 번 더 다듬을지 여부
+LOCAL_RECOMMEND_REFINE = os.getenv("LOCAL_RECOMMEND_REFINE", "1") == "1"
+
+# 확인을 요청한 초안의 코드 예제 문법을 백그라운드에서 검사할지 여부
+CODE_CHECK = os.getenv("CODE_CHECK", "1") == "1"
+
+# 모델 호출 지표 태그 구성
+def metrics_tags(label, section=None):
+    """현재 단계, 섹션 번호(글 흐름 기준), 작업 이름, 세션을 태그로 만드는 함수
+
+    section을 주지 않으면 현재 작성 중인 섹션을 사용합니다.
+    """
+    flow_items = st.session_state.collected.get("finalized_flow", [])
+    section = section or st.session_state.get("current_section")
+    return {
+        "step": st.session_state.step,
+        "section": flow_items.index(section) if section in flow_items else None,
+        "label": label,
+        "session": st.session_state.session_id,
+    }
+
+# 작업 스레드에서 실행되는 모델 호출
+def run_model_job(job, client, scheduler, prompt, cache, use_cache=True, stream=True, priority=PRIORITY_INTERACTIVE,
+                  session_context=None, metrics=None, tags=None, budgets=None, semantic_cache=None,
+                  semantic_text=None):
+    return generate_text(client, prompt, cache=cache, use_cache=use_cache, on_chunk=job.update if stream else None,
+                         scheduler=scheduler, priority=priority, session_context=session_context,
+                         metrics=metrics, tags=tags, budgets=budgets, semantic_cache=semantic_cache,
+                         semantic_text=semantic_text)
+
+# 작업 스레드에서 실행되는 후보 여러 개 생성
+def run_candidates_job(job, client, scheduler, prompt, count, parallel=False, session_context=None, metrics=None,
+                       tags=None, budgets=None):
+    return generate_candidates(client, prompt, count, parallel=parallel, scheduler=scheduler,
+                               session_context=session_context, metrics=metrics, tags=tags, budgets=budgets)
+
+# 백그라운드 모델 작업 제출
+def submit_background_job(prompt, label=None, use_cache=True, stream=False, priority=PRIORITY_INTERACTIVE,
+                          session_context=None, section=None, semantic_text=None):
+    """화면과 연결되지 않은 모델 작업(미리 생성, 요약 등)을 제출하는 함수
+
+    section은 지표에 태그로 남길 섹션 제목입니다 (없으면 현재 섹션).
+    semantic_text는 유사도 캐시로 비교할 입력(주제 등)입니다.
+    """
+    return get_job_queue().submit(
+        run_model_job, get_gemini_client(), get_request_scheduler(), prompt, get_response_cache(),
+        use_cache, stream, priority, session_context, get_metrics(), metrics_tags(label, section),
+        get_output_budgets(), get_semantic_cache(), semantic_text, label=label, timeout=MODEL_JOB_TIMEOUT,
+        priority=priority,
+    )
+
+# 대기 중인 작업으로 등록
+def attach_pending_job(job, on_done, label=None, stream=True, context=None):
+    """작업이 끝나면 on_done 처리 함수가 호출되도록 세션에 등록하는 함수"""
+    st.session_state.pending_jobs.append({
+        "job_id": job.id,
+        "on_done": on_done,
+        "label": label,
+        "stream": stream,
+        "context": context or {},
+    })
+    st.session_state.is_typing = True
+
+# AI 모델에 요청하는 공통 함수
+def process_model_request(prompt, on_done, label=None, use_cache=True, stream=True, context=None,
+                          priority=PRIORITY_INTERACTIVE, session_context=None, section=None, semantic_text=None):
+    """AI 모델 호출을 작업 큐에 제출하고 작업 핸들을 반환하는 함수
+
+    호출은 작업 스레드에서 실행되며, 화면은 poll_pending_jobs가 주기적으로
+    갱신합니다. 완료되면 JOB_HANDLERS[on_done](텍스트, **context)가 호출됩니다.
+    use_cache=False이면 캐시를 건너뛰고 항상 새로 생성합니다(결과는 캐시에 저장).
+    semantic_text를 주면 입력이 거의 같은 이전 요청의 응답도 재사용합니다 (SEMANTIC_CACHE_LABELS에 든 작업만).
+    """
+    job = submit_background_job(prompt, label=label, use_cache=use_cache, stream=stream, priority=priority,
+                                session_context=session_context, section=section, semantic_text=semantic_text)
+    attach_pending_job(job, on_done, label=label, stream=stream, context=context)
+    return job
+
+# 화면을 막지 않는 추천 다듬기 작업 제출
+def submit_refine_job(prompt, on_done, label=None):
+    """로컬 추천을 다듬는 모델 작업을 대기 작업으로 등록하지 않고 제출하는 함수
+
+    사용자는 로컬 추천에 바로 답할 수 있고, 결과는 poll_refine_jobs가
+    JOB_HANDLERS[on_done](텍스트)로 반영합니다 (그 사이 단계가 바뀌었으면 처리 함수가 버림).
+    """
+    for entry in list(st.session_state.refine_jobs):
+        if entry["on_done"] == on_done:
+            get_job_queue().cancel(entry["job_id"])
+            st.session_state.refine_jobs.remove(entry)
+    job = submit_background_job(prompt, label=label, priority=PRIORITY_BATCH)
+    st.session_state.refine_jobs.append({"job_id": job.id, "on_done": on_done})
+    return job
+
+# 작업 결과 꺼내기
+def job_result_text(job):
+    """작업 결과 텍스트와 호출 정보를 반환하는 함수 (실패 시 안내 메시지로 대체)"""
+    if job is None:
+        return MODEL_ERROR_MESSAGE, {}, False
+    if job.timed_out:
+        st.error("응답 생성 시간이 초과되었습니다.")
+        return MODEL_ERROR_MESSAGE, {}, False
+    if job.cancelled:
+        return MODEL_CANCELLED_MESSAGE, {}, False
     try:
-        # 모델 인스턴스 생성
-        model = get_chat_model()
-        
-        # 응답 생성 시도
-        response = model.generate_content(
-            prompt,
-            generation_config={
-                "temperature": 0.7,
-                "top_p": 0.8,
-                "top_k": 40,
-                "max_output_tokens": 2048,
-            }
-        )
-        
-        # 응답이 없는 경우 처리
-        if not response or not response.text:
-            return "죄송합니다. 응답을 생성하지 못했습니다. 다시 시도해주세요."
-            
-        return response.text
-        
+        text, info = job.result()
+    except JobCancelled:
+        return MODEL_CANCELLED_MESSAGE, {}, False
     except Exception as e:
-        error_msg = f"API 호출 중 오류가 발생했습니다: {str(e)}"
-        st.error(error_msg)
-        return "죄송합니다. 응답을 생성하는 중에 문제가 발생했습니다. 다시 시도해주세요."
+        if is_rate_limit_error(e):
+            st.error("지금 요청이 많아 API 사용량 한도에 도달했습니다. 잠시 후 다시 시도해주세요.")
+            return MODEL_ERROR_MESSAGE, {}, False
+        st.error(f"API 호출 중 오류가 발생했습니다: {str(e)}")
+        return MODEL_ERROR_MESSAGE, {}, False
+    if not text:
+        return MODEL_EMPTY_MESSAGE, info, False
+    return text, info, True
+
+# 타이핑 인디케이터 표시
+def show_typing_indicator():
+    with st.chat_message("assistant"):
+        st.markdown('<div class="typing-indicator"><span class="typing-text">챗봇이 작성하고 있어요</span><span class="dots"><span class="dot"></span><span class="dot"></span><span class="dot"></span></span></div>', unsafe_allow_html=True)
+
+# 대기 중인 작업 확인
+def poll_pending_jobs():
+    """끝난 작업은 처리 함수를 호출하고, 진행 중인 작업은 현재까지의 내용을 표시하는 함수"""
+    queue = get_job_queue()
+    streaming_shown = False
+    for entry in list(st.session_state.pending_jobs):
+        job = queue.get(entry["job_id"])
+        if job is not None and not job.done() and not job.cancelled:
+            # 진행 중인 스트리밍 응답 표시
+            if entry["stream"] and job.partial and not streaming_shown:
+                with st.chat_message("assistant"):
+                    st.markdown(job.partial + "▌")
+                streaming_shown = True
+            continue
+
+        st.session_state.pending_jobs.remove(entry)
+        if job is not None and job.timed_out:
+            get_metrics().record_count("job_timeouts", st.session_state.step, st.session_state.session_id)
+        text, _, _ = job_result_text(job)
+        JOB_HANDLERS[entry["on_done"]](text, **entry["context"])
+
+    if st.session_state.pending_jobs:
+        if not streaming_shown:
+            show_typing_indicator()
+        if st.button("작성 중단", key="cancel_pending_jobs"):
+            cancel_pending_jobs()
+    st.session_state.is_typing = bool(st.session_state.pending_jobs)
+
+# 대기 중인 작업 취소
+def cancel_pending_jobs():
+    """사용자가 중단을 요청한 작업들을 취소하는 함수 (처리 함수에는 중단 메시지가 전달됨)"""
+    queue = get_job_queue()
+    for entry in st.session_state.pending_jobs:
+        queue.cancel(entry["job_id"])
+
+# 끝난 추천 다듬기 반영
+def poll_refine_jobs():
+    """끝난 추천 다듬기 작업의 처리 함수를 호출하는 함수
+
+    처리 함수가 bot_say로 메시지를 바로 그리므로 display_messages() 뒤에 호출합니다.
+    """
+    queue = get_job_queue()
+    for entry in list(st.session_state.refine_jobs):
+        job = queue.get(entry["job_id"])
+        if job is not None and not job.done() and not job.cancelled:
+            continue
+        st.session_state.refine_jobs.remove(entry)
+        if job is None or job.cancelled:
+            continue
+        try:
+            text, _ = job.result()
+        except Exception:
+            continue
+        JOB_HANDLERS[entry["on_done"]](text or "")
+
+# 끝난 백그라운드 결과 반영
+def collect_background_results():
+    """끝난 섹션 요약과 코드 예제 검사 결과를 세션 상태로 옮기는 함수 (화면에는 그리지 않음)
+
+    작업 스레드가 세션 dict를 직접 고치면 스냅샷 저장(json.dumps)과 겹칠 수 있으므로
+    결과는 항상 스크립트 스레드에서 이 함수로 반영합니다.
+    """
+    queue = get_job_queue()
+    for section_title, job_id in list(st.session_state.summary_jobs.items()):
+        job = queue.get(job_id)
+        if job is not None and not job.done() and not job.cancelled:
+            continue
+        del st.session_state.summary_jobs[section_title]
+        if job is None:
+            continue
+        try:
+            text, _ = job.result()
+        except Exception:
+            continue
+        if text:
+            st.session_state.section_summaries[section_title] = text
+
+    for ref, job in list(st.session_state.code_check_jobs.items()):
+        if not job.done():
+            continue
+        del st.session_state.code_check_jobs[ref]
+        try:
+            results = job.result()
+        except Exception:
+            results = []
+        st.session_state.code_checks[ref] = results
+        if any(result["status"] == ERROR for result in results):
+            get_metrics().record_count("code_check_failures", st.session_state.step, st.session_state.session_id)
+
+# 초안 저장소에 본문 저장
+def save_draft(text):
+    return st.session_state.draft_store.put(text)
+
+# 초안 저장소에서 본문 불러오기
+def load_draft(ref):
+    return (st.session_state.draft_store.get(ref) if ref else None) or ""
+
+# 아직 참조되는 초안 목록
+def live_draft_refs():
+    refs = {msg["draft_ref"] for msg in st.session_state.messages if "draft_ref" in msg}
+    refs.update(st.session_state.generated_drafts.values())
+    refs.add(st.session_state.draft_ref)
+    refs.add(st.session_state.full_draft_ref)
+    if st.session_state.section_candidates:
+        refs.update(st.session_state.section_candidates["refs"])
+    return refs
+
+# 전체 초안 문서 가져오기
+def get_full_document():
+    """섹션이 확정될 때마다 갱신되는 전체 초안 문서를 반환하는 함수
+
+    세션을 복원한 직후처럼 문서가 없으면 확정된 섹션들로 한 번 만들고,
+    글 흐름이 바뀌었으면 받은 본문은 그대로 두고 순서만 다시 맞춥니다.
+    """
+    collected = st.session_state.collected
+    flow_items = collected.get("finalized_flow", [])
+    document = st.session_state.full_document
+    if document is None:
+        document = DraftDocument(current_blog_title() or collected.get("user_topic", ""), flow_items,
+                                 st.session_state.draft_store.get, st.session_state.generated_drafts)
+        st.session_state.full_document = document
+    elif document.flow_items != flow_items:
+        document.set_flow(flow_items)
+    return document
+
+# 확정된 섹션 저장
+def store_section(section_title, ref, text):
+    """확정된 섹션을 저장하고 전체 초안 문서에서 그 섹션만 교체하는 함수"""
+    st.session_state.generated_drafts[section_title] = ref
+    get_full_document().set_section(section_title, ref, text)
+
+# 지금 주제에 맞는 미리 생성된 제목
+def current_blog_title():
+    blog_title = st.session_state.blog_title
+    if blog_title and blog_title["topic"] == st.session_state.collected.get("user_topic"):
+        return blog_title["title"]
+    return None
+
+# 전체 초안 제목 미리 생성
+def start_title_job():
+    """글 흐름을 확정하면 전체 초안에 쓸 제목을 백그라운드에서 미리 생성하는 함수
+
+    주제가 같으면 이미 받은 제목이나 진행 중인 작업을 그대로 씁니다.
+    """
+    topic = st.session_state.collected.get("user_topic")
+    title_job = st.session_state.title_job
+    if not topic or current_blog_title() or (title_job and title_job["topic"] == topic):
+        return
+    if title_job:
+        get_job_queue().cancel(title_job["job_id"])
+    job = submit_background_job(PROMPT_BLOG_TITLE.format(topic=topic), label="title", priority=PRIORITY_BATCH,
+                                semantic_text=topic)
+    st.session_state.title_job = {"job_id": job.id, "topic": topic}
+
+# 미리 생성한 제목 가져오기
+def take_title_job():
+    """제목 작업이 끝났으면 제목을 저장하고, 아직 진행 중이면 그 작업을 반환하는 함수"""
+    title_job = st.session_state.title_job
+    if not title_job:
+        return None
+    job = get_job_queue().get(title_job["job_id"])
+    if job is not None and not job.done() and not job.cancelled:
+        return job
+    st.session_state.title_job = None
+    if job is None or job.cancelled:
+        return None
+    try:
+        text, _ = job.result()
+    except Exception:
+        return None
+    title = clean_title(text or "")
+    if title and title_job["topic"] == st.session_state.collected.get("user_topic"):
+        st.session_state.blog_title = {"topic": title_job["topic"], "title": title}
+    return None
+
+# 확인 메시지 종류
+def confirm_template(step):
+    return "intro" if step in (Step.INTRO_WRITE.value, Step.INTRO_CONFIRM.value) else "section"
+
+# 작성 중인 초안 교체
+def replace_current_draft(text, record_history=True):
+    """수정되거나 되돌린 초안으로 작성 중인 초안을 바꾸는 함수
+
+    record_history이면 이전 초안으로 되돌릴 수 있도록 델타만 이력에 남깁니다.
+    이전 초안의 확인 메시지는 짧은 안내로 바꾸고, 더 이상 참조되지 않는
+    본문은 저장소에서 지웁니다.
+    """
+    previous = st.session_state.draft_ref
+    ref = save_draft(text)
+    close_candidates()
+    if previous and previous != ref:
+        if record_history:
+            history = st.session_state.revision_history.setdefault(st.session_state.current_section, [])
+            history.append(make_delta(text, load_draft(previous)))
+        for msg in st.session_state.messages:
+            if msg.get("draft_ref") == previous:
+                msg.clear()
+                msg.update({"role": "assistant", "content": SUPERSEDED_DRAFT_MESSAGE})
+    st.session_state.draft_ref = ref
+    st.session_state.draft_store.collect(live_draft_refs())
+    return ref
+
+# 섹션 후보 정리
+def close_candidates(note="_(후보 비교를 마쳤어요.)_"):
+    """열려 있는 후보 메시지를 짧은 안내로 바꾸고 후보 목록을 비우는 함수"""
+    candidates = st.session_state.section_candidates
+    if not candidates:
+        return
+    for msg in st.session_state.messages:
+        if msg.get("candidate_refs") == candidates["refs"]:
+            msg.pop("candidate_refs")
+            msg["content"] = note
+    st.session_state.section_candidates = None
+
+# 섹션 후보 선택
+def pick_candidate(choice):
+    """고른 후보를 작성 중인 초안으로 바꾸고 다시 확인을 요청하는 함수
+
+    버튼 콜백으로 실행되므로 메시지는 화면에 바로 그리지 않고 목록에만 추가합니다.
+    """
+    candidates = st.session_state.section_candidates
+    if not candidates:
+        return
+    text = load_draft(candidates["refs"][choice])
+    close_candidates(f"_('{candidates['section']}' 후보 {len(candidates['refs'])}개 중 {choice + 1}번을 선택했어요.)_")
+    ref = replace_current_draft(text)
+    st.session_state.messages.append({"role": "assistant", "template": confirm_template(st.session_state.step),
+                                      "draft_ref": ref, "section": st.session_state.current_section})
+    start_code_check(ref)
+    get_metrics().record_count("candidate_picks", st.session_state.step, st.session_state.session_id)
+    start_prefetch(st.session_state.current_section, text)
+
+# 섹션 후보 탭 표시
+def show_candidate_tabs(index, msg):
+    """후보마다 탭을 만들어 본문은 접어 두고, 탭마다 선택 버튼을 다는 함수"""
+    refs = msg["candidate_refs"]
+    for i, tab in enumerate(st.tabs([f"후보 {i + 1}" for i in range(len(refs))])):
+        with tab:
+            text = load_draft(refs[i])
+            with st.expander(f"후보 {i + 1} 본문 펼치기 ({len(text)}자)", expanded=False):
+                st.markdown(text)
+            st.button("이 후보로 선택", key=f"pick_candidate_{index}_{i}", on_click=pick_candidate, args=(i,))
+
+# 코드 예제 검사 시작
+def start_code_check(ref):
+    """초안의 코드 예제 검사를 검사기 작업 스레드에 맡기는 함수 (화면 응답은 기다리지 않음)"""
+    if not CODE_CHECK or not ref or ref in st.session_state.code_checks or ref in st.session_state.code_check_jobs:
+        return
+    live_refs = live_draft_refs()
+    for stale in [key for key in st.session_state.code_check_jobs if key not in live_refs]:
+        st.session_state.code_check_jobs.pop(stale).cancel()
+    for stale in [key for key in st.session_state.code_checks if key not in live_refs]:
+        del st.session_state.code_checks[stale]
+    st.session_state.code_check_jobs[ref] = get_code_validator().submit(load_draft(ref))
+
+# 코드 예제 검사 결과 가져오기
+def code_check_results(ref):
+    """끝난 검사의 결과 목록을 반환하는 함수 (검사 중이면 None, 복원된 세션처럼 검사가 없으면 시작)"""
+    if ref in st.session_state.code_checks:
+        return st.session_state.code_checks[ref]
+    if ref not in st.session_state.code_check_jobs:
+        start_code_check(ref)
+    return None
+
+# 코드 예제 검사 결과 표시
+def show_code_check(index, ref):
+    """작성 중인 초안 아래에 코드 예제 검사 결과를 붙이고, 오류가 있으면 고치기 버튼을 다는 함수"""
+    results = code_check_results(ref)
+    if results is None:
+        st.caption("🔎 코드 예제 문법을 확인하고 있어요...")
+        return
+    checked = [result for result in results if result["status"] in (ERROR, TIMEOUT, OK)]
+    if not checked:
+        return
+    errors = [result for result in checked if result["status"] == ERROR]
+    notes = [result for result in checked if result["status"] == TIMEOUT]
+    if not errors:
+        st.caption(f"✅ 코드 예제 {len(checked) - len(notes)}개의 문법을 확인했어요."
+                   + (f" ({len(notes)}개는 시간 안에 확인하지 못했어요)" if notes else ""))
+        return
+    st.warning("⚠️ 코드 예제에서 문법 오류를 찾았어요:\n" +
+               "\n".join(f"- {format_check_result(result)}" for result in errors))
+    can_fix = (st.session_state.step in (Step.INTRO_CONFIRM.value, Step.SECTION_CONFIRM.value)
+               and not st.session_state.pending_jobs)
+    if can_fix and st.button("🛠️ 코드 오류 고쳐줘", key=f"fix_code_{index}"):
+        request_code_fix(ref, errors)
+
+# 코드 오류 수정 요청
+def request_code_fix(ref, errors):
+    """문법 오류가 있는 코드 블록만 대상으로 블록 단위 수정을 요청하는 함수"""
+    request = "다음 코드 예제의 문법 오류를 고쳐주세요. 코드의 의도와 설명은 그대로 유지해주세요.\n" + \
+        "\n".join(f"- {format_check_result(result)}" for result in errors)
+    st.session_state.messages.append({"role": "user", "content": "🛠️ 코드 오류 고쳐줘"})
+    discard_prefetch()
+    handle_section_revision(st.session_state.current_section, request, load_draft(ref),
+                            targets=[result["block"] for result in errors])
+
+# 마지막 수정 되돌리기
+def undo_revision():
+    """작성 중인 섹션의 마지막 수정을 되돌리고 다시 확인을 요청하는 함수"""
+    history = st.session_state.revision_history.get(st.session_state.current_section)
+    if not history:
+        bot_say("되돌릴 수정 내역이 없어요.")
+        return
+    restored = apply_delta(load_draft(st.session_state.draft_ref), history.pop())
+    ref = replace_current_draft(restored, record_history=False)
+    bot_say("이전 초안으로 되돌렸어요.")
+    bot_say_draft(confirm_template(st.session_state.step), ref)
+    start_prefetch(st.session_state.current_section, restored)
+
+# 확정된 섹션 요약 생성
+def summarize_section(section_title, section_content, prefetched=None):
+    """확정된 섹션의 요약을 백그라운드에서 한 번만 생성해 generated_drafts 옆에 저장하는 함수
+
+    prefetched에 미리 시작된 요약 작업이 있으면 모델을 다시 호출하지 않습니다.
+    요약은 다다음 섹션부터 쓰이므로 완료를 기다리지 않습니다.
+    """
+    job = None
+    if prefetched and prefetched.get("summary_job_id"):
+        job = get_job_queue().get(prefetched["summary_job_id"])
+    if job is None or job.cancelled:
+        prompt = PROMPT_SECTION_SUMMARY.format(section_title=section_title, section_content=section_content)
+        job = submit_background_job(prompt, label="section_summary", priority=PRIORITY_SPECULATIVE,
+                                    section=section_title)
+    st.session_state.summary_jobs[section_title] = job.id
+
+# 이전 섹션 컨텍스트 구성
+def build_previous_sections(flow_items, current_index, token_budget=None, drafts=None):
+    """current_index 이전 섹션들로 프롬프트용 컨텍스트를 만드는 함수 (generation.compose_previous_sections)
+
+    drafts(섹션 제목 → 초안 참조)를 주면 generated_drafts 대신 사용합니다(미리 생성용).
+    요약이 실패했거나 취소된 섹션은 요약을 다시 요청하고, 그동안은 본문 앞부분을 씁니다.
+    """
+    if drafts is None:
+        drafts = st.session_state.generated_drafts
+    collect_background_results()
+    texts = {title: load_draft(ref) for title, ref in drafts.items()}
+    summaries = st.session_state.section_summaries
+    for title in flow_items[:max(current_index - 1, 0)]:
+        if texts.get(title) and title not in summaries and title not in st.session_state.summary_jobs:
+            summarize_section(title, texts[title])
+    return compose_previous_sections(flow_items, current_index, texts, summaries, token_budget)
+
+# 스타일 문자열 구성
+def get_style_text():
+    return format_style_text(st.session_state.collected)
+
+# 세션 컨텍스트 구성
+def build_system_instruction():
+    """시스템 프롬프트와 현재 세션의 주제, 키워드, 스타일, 글 흐름을 합치는 함수"""
+    return compose_system_instruction(st.session_state.collected)
+
+# 세션 컨텍스트 불러오기
+def get_session_context():
+    """세션 컨텍스트를 한 번만 등록하고, 키워드/스타일/흐름이 바뀌면 새로 등록하는 함수"""
+    system_instruction = build_system_instruction()
+    context = st.session_state.get("session_context")
+    if context and context["system_instruction"] == system_instruction:
+        return context
+    client = get_gemini_client()
+    if context:
+        client.release_context(context)
+    context = client.register_context(
+        system_instruction,
+        estimated_tokens=estimate_tokens(system_instruction),
+        ttl=SESSION_CONTEXT_TTL,
+    )
+    st.session_state.session_context = context
+    return context
+
+# 섹션 작성 프롬프트 구성
+def build_section_write_prompt(flow_items, section_index, drafts=None):
+    """section_index 섹션의 PROMPT_SECTION_WRITE 프롬프트를 만드는 함수"""
+    return PROMPT_SECTION_WRITE.format(
+        section_title=flow_items[section_index],
+        previous_sections=build_previous_sections(flow_items, section_index, drafts=drafts)
+    )
+
+# 다음 섹션 미리 생성 시작
+def start_prefetch(section_title, draft):
+    """현재 초안이 수락된다고 가정하고 요약과 다음 섹션 초안을 백그라운드에서 생성하는 함수"""
+    discard_prefetch()
+    if draft in MODEL_FAILURE_MESSAGES:
+        return
+    flow_items = st.session_state.collected.get("finalized_flow", [])
+    current_index = flow_items.index(section_title)
+
+    summary_prompt = PROMPT_SECTION_SUMMARY.format(section_title=section_title, section_content=draft)
+    prefetch = {
+        "section_title": section_title,
+        "draft": draft,
+        "prompt": None,
+        "job_id": None,
+        "summary_job_id": submit_background_job(summary_prompt, label="section_summary",
+                                                priority=PRIORITY_SPECULATIVE, section=section_title).id,
+    }
+    if current_index < len(flow_items) - 1:
+        drafts = dict(st.session_state.generated_drafts)
+        drafts[section_title] = save_draft(draft)
+        prefetch["prompt"] = build_section_write_prompt(flow_items, current_index + 1, drafts)
+        prefetch["job_id"] = submit_background_job(prefetch["prompt"], label="prefetch", stream=True,
+                                                  priority=PRIORITY_SPECULATIVE,
+                                                  session_context=get_session_context(),
+                                                  section=flow_items[current_index + 1]).id
+    st.session_state.prefetch = prefetch
+
+# 미리 생성 지표 기록 함수 만들기
+def prefetch_recorder():
+    """세션의 미리 생성 집계(prefetch_stats)와 지표 기록기에 함께 반영하는 함수를 반환하는 함수
+
+    반환한 함수는 작업 스레드의 완료 콜백에서도 호출되므로 필요한 값을 미리 잡아 둡니다.
+    """
+    stats = st.session_state.prefetch_stats
+    metrics = get_metrics()
+    step, session = st.session_state.step, st.session_state.session_id
+
+    def record(key, amount=1):
+        stats[key] += amount
+        metrics.record_count(f"prefetch_{key}", step, session, amount=amount)
+
+    return record
+
+# 낭비된 미리 생성 토큰 집계
+def _count_wasted_tokens(record, prompt, job):
+    try:
+        text, info = job.result()
+    except Exception:
+        # 도중에 취소된 경우 그때까지 생성된 분량만 집계
+        if job.partial:
+            record("wasted_tokens", estimate_tokens(prompt) + estimate_tokens(job.partial))
+        return
+    if info.get("cache_hit"):
+        return
+    record("wasted_tokens", (info.get("prompt_tokens") or estimate_tokens(prompt)) +
+           (info.get("output_tokens") or estimate_tokens(text)))
 
-# 사용자 입력 처리 핵심 함수
-def handle_input(user_input):
-    # 단계별 처리 로직
-    step = st.session_state.step
-    user_input_lower = user_input.lower()
-    
-    # '전체 초안 보기' 요청 처리
-    if any(word in user_input_lower for word in ["전체 초안", "모든 초안", "전체 내용", "결과 보기"]):
-        if hasattr(st.session_state, 'full_draft') and st.session_state.full_draft:
-            st.session_state.step = Step.DONE.value
-            bot_say("네, 전체 초안을 다시 보여드릴게요:")
-            with st.expander("📋 전체 초안 (클릭하여 복사하기)", expanded=True):
-                st.code(st.session_state.full_draft, language="markdown")
-                st.info("위 코드 블록을 클릭하면 전체 내용을 복사할 수 있습니다.")
-            return
+# 미리 생성된 초안 작업 폐기
+def _discard_prefetched_draft(prefetch):
+    job = get_job_queue().get(prefetch["job_id"]) if prefetch["job_id"] else None
+    if job is None:
+        return
+    record = prefetch_recorder()
+    record("discarded")
+    if not job.cancel():
+        # 이미 실행 중이면 중단된 뒤 사용한 토큰을 낭비로 집계
+        job.future.add_done_callback(lambda _: _count_wasted_tokens(record, prefetch["prompt"], job))
+
+# 미리 생성 결과 폐기
+def discard_prefetch():
+    """수정 요청 등으로 쓸모없어진 미리 생성 작업을 취소하는 함수"""
+    prefetch = st.session_state.get("prefetch")
+    if not prefetch:
+        return
+    st.session_state.prefetch = None
+    get_job_queue().cancel(prefetch["summary_job_id"])
+    _discard_prefetched_draft(prefetch)
+
+# 미리 생성 작업 가져오기
+def take_prefetch(section_title, draft):
+    """수락된 초안과 같은 초안으로 시작한 미리 생성 작업을 꺼내는 함수"""
+    prefetch = st.session_state.get("prefetch")
+    if not prefetch:
+        return None
+    if prefetch["section_title"] != section_title or prefetch["draft"] != draft:
+        discard_prefetch()
+        return None
+    st.session_state.prefetch = None
+    return prefetch
+
+# 미리 생성된 다음 섹션 초안 사용
+def use_prefetched_draft(prefetch, prompt, on_done, label):
+    """미리 생성 중인 초안이 현재 프롬프트와 일치하면 대기 작업으로 넘겨받는 함수
+
+    아직 생성 중이어도 그대로 이어받아, 누적된 내용이 스트리밍처럼 표시됩니다.
+    """
+    if not prefetch or not prefetch["job_id"]:
+        return False
+    record = prefetch_recorder()
+    job = get_job_queue().get(prefetch["job_id"])
+    if job is None or job.cancelled or prefetch["prompt"] != prompt:
+        record("misses")
+        _discard_prefetched_draft(prefetch)
+        return False
+    record("hits")
+    attach_pending_job(job, on_done, label=label, stream=True)
+    return True
+
+# 도입부 작성 프롬프트 구성
+def build_intro_write_prompt(section_title):
+    return PROMPT_INTRO_WRITE.format(section_title=section_title)
+
+# 도입부 작성
+def write_intro():
+    """글 흐름의 첫 항목을 도입부로 작성하도록 요청하는 함수"""
+    flow_items = st.session_state.collected.get("finalized_flow", [])
+    section_title = flow_items[0]
+    st.session_state.current_section = section_title
+    st.session_state.step = Step.INTRO_WRITE.value
+    bot_say(f"먼저 도입부인 '{section_title}'을(를) 작성해볼게요...")
+    process_model_request(build_intro_write_prompt(section_title), "intro_draft", label="intro_write",
+                          session_context=get_session_context())
+
+@job_handler("intro_draft")
+def on_intro_draft(intro_content):
+    """작성된 도입부를 보여주고 확인을 요청하는 함수 (실패하면 안내만 하고 작성 단계에 머묾)"""
+    if intro_content in MODEL_FAILURE_MESSAGES:
+        bot_say(intro_content)
+        return
+    st.session_state.draft_ref = save_draft(intro_content)
+    st.session_state.step = Step.INTRO_CONFIRM.value
+    bot_say_draft("intro", st.session_state.draft_ref)
+    start_prefetch(st.session_state.current_section, intro_content)
+
+@job_handler("section_draft")
+def on_section_draft(section_content):
+    """작성된 섹션을 보여주고 확인을 요청하는 함수 (실패하면 안내만 하고 작성 단계에 머묾)"""
+    if section_content in MODEL_FAILURE_MESSAGES:
+        bot_say(section_content)
+        return
+    st.session_state.draft_ref = save_draft(section_content)
+    st.session_state.step = Step.SECTION_CONFIRM.value
+    bot_say_draft("section", st.session_state.draft_ref)
+    start_prefetch(st.session_state.current_section, section_content)
+
+# 동시 작성용 섹션 프롬프트 구성 (이전 섹션 본문 없이 글 흐름과 키워드만 참고)
+def build_batch_section_prompt(flow_items, index):
+    if index == 0:
+        return build_intro_write_prompt(flow_items[0])
+    return PROMPT_SECTION_WRITE_BATCH.format(section_title=flow_items[index], section_number=index + 1)
+
+# 전체 섹션 동시 작성
+def draft_all_sections():
+    """글 흐름의 모든 섹션을 동시에 작성하도록 요청하는 함수
+
+    각 섹션은 이전 섹션 본문 대신 글 흐름과 키워드를 참고해 작성하므로
+    서로 기다리지 않고 병렬로 생성됩니다. 진행 상황은 사이드바에 표시되고,
+    모두 끝나면 바로 전체 초안으로 넘어갑니다.
+    """
+    flow_items = st.session_state.collected.get("finalized_flow", [])
+    discard_prefetch()
+    st.session_state.step = Step.SECTION_WRITE.value
+    bot_say(f"{len(flow_items)}개 섹션을 한 번에 작성해볼게요. 진행 상황은 왼쪽 사이드바에서 확인하실 수 있어요.")
+
+    st.session_state.batch_progress = {}
+    session_context = get_session_context()
+    for i, title in enumerate(flow_items):
+        st.session_state.batch_progress[title] = "⏳"
+        process_model_request(build_batch_section_prompt(flow_items, i), "batch_section", label="batch_section", stream=False,
+                              context={"title": title}, priority=PRIORITY_BATCH,
+                              session_context=session_context, section=title)
+
+@job_handler("batch_section")
+def on_batch_section(text, title, retried=False):
+    """동시 작성 중 한 섹션이 끝날 때마다 결과를 반영하는 함수
+
+    실패한 섹션은 다른 섹션과 같은 동시 작성용 프롬프트로 한 번 더 작성하고(재시도끼리도 동시에 실행),
+    모든 섹션이 끝나면 전체 초안으로 넘어갑니다.
+    """
+    progress = st.session_state.batch_progress
+    if text not in MODEL_FAILURE_MESSAGES:
+        store_section(title, save_draft(text), text)
+        progress[title] = "✅"
+    elif text != MODEL_CANCELLED_MESSAGE and not retried:
+        flow_items = st.session_state.collected.get("finalized_flow", [])
+        prompt = build_batch_section_prompt(flow_items, flow_items.index(title))
+        progress[title] = "🔁"
+        process_model_request(prompt, "batch_section", label="batch_section", stream=False,
+                              context={"title": title, "retried": True}, priority=PRIORITY_BATCH,
+                              session_context=get_session_context(), section=title)
+    else:
+        progress[title] = "⚠️"
+
+    if any(entry["on_done"] == "batch_section" for entry in st.session_state.pending_jobs):
+        return
+    failed = [title for title, status in progress.items() if status != "✅"]
+    st.session_state.batch_progress = {}
+    if failed:
+        st.session_state.step = Step.FLOW_CONFIRM.value
+        bot_say(f"다음 섹션을 작성하지 못했어요: {', '.join(failed)}\n"
+                "다시 '한 번에 작성해줘'라고 하시거나, '네'라고 말씀하시면 도입부부터 한 섹션씩 작성할게요.")
+        return
+    show_full_draft()
+
+# 블록 단위 수정 대상 찾기
+def select_revision_targets(original_draft, user_input):
+    """수정 요청이 가리키는 블록을 찾는 함수 (대상이 없거나 초안 대부분이면 None)"""
+    blocks = split_blocks(original_draft)
+    targets = find_target_blocks(blocks, user_input)
+    if not targets:
+        return None
+    target_size = sum(len(blocks[i].text) for i in targets)
+    if target_size > len(original_draft) * BLOCK_REVISION_MAX_RATIO:
+        return None
+    return blocks, targets
+
+# 섹션 수정 처리 함수
+def handle_section_revision(section_title, user_input, original_draft, whole_section=False, targets=None):
+    """섹션 수정을 요청하는 함수 (완료되면 on_section_revised에서 확인을 요청)
+
+    요청이 특정 문단이나 코드 블록을 가리키면(또는 targets로 블록 번호를 주면)
+    그 블록과 앞뒤 문맥만 보내고, 그렇지 않으면 섹션 전체를 다시 작성합니다.
+    """
+    try:
+        # '다시' 요청은 같은 입력이라도 새로 생성
+        use_cache = "다시" not in user_input
+        if whole_section:
+            selected = None
+        elif targets:
+            selected = split_blocks(original_draft), targets
         else:
-            bot_say("아직 전체 초안이 작성되지 않았어요. 모든 단계를 완료하면 전체 초안을 볼 수 있습니다.")
-            return
+            selected = select_revision_targets(original_draft, user_input)
+        if selected:
+            blocks, targets = selected
+            prompt = PROMPT_BLOCK_REVISION.format(
+                section_title=section_title,
+                user_request=user_input,
+                target_blocks=format_target_blocks(blocks, targets),
+                surrounding=context_around(blocks, targets) or "(없음)",
+            )
+            bot_say(f"네, '{section_title}' 섹션에서 요청하신 부분만 수정해볼게요...")
+            process_model_request(prompt, "section_blocks_revised", label="block_revision", use_cache=use_cache,
+                                  stream=False,
+                                  session_context=get_session_context(),
+                                  context={"section_title": section_title, "step": st.session_state.step,
+                                           "user_input": user_input, "original_draft": original_draft,
+                                           "targets": targets})
+            return True
+
+        # 이전 섹션들의 내용을 수집 (직전 섹션은 전문, 나머지는 요약)
+        flow_items = st.session_state.collected.get("finalized_flow", [])
+        current_index = flow_items.index(section_title)
+        previous_sections_text = build_previous_sections(flow_items, current_index)
 
-    # 도입부 확인 단계
-    if step == Step.INTRO_CONFIRM.value:
-        # 수정 요청이 있는지 확인
-        if any(word in user_input_lower for word in ["수정", "바꿔", "다시", "다른", "변경", "고치", "아니"]):
-            section_title = st.session_state.current_section
-            original_draft = st.session_state.draft_section_content
-            if handle_section_revision(section_title, user_input, original_draft):
-                confirm_message = PROMPT_INTRO_CONFIRM.format(intro_content=st.session_state.draft_section_content)
-                bot_say(confirm_message)
+        # 수정 요청 처리
+        prompt = PROMPT_REVISION.format(
+            section_title=section_title,
+            user_request=user_input,
+            original_draft=original_draft,
+            previous_sections=previous_sections_text
+        )
+        bot_say(f"네, '{section_title}' 섹션을 수정해볼게요...")
+        process_model_request(prompt, "section_revised", label="revision", use_cache=use_cache,
+                              session_context=get_session_context(),
+                              context={"section_title": section_title, "step": st.session_state.step})
+        return True
+    except Exception as e:
+        st.error(f"섹션 수정 중 오류가 발생했습니다: {str(e)}")
+        return False
+
+@job_handler("section_revised")
+def on_section_revised(revised_content, section_title, step):
+    """수정된 섹션을 보여주고 다시 확인을 요청하는 함수"""
+    if revised_content in MODEL_FAILURE_MESSAGES:
+        bot_say(revised_content)
+        return
+    ref = replace_current_draft(revised_content)
+    bot_say_draft(confirm_template(step), ref)
+    start_prefetch(section_title, revised_content)
+
+@job_handler("section_blocks_revised")
+def on_section_blocks_revised(response, section_title, step, user_input, original_draft, targets):
+    """수정된 블록을 원래 초안에 끼워 넣고 변경 내용과 함께 확인을 요청하는 함수"""
+    if response in MODEL_FAILURE_MESSAGES:
+        bot_say(response)
+        return
+    revised = parse_revised_blocks(response, len(targets))
+    if revised is None:
+        # 응답 형식이 맞지 않으면 섹션 전체 수정으로 전환
+        handle_section_revision(section_title, user_input, original_draft, whole_section=True)
+        return
+    patched = patch_blocks(split_blocks(original_draft), targets, revised)
+    on_section_revised(patched, section_title, step)
+    diff = unified_diff(original_draft, patched)
+    if diff:
+        bot_say(f"변경된 부분입니다:\n{fence_block(diff, 'diff')}")
+
+# 단계별 입력 처리 동작 등록
+STEP_ACTIONS = {}
+
+def step_action(name):
+    """단계 표(step_engine.STEP_TABLE)의 동작 이름에 처리 함수를 등록하는 데코레이터"""
+    def register(func):
+        STEP_ACTIONS[name] = func
+        return func
+    return register
+
+@step_action("show_saved_draft")
+def show_saved_draft(user_input, intents):
+    """'전체 초안 보기' 요청을 처리하는 함수"""
+    if st.session_state.full_draft_ref:
+        st.session_state.step = Step.DONE.value
+        bot_say("네, 전체 초안을 다시 보여드릴게요:")
+        with st.expander("📋 전체 초안 (클릭하여 복사하기)", expanded=True):
+            st.code(load_draft(st.session_state.full_draft_ref), language="markdown")
+            st.info("위 코드 블록을 클릭하면 전체 내용을 복사할 수 있습니다.")
+    else:
+        bot_say("아직 전체 초안이 작성되지 않았어요. 모든 단계를 완료하면 전체 초안을 볼 수 있습니다.")
+
+# 주제 단계
+@step_action("infer_topic")
+def infer_topic(user_input, intents):
+    """입력에서 블로그 주제를 한 문장으로 정리하도록 요청하는 함수"""
+    process_model_request(PROMPT_TOPIC_INFER.format(user_input=user_input), "topic_inferred", label="topic",
+                          semantic_text=user_input)
+
+@job_handler("topic_inferred")
+def on_topic_inferred(topic):
+    """정리된 주제를 보여주고 확인을 요청하는 함수"""
+    if topic in MODEL_FAILURE_MESSAGES:
+        bot_say(topic)
+        return
+    topic = next((line for line in topic.splitlines() if line.strip()), topic).strip().strip('*"')
+    st.session_state.collected["inferred_topic"] = topic
+    st.session_state.step = Step.TOPIC_CONFIRM.value
+    bot_say(PROMPT_TOPIC_CONFIRM.format(inferred_topic=topic))
+
+# 키워드 단계
+@step_action("recommend_keywords")
+def recommend_keywords(user_input, intents):
+    """주제를 확정하고 키워드 추천을 요청하는 함수
+
+    이전 초안 색인에 비슷한 주제가 있으면 그 키워드를 바로 보여주고,
+    LOCAL_RECOMMEND_REFINE=1이면 모델이 다듬은 추천을 이어서 받습니다.
+    """
+    collected = st.session_state.collected
+    collected["user_topic"] = collected["inferred_topic"]
+    local_keywords = get_draft_index().suggest_keywords(collected["user_topic"])
+    if not local_keywords:
+        process_model_request(PROMPT_KEYWORD_RECOMMEND.format(topic=collected["user_topic"]),
+                              "keywords_recommended", label="keywords", semantic_text=collected["user_topic"])
+        return
+    get_metrics().record_count("local_recommendations", "keywords", st.session_state.session_id)
+    collected["recommended_keywords"] = local_keywords
+    ask_keywords("", set())
+    if LOCAL_RECOMMEND_REFINE:
+        submit_refine_job(PROMPT_KEYWORD_REFINE.format(topic=collected["user_topic"],
+                                                       local_keywords=", ".join(local_keywords)),
+                          "keywords_refined", label="keywords")
+
+@job_handler("keywords_recommended")
+def on_keywords_recommended(text):
+    """추천 키워드를 보여주고 선택을 요청하는 함수"""
+    keywords = [] if text in MODEL_FAILURE_MESSAGES else parse_keywords(text)
+    st.session_state.collected["recommended_keywords"] = keywords
+    ask_keywords("", set())
+
+@job_handler("keywords_refined")
+def on_keywords_refined(text):
+    """모델이 다듬은 추천 키워드가 로컬 추천과 다르면 이어서 보여주는 함수 (실패하면 로컬 추천 유지)"""
+    collected = st.session_state.collected
+    keywords = [] if text in MODEL_FAILURE_MESSAGES else parse_keywords(text)
+    if not keywords or keywords == collected.get("recommended_keywords") \
+            or st.session_state.step != Step.KEYWORD_QUESTION.value:
+        return
+    collected["recommended_keywords"] = keywords
+    bot_say(PROMPT_KEYWORDS_REFINED.format(recommended_keywords="\n".join(f"- {keyword}" for keyword in keywords)))
+
+@step_action("ask_keywords")
+def ask_keywords(user_input, intents):
+    collected = st.session_state.collected
+    recommended = "\n".join(f"- {keyword}" for keyword in collected.get("recommended_keywords", []))
+    st.session_state.step = Step.KEYWORD_QUESTION.value
+    bot_say(PROMPT_KEYWORD_QUESTION.format(
+        topic=collected["user_topic"],
+        recommended_keywords=recommended or "(추천 키워드를 불러오지 못했어요. 원하시는 키워드를 직접 말씀해주세요.)"
+    ))
+
+@step_action("select_keywords")
+def select_keywords(user_input, intents):
+    """입력한 키워드 목록을 보여주고 확인을 요청하는 함수"""
+    keywords = parse_keywords(user_input)
+    if not keywords:
+        bot_say("다루고 싶은 키워드를 쉼표로 구분해 말씀해주세요.")
+        return
+    st.session_state.collected["selected_keywords"] = keywords
+    st.session_state.step = Step.KEYWORD_CONFIRM.value
+    bot_say(PROMPT_KEYWORD_CONFIRM.format(selected_keywords=", ".join(keywords)))
+
+@step_action("accept_keywords")
+def accept_keywords(user_input, intents):
+    st.session_state.collected["user_keywords"] = st.session_state.collected["selected_keywords"]
+    ask_style(user_input, intents)
+
+# 스타일 단계
+@step_action("ask_style")
+def ask_style(user_input, intents):
+    st.session_state.step = Step.STYLE_QUESTION.value
+    bot_say(PROMPT_STYLE_QUESTION)
+
+@step_action("select_style")
+def select_style(user_input, intents):
+    """입력에서 형식, 문체, 대상 독자를 찾아 보여주고 확인을 요청하는 함수"""
+    style = parse_style(user_input)
+    st.session_state.collected.update(style)
+    st.session_state.step = Step.STYLE_CONFIRM.value
+    bot_say(PROMPT_STYLE_CONFIRM.format(**style))
+
+# 글 흐름 단계
+@step_action("suggest_flow")
+def suggest_flow(user_input, intents):
+    """주제, 키워드, 스타일로 글 흐름 제안을 요청하는 함수
+
+    이전 초안 색인에 비슷한 글이 있으면 그 흐름을 바로 보여주고,
+    LOCAL_RECOMMEND_REFINE=1이면 모델이 다듬은 흐름을 이어서 받습니다.
+    """
+    collected = st.session_state.collected
+    keywords = collected.get("user_keywords", [])
+    local_flow = get_draft_index().suggest_flow(collected["user_topic"], keywords)
+    if not local_flow:
+        prompt = PROMPT_FLOW_GENERATE.format(
+            topic=collected["user_topic"],
+            keywords=", ".join(keywords),
+            style=get_style_text()
+        )
+        process_model_request(prompt, "flow_suggested", label="flow")
+        return
+    get_metrics().record_count("local_recommendations", "flow", st.session_state.session_id)
+    show_suggested_flow(local_flow)
+    if LOCAL_RECOMMEND_REFINE:
+        prompt = PROMPT_FLOW_REFINE.format(
+            topic=collected["user_topic"],
+            keywords=", ".join(keywords),
+            style=get_style_text(),
+            reference_flow=format_numbered(local_flow)
+        )
+        submit_refine_job(prompt, "flow_refined", label="flow")
+
+@job_handler("flow_suggested")
+def on_flow_suggested(text):
+    """모델이 제안한 글 흐름을 보여주는 함수"""
+    show_suggested_flow([] if text in MODEL_FAILURE_MESSAGES else parse_flow(text))
+
+def show_suggested_flow(flow):
+    """제안된 글 흐름을 저장하고 보여주는 함수 (비어 있으면 직접 입력을 안내)"""
+    st.session_state.collected["suggested_flow"] = flow
+    st.session_state.step = Step.FLOW_SUGGEST.value
+    if not flow:
+        bot_say("글 흐름을 만들지 못했어요. 원하시는 섹션 제목을 한 줄에 하나씩 말씀해주시거나, "
+                "'네'라고 하시면 다시 제안해볼게요.")
+        return
+    bot_say(PROMPT_FLOW_SUGGEST.format(suggested_flow=format_numbered(flow)))
+
+@job_handler("flow_refined")
+def on_flow_refined(text):
+    """모델이 다듬은 글 흐름이 로컬 추천과 다르면 이어서 보여주는 함수 (실패하면 로컬 추천 유지)"""
+    collected = st.session_state.collected
+    flow = [] if text in MODEL_FAILURE_MESSAGES else parse_flow(text)
+    if not flow or flow == collected.get("suggested_flow") or st.session_state.step != Step.FLOW_SUGGEST.value:
+        return
+    collected["suggested_flow"] = flow
+    bot_say(PROMPT_FLOW_REFINED.format(suggested_flow=format_numbered(flow)))
+
+@step_action("confirm_flow")
+def confirm_flow(user_input, intents):
+    """제안된 글 흐름을 확정하고 최종 확인을 요청하는 함수"""
+    flow = st.session_state.collected.get("suggested_flow")
+    if not flow:
+        suggest_flow(user_input, intents)
+        return
+    st.session_state.collected["finalized_flow"] = list(flow)
+    st.session_state.step = Step.FLOW_CONFIRM.value
+    start_title_job()
+    bot_say(PROMPT_FLOW_CONFIRM.format(finalized_flow=format_numbered(flow)))
+
+@step_action("edit_flow")
+def edit_flow(user_input, intents):
+    """글 흐름 수정 요청을 처리하는 함수
+
+    섹션 목록을 직접 입력하면(여러 줄 또는 화살표 구분) 그대로 사용하고,
+    그 밖의 요청은 현재 흐름과 함께 모델에 수정을 요청합니다.
+    """
+    collected = st.session_state.collected
+    if looks_like_flow(user_input):
+        flow = parse_flow(user_input)
+        if len(flow) >= 2:
+            collected["suggested_flow"] = flow
+            confirm_flow(user_input, intents)
             return
-            
-        # 진행 의사가 있는지 확인
-        if any(word in user_input_lower for word in ["네", "좋아", "괜찮", "진행", "시작", "다음"]):
-            section_title = st.session_state.current_section
-            section_content = st.session_state.draft_section_content
-            st.session_state.generated_drafts[section_title] = section_content
-            flow_items = st.session_state.collected.get("finalized_flow", [])
-            current_index = flow_items.index(section_title)
-            if current_index < len(flow_items) - 1:
-                next_section = flow_items[current_index + 1]
-                st.session_state.current_section = next_section
-                previous_sections = []
-                for i in range(current_index + 1):
-                    prev_title = flow_items[i]
-                    prev_content = st.session_state.generated_drafts.get(prev_title, "")
-                    if prev_content:
-                        previous_sections.append(f"## {prev_title}\n{prev_content}")
-                previous_sections_text = "\n\n".join(previous_sections)
-                prompt = PROMPT_SECTION_WRITE.format(
-                    section_title=next_section,
-                    previous_sections=previous_sections_text,
-                    topic=st.session_state.collected.get('user_topic', ''),
-                    keywords=", ".join(st.session_state.collected.get('user_keywords', [])),
-                    style=f"{st.session_state.collected.get('format_style', '')} / {st.session_state.collected.get('tone', '')} / {st.session_state.collected.get('audience', '')}"
-                )
-                st.session_state.step = Step.SECTION_WRITE.value
-                bot_say(f"이제 '{next_section}' 섹션을 작성해볼게요...")
-                section_content = process_model_request(prompt)
-                st.session_state.draft_section_content = section_content
-                st.session_state.step = Step.SECTION_CONFIRM.value
-                confirm_message = PROMPT_SECTION_CONFIRM.format(section_content=section_content)
-                bot_say(confirm_message)
-                return
-            else:
-                show_full_draft()
-                return
-        bot_say("""도입부에 대해 어떻게 생각하시나요?
+    current_flow = collected.get("finalized_flow") or collected.get("suggested_flow") or []
+    prompt = PROMPT_FLOW_REVISE.format(
+        topic=collected.get("user_topic", ""),
+        current_flow=format_numbered(current_flow),
+        user_request=user_input
+    )
+    bot_say("네, 요청하신 대로 글 흐름을 수정해볼게요...")
+    process_model_request(prompt, "flow_suggested", label="flow")
+
+@step_action("flow_help")
+def flow_help(user_input, intents):
+    # 섹션 목록을 바로 입력한 경우
+    if looks_like_flow(user_input):
+        edit_flow(user_input, intents)
+        return
+    bot_say("""이 흐름으로 진행할까요?
+- 도입부부터 한 섹션씩 작성하려면 '네', '진행할게요'라고 말씀해주세요.
+- 모든 섹션을 한 번에 작성하려면 '한 번에 작성해줘'라고 말씀해주세요.""")
+
+@step_action("start_intro")
+def start_intro(user_input, intents):
+    write_intro()
+
+@step_action("start_batch")
+def start_batch(user_input, intents):
+    draft_all_sections()
+
+# 도입부/섹션 확인 단계
+@step_action("undo")
+def undo(user_input, intents):
+    undo_revision()
+
+@step_action("revise_section")
+def revise_section(user_input, intents):
+    """작성 중인 섹션의 수정을 요청하는 함수"""
+    section_title = st.session_state.current_section
+    original_draft = load_draft(st.session_state.draft_ref)
+    discard_prefetch()
+    handle_section_revision(section_title, user_input, original_draft)
+
+@step_action("request_candidates")
+def request_candidates(user_input, intents):
+    """작성 중인 섹션의 후보 여러 개를 한 번의 요청으로 받는 함수 (완료되면 탭으로 나란히 표시)"""
+    section_title = st.session_state.current_section
+    flow_items = st.session_state.collected.get("finalized_flow", [])
+    prompt = PROMPT_REVISION.format(
+        section_title=section_title,
+        user_request=user_input,
+        original_draft=load_draft(st.session_state.draft_ref),
+        previous_sections=build_previous_sections(flow_items, flow_items.index(section_title))
+    )
+    discard_prefetch()
+    close_candidates()
+    bot_say(f"네, '{section_title}' 섹션을 {SECTION_CANDIDATES}가지 버전으로 한 번에 작성해볼게요...")
+    job = get_job_queue().submit(
+        run_candidates_job, get_gemini_client(), get_request_scheduler(), prompt, SECTION_CANDIDATES,
+        SECTION_CANDIDATE_MODE == "parallel", get_session_context(), get_metrics(),
+        metrics_tags("section_candidates"), get_output_budgets(), label="section_candidates",
+        timeout=MODEL_JOB_TIMEOUT,
+    )
+    attach_pending_job(job, "section_candidates", label="section_candidates", stream=False,
+                       context={"section_title": section_title})
+
+@job_handler("section_candidates")
+def on_section_candidates(candidates, section_title):
+    """받은 후보들을 탭으로 나란히 보여주고 고르게 하는 함수"""
+    if candidates in MODEL_FAILURE_MESSAGES:
+        bot_say(candidates)
+        return
+    refs = [save_draft(text) for text in candidates]
+    st.session_state.section_candidates = {"section": section_title, "refs": refs}
+    message = {"role": "assistant", "candidate_refs": refs, "section": section_title,
+               "content": f"'{section_title}' 섹션 후보 {len(refs)}개를 작성했어요. "
+                          "탭에서 비교해보시고 마음에 드는 후보를 선택해주세요. "
+                          "지금 초안으로 진행하시려면 '네'라고 말씀해주세요."}
+    st.session_state.messages.append(message)
+    display_message(len(st.session_state.messages) - 1, message)
+
+@step_action("accept_section")
+def accept_section(user_input, intents):
+    """작성 중인 섹션을 확정하고 다음 섹션 작성(마지막이면 전체 초안)으로 넘어가는 함수"""
+    close_candidates()
+    section_title = st.session_state.current_section
+    section_content = load_draft(st.session_state.draft_ref)
+    store_section(section_title, st.session_state.draft_ref, section_content)
+    st.session_state.revision_history.pop(section_title, None)
+    prefetched = take_prefetch(section_title, section_content)
+    flow_items = st.session_state.collected.get("finalized_flow", [])
+    current_index = flow_items.index(section_title)
+    if current_index < len(flow_items) - 1:
+        next_section = flow_items[current_index + 1]
+        st.session_state.current_section = next_section
+        prompt = build_section_write_prompt(flow_items, current_index + 1)
+        summarize_section(section_title, section_content, prefetched)
+        st.session_state.step = Step.SECTION_WRITE.value
+        bot_say(f"이제 '{next_section}' 섹션을 작성해볼게요...")
+        if not use_prefetched_draft(prefetched, prompt, "section_draft", label="section_write"):
+            process_model_request(prompt, "section_draft", label="section_write",
+                                  session_context=get_session_context())
+    else:
+        if prefetched:
+            get_job_queue().cancel(prefetched["summary_job_id"])
+        show_full_draft()
+
+@step_action("confirm_help")
+def confirm_help(user_input, intents):
+    subject = "도입부" if st.session_state.step == Step.INTRO_CONFIRM.value else "이 섹션"
+    bot_say(f"""{subject}에 대해 어떻게 생각하시나요?
 - 진행하시려면 '네', '좋아요', '진행할게요'라고 말씀해주세요.
-- 수정이 필요하시다면 '수정', '다시', '바꿔' 등의 말씀을 해주세요.""")
+- 수정이 필요하시다면 '수정', '다시', '바꿔' 등의 말씀을 해주세요.
+- 여러 버전을 나란히 비교하시려면 '여러 버전 보여줘'라고 말씀해주세요.
+- 마지막 수정을 취소하시려면 '되돌려줘'라고 말씀해주세요.""")
+
+@step_action("busy")
+def busy(user_input, intents):
+    """작성 중에는 기다려 달라고 안내하고, 작성이 실패해 멈춰 있으면 다시 작성하는 함수"""
+    step = st.session_state.step
+    if st.session_state.pending_jobs or step not in (Step.INTRO_WRITE.value, Step.SECTION_WRITE.value):
+        bot_say("지금 초안을 작성하고 있어요. 잠시만 기다려주세요.")
         return
+    if step == Step.INTRO_WRITE.value:
+        write_intro()
+        return
+    section_title = st.session_state.current_section
+    flow_items = st.session_state.collected.get("finalized_flow", [])
+    bot_say(f"'{section_title}' 섹션을 다시 작성해볼게요...")
+    process_model_request(build_section_write_prompt(flow_items, flow_items.index(section_title)),
+                          "section_draft", label="section_write", session_context=get_session_context())
+
+@step_action("done_help")
+def done_help(user_input, intents):
+    bot_say("""블로그 작성이 완료되었어요!
+- '전체 초안'이라고 입력하시면 전체 초안을 다시 볼 수 있습니다.
+- 새로운 블로그를 작성하시려면 사이드바의 '🆕 새 글 시작' 버튼을 눌러주세요.""")
+
+STEP_ENGINE.validate(STEP_ACTIONS)
 
-    # ... rest of the handle_input function ...
+# 사용자 입력 처리 핵심 함수
+def handle_input(user_input):
+    """현재 단계의 표(step_engine.STEP_TABLE)에 따라 입력을 처리하는 함수"""
+    STEP_ENGINE.dispatch(st.session_state.step, user_input, STEP_ACTIONS)
+
+# 세션 스냅샷에 담을 상태 (진행 중인 작업, 선작성 초안처럼 실행 중에만 의미 있는 값은 제외)
+DURABLE_SESSION_KEYS = ("messages", "step", "collected", "generated_drafts", "draft_ref", "full_draft_ref",
+                        "revision_history", "section_summaries", "draft_index", "current_section", "session_id",
+                        "prefetch_stats", "section_candidates", "blog_title", "code_checks")
 
 # 상태 초기화
-if "messages" not in st.session_state:
+def init_session_state(snapshot=None):
+    """세션 상태를 처음 값으로 만들고, 저장된 스냅샷이 있으면 그 값으로 복원하는 함수"""
+    snapshot = dict(snapshot or {})
     st.session_state.messages = []
     st.session_state.step = Step.TOPIC_QUESTION.value
     st.session_state.collected = {}
+    st.session_state.draft_store = DraftStore.from_snapshot(snapshot.pop("draft_texts", {}))
     st.session_state.generated_drafts = {}
+    st.session_state.draft_ref = None
+    st.session_state.full_draft_ref = None
+    st.session_state.revision_history = {}
+    st.session_state.section_summaries = {}
     st.session_state.draft_index = 0
-
-# 타이핑 인디케이터를 위한 상태
-if "is_typing" not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex[:12]
+    st.session_state.prefetch = None
+    st.session_state.prefetch_stats = {"hits": 0, "misses": 0, "discarded": 0, "wasted_tokens": 0}
+    st.session_state.pending_jobs = []
+    st.session_state.session_context = None
+    st.session_state.batch_progress = {}
+    st.session_state.section_candidates = None
+    st.session_state.blog_title = None
+    st.session_state.title_job = None
+    st.session_state.full_document = None
+    st.session_state.code_checks = {}
+    st.session_state.code_check_jobs = {}
+    st.session_state.summary_jobs = {}
+    st.session_state.refine_jobs = []
+    st.session_state.checkpoint_key = None
+    for key, value in snapshot.items():
+        if value is not None:
+            st.session_state[key] = value
     st.session_state.is_typing = False
     st.session_state.processed = True
 
+# 세션 스냅샷 만들기
+def session_snapshot():
+    snapshot = {key: st.session_state.get(key) for key in DURABLE_SESSION_KEYS}
+    snapshot["draft_texts"] = st.session_state.draft_store.snapshot()
+    return snapshot
+
+# 세션을 메모리에서 내보낼 때 쓸 해제 함수 만들기
+def session_release():
+    """지금 세션의 상태 객체들을 비우는 함수를 반환하는 함수
+
+    반환한 함수는 다른 세션의 실행 중에 호출되므로 st.session_state 대신
+    지금 들고 있는 객체들을 직접 비웁니다.
+    """
+    containers = [st.session_state[key] for key in
+                  ("messages", "collected", "generated_drafts", "revision_history", "section_summaries",
+                   "code_checks")]
+    draft_store = st.session_state.draft_store
+    document = st.session_state.full_document
+    context = st.session_state.session_context
+    client = get_gemini_client() if context else None
+
+    def release():
+        for container in containers:
+            container.clear()
+        draft_store.clear()
+        if document is not None:
+            document.clear()
+        if context:
+            client.release_context(context)
+
+    return release
+
+# 세션 체크포인트
+def checkpoint_session():
+    """단계가 바뀌었거나 새 메시지가 있으면 스냅샷을 저장하고, 오래 쓰지 않은 세션을 내보내는 함수
+
+    진행 중인 작업이 있으면 작업이 끝난 뒤의 실행에서 저장합니다.
+    """
+    store = get_session_store()
+    clean = not st.session_state.pending_jobs
+    key = [st.session_state.step, len(st.session_state.messages), st.session_state.draft_ref,
+           st.session_state.full_draft_ref, len(st.session_state.generated_drafts),
+           len(st.session_state.section_summaries), len(st.session_state.code_checks)]
+    snapshot = None
+    if clean and key != st.session_state.checkpoint_key:
+        snapshot = session_snapshot()
+        st.session_state.checkpoint_key = key
+    store.checkpoint(st.session_state.resume_token, session_release(), snapshot, clean)
+    for _ in range(store.evict_idle()):
+        get_metrics().record_count("session_evictions", st.session_state.step, st.session_state.session_id)
+
+# 새 글 시작
+def start_new_session():
+    """진행 중인 작업을 취소하고 저장된 세션을 지운 뒤 처음 상태로 다시 시작하는 함수"""
+    cancel_pending_jobs()
+    if st.session_state.title_job:
+        get_job_queue().cancel(st.session_state.title_job["job_id"])
+    for job_id in st.session_state.summary_jobs.values():
+        get_job_queue().cancel(job_id)
+    for entry in st.session_state.refine_jobs:
+        get_job_queue().cancel(entry["job_id"])
+    if st.session_state.session_context:
+        get_gemini_client().release_context(st.session_state.session_context)
+    get_session_store().delete(st.session_state.resume_token)
+    for key in list(st.session_state.keys()):
+        del st.session_state[key]
+    st.query_params.clear()
+    st.rerun()
+
+# 이어쓰기 토큰 (주소의 ?resume= 값, 없거나 형식이 맞지 않으면 새로 만듦)
+if "resume_token" not in st.session_state:
+    token = st.query_params.get("resume", "")
+    if not re.fullmatch(r"[0-9a-f]{32}", token):
+        token = uuid.uuid4().hex
+    st.session_state.resume_token = token
+    st.query_params["resume"] = token
+
+# 메모리에 없는 세션(새 세션, 내보낸 세션, 서버 재시작 후 이어쓰기)은 저장된 스냅샷에서 복원
+if not get_session_store().activate(st.session_state.resume_token) or "messages" not in st.session_state:
+    saved_session = get_session_store().load(st.session_state.resume_token)
+    init_session_state(saved_session)
+    if saved_session:
+        get_metrics().record_count("session_restores", st.session_state.step, st.session_state.session_id)
+        st.toast("저장된 작성 내용을 불러왔어요.")
+
+# 화면에 바로 표시할 최근 메시지 수 (0이면 모두 표시)
+CHAT_WINDOW_SIZE = int(os.getenv("CHAT_WINDOW_SIZE", "20"))
+
+# 메시지 하나 출력
+def display_message(index, msg):
+    """메시지 하나를 출력하는 함수
+
+    현재 검토 중이 아닌 초안 확인 메시지는 한 줄 요약으로 접어 두고,
+    펼쳤을 때만 본문을 보냅니다.
+    """
+    with st.chat_message(msg["role"]):
+        if "draft_ref" in msg and msg["draft_ref"] != st.session_state.draft_ref:
+            label = f"📄 '{msg.get('section') or '섹션'}' 초안 펼치기"
+            if not st.toggle(label, key=f"expand_draft_{index}"):
+                return
+        st.markdown(message_content(msg))
+        if CODE_CHECK and "draft_ref" in msg and msg["draft_ref"] == st.session_state.draft_ref:
+            show_code_check(index, msg["draft_ref"])
+        if "candidate_refs" in msg:
+            show_candidate_tabs(index, msg)
+
 # 메시지 출력 및 입력 처리
 def display_messages():
-    # 메시지 출력
-    for msg in st.session_state.messages:
-        with st.chat_message(msg["role"]):
-            st.markdown(msg["content"])
-
-    # 타이핑 인디케이터 표시
-    if st.session_state.is_typing:
-        with st.chat_message("assistant"):
-            st.markdown('<div class="typing-indicator"><span class="typing-text">챗봇이 작성하고 있어요</span><span class="dots"><span class="dot"></span><span class="dot"></span><span class="dot"></span></span></div>', unsafe_allow_html=True)
+    # 최근 메시지만 출력하고, 이전 메시지는 요청할 때만 불러옴
+    messages = st.session_state.messages
+    window = st.session_state.setdefault("chat_window", CHAT_WINDOW_SIZE)
+    start = max(0, len(messages) - window) if window else 0
+    if start:
+        if st.button(f"⬆️ 이전 메시지 {min(start, CHAT_WINDOW_SIZE)}개 더 보기 (숨겨진 메시지 {start}개)",
+                     key="show_older_messages"):
+            st.session_state.chat_window = window + CHAT_WINDOW_SIZE
+            start = max(0, start - CHAT_WINDOW_SIZE)
+    for index in range(start, len(messages)):
+        display_message(index, messages[index])
+
+    # 타이핑 인디케이터 표시 (작업 대기 중에는 poll_pending_jobs에서 표시)
+    if st.session_state.is_typing and not st.session_state.pending_jobs:
+        show_typing_indicator()
 
     # 첫 메시지 표시
     if len(st.session_state.messages) == 0:
@@ -433,123 +1521,114 @@ def display_messages():
 st.title("🧠 기술 블로그 초안 생성 챗봇")
 st.markdown("---")
 
-# CSS 애니메이션 추가 - 챗봇 작성중 애니메이션
-st.markdown("""
-<style>
-@keyframes bounce-dots {
-    0%, 20% { transform: translateY(0); }
-    50% { transform: translateY(-4px); }
-    80%, 100% { transform: translateY(0); }
-}
-
-.typing-indicator {
-    color: #888888;
-    font-size: 14px;
-    padding: 8px 12px;
-    border-radius: 18px;
-    background-color: #f1f1f1;
-    display: inline-flex;
-    align-items: center;
-    margin-bottom: 5px;
-}
-
-.typing-text {
-    font-style: italic;
-}
-
-.dots {
-    display: flex;
-    margin-left: 5px;
-}
-
-.dot {
-    width: 6px;
-    height: 6px;
-    border-radius: 50%;
-    background-color: #888888;
-    margin: 0 1px;
-    display: inline-block;
-    animation: bounce-dots 1.5s infinite;
-}
-
-.dot:nth-child(2) {
-    animation-delay: 0.2s;
-}
-
-.dot:nth-child(3) {
-    animation-delay: 0.4s;
-}
-
-/* 단계 표시 스타일 */
-.step-current {
-    margin-left: 0px; 
-    padding: 5px 10px; 
-    background-color: #E6F0FF; 
-    color: #0066CC; 
-    font-weight: bold; 
-    font-size: 16px;
-    border-radius: 5px;
-    margin-bottom: 5px;
-}
-
-.step-other {
-    padding: 5px 10px;
-    margin-bottom: 5px; 
-    color: #555555;
-}
-</style>
-""", unsafe_allow_html=True)
+# 지표 요약 행을 표로 표시할 형태로 변환
+def format_metrics_rows(rows):
+    def ms(seconds):
+        return None if seconds is None else round(seconds * 1000)
+
+    return [{
+        "단계": row["step"],
+        "호출": row["calls"],
+        "p50(ms)": ms(row["p50"]),
+        "p95(ms)": ms(row["p95"]),
+        "TTFT p50(ms)": ms(row["ttft_p50"]),
+        "입력 토큰": row["prompt_tokens"],
+        "출력 토큰": row["output_tokens"],
+        "캐시 적중": row["cache_hits"],
+        "오류": row["errors"],
+    } for row in rows]
+
+# 성능 지표 패널 표시
+def show_metrics_panel():
+    """이 세션과 프로세스 전체의 모델 호출, 재실행 지표를 사이드바에 표시하는 함수"""
+    metrics = get_metrics()
+    session_id = st.session_state.session_id
+    with st.expander("📊 성능 지표", expanded=False):
+        st.markdown("**이 세션의 모델 호출 (단계별)**")
+        st.dataframe(format_metrics_rows(metrics.step_summary(session_id)), hide_index=True)
+        st.markdown("**전체 세션의 모델 호출 (단계별)**")
+        st.dataframe(format_metrics_rows(metrics.step_summary()), hide_index=True)
+
+        reruns = [event["total"] for event in metrics.recent("rerun", session_id)]
+        if reruns:
+            st.caption(f"재실행 {len(reruns)}회: p50 {percentile(reruns, 0.5) * 1000:.0f}ms, "
+                       f"p95 {percentile(reruns, 0.95) * 1000:.0f}ms")
+        prefetch = st.session_state.prefetch_stats
+        st.caption(f"다음 섹션 미리 생성: 적중 {prefetch['hits']}회, 미스 {prefetch['misses']}회, "
+                   f"폐기 {prefetch['discarded']}회, 낭비된 토큰 {prefetch['wasted_tokens']}")
+        semantic = get_semantic_cache().stats()
+        if semantic:
+            st.caption("유사도 캐시 적중률: " + ", ".join(
+                f"{label} {row['hit_rate']:.0%} ({row['hits']}/{row['hits'] + row['misses']})"
+                for label, row in semantic.items()))
+        scheduler = get_request_scheduler().metrics()
+        st.caption(f"스케줄러: 호출 {scheduler['calls']}회, 재시도 {scheduler['retries']}회, "
+                   f"대기열 {scheduler['queue_depth']}, 평균 대기 {scheduler['avg_wait']:.2f}초")
+
+        st.download_button("Prometheus 형식으로 받기", metrics.prometheus_text(), file_name="metrics.prom",
+                           mime="text/plain", key="download_metrics_prom")
+        events = metrics.recent(session=session_id)
+        st.download_button("이 세션 이벤트 JSONL로 받기",
+                           "".join(json.dumps(event, ensure_ascii=False) + "\n" for event in events),
+                           file_name=f"metrics-{session_id}.jsonl", mime="application/json",
+                           key="download_metrics_jsonl")
+
+# 내보내기 형식 표시 이름 → 형식
+EXPORT_FORMATS = {"Markdown (.md)": "md", "HTML (.html)": "html", "MD + HTML 묶음 (.zip)": "zip"}
+
+# 전체 초안 내보내기 버튼 표시
+def show_export_buttons():
+    """고른 형식 하나만 초안 저장소에서 읽어 만들고 받기 버튼을 표시하는 함수 (결과는 세션에 보관하지 않음)"""
+    document = get_full_document()
+    fmt = EXPORT_FORMATS[st.selectbox("형식", list(EXPORT_FORMATS), key="export_format")]
+    st.download_button("📥 받기", document.export(fmt), file_name=f"{document.file_stem()}.{fmt}",
+                       mime=EXPORT_MIME_TYPES[fmt], key="download_draft", use_container_width=True)
+
+# 스타일 적용 (압축은 ui_assets import 시 한 번)
+st.markdown(STYLE_HTML, unsafe_allow_html=True)
 
 # 사이드바 진행 단계 표시
 with st.sidebar:
     st.markdown("### 🧭 진행 단계")
-    steps = [
-        ("topic", "1. 주제 입력"),
-        ("keyword", "2. 키워드 선택"),
-        ("style", "3. 스타일 설정"),
-        ("flow", "4. 글 흐름 제안"),
-        ("intro", "5. 도입부 작성"),
-        ("section", "6. 섹션 작성"),
-        ("full_draft", "7. 전체 초안 확인")
-    ]
-    
-    # 현재 단계에 해당하는 prefix 찾기
-    current_step = st.session_state.step
-    current_prefix = ""
-    
-    # 단계별 prefix 매핑
-    step_prefix_map = {
-        Step.TOPIC_QUESTION.value: "topic",
-        Step.TOPIC_CONFIRM.value: "topic",
-        Step.KEYWORD_QUESTION.value: "keyword",
-        Step.KEYWORD_CONFIRM.value: "keyword",
-        Step.STYLE_QUESTION.value: "style",
-        Step.STYLE_CONFIRM.value: "style",
-        Step.FLOW_SUGGEST.value: "flow",
-        Step.FLOW_CONFIRM.value: "flow",
-        Step.INTRO_WRITE.value: "intro",
-        Step.INTRO_CONFIRM.value: "intro",
-        Step.SECTION_WRITE.value: "section",
-        Step.SECTION_CONFIRM.value: "section",
-        Step.SECTION_EDIT.value: "section",
-        Step.FULL_DRAFT.value: "full_draft",
-        Step.DONE.value: "full_draft"
-    }
-    
-    current_prefix = step_prefix_map.get(current_step, "")
-    
-    # 각 단계 표시
-    for key, label in steps:
-        if key == current_prefix:
-            st.markdown(f'<div class="step-current">→ {label}</div>', unsafe_allow_html=True)
-        else:
-            st.markdown(f'<div class="step-other">{label}</div>', unsafe_allow_html=True)
+    # 각 단계 표시 (단계별 HTML은 ui_assets에서 미리 생성)
+    st.markdown(sidebar_steps_html(st.session_state.step), unsafe_allow_html=True)
+
+    # 전체 섹션 동시 작성 진행 상황 표시
+    if st.session_state.batch_progress:
+        st.markdown("### ✍️ 섹션 작성 진행")
+        for title, status in st.session_state.batch_progress.items():
+            st.markdown(f"{status} {title}")
+
+    # 완성된 초안 내보내기
+    if st.session_state.step == Step.DONE.value and st.session_state.full_draft_ref:
+        st.markdown("### 📥 내보내기")
+        show_export_buttons()
+
+    # 새 글 시작과 이어쓰기 안내
+    st.markdown("---")
+    if st.button("🆕 새 글 시작", key="start_new_session"):
+        start_new_session()
+    st.caption("작성 내용은 단계마다 저장됩니다. 지금 주소를 북마크하면 새로고침하거나 "
+               "나중에 다시 열어도 이어서 작성할 수 있어요.")
+
+    # 성능 지표 패널 (METRICS_DEBUG_PANEL=1일 때만 표시)
+    if METRICS_DEBUG_PANEL:
+        show_metrics_panel()
+
+# 끝난 섹션 요약과 코드 예제 검사 결과 반영
+collect_background_results()
 
 # 메시지 표시
 display_messages()
 
-# 사용자 입력 처리
-if prompt := st.chat_input("메시지를 입력하세요..."):
+# 끝난 추천 다듬기 반영 (새 메시지는 기존 메시지 뒤에 그려짐)
+poll_refine_jobs()
+
+# 대기 중인 모델 작업 확인
+poll_pending_jobs()
+
+# 사용자 입력 처리 (작업 대기 중에는 입력 비활성화)
+if prompt := st.chat_input("메시지를 입력하세요...", disabled=bool(st.session_state.pending_jobs)):
     try:
         # 사용자 메시지 즉시 추가 및 표시
         st.session_state.messages.append({"role": "user", "content": prompt})
@@ -562,43 +1641,30 @@ if prompt := st.chat_input("메시지를 입력하세요..."):
         # 메시지 처리
         handle_input(prompt)
         
-        # 타이핑 상태 해제
-        st.session_state.is_typing = False
+        # 타이핑 상태 해제 (제출된 작업이 있으면 완료될 때까지 유지)
+        st.session_state.is_typing = bool(st.session_state.pending_jobs)
         
     except Exception as e:
         st.error(f"입력 처리 중 오류 발생: {str(e)}")
         st.session_state.is_typing = False
 
-def handle_section_revision(section_title, user_input, original_draft):
-    """섹션 수정을 처리하는 함수"""
-    try:
-        # 이전 섹션들의 내용을 수집
-        previous_sections = []
-        flow_items = st.session_state.collected.get("finalized_flow", [])
-        current_index = flow_items.index(section_title)
-        for i in range(current_index):
-            prev_title = flow_items[i]
-            prev_content = st.session_state.generated_drafts.get(prev_title, "")
-            if prev_content:
-                previous_sections.append(f"## {prev_title}\n{prev_content}")
-        previous_sections_text = "\n\n".join(previous_sections)
-
-        # 수정 요청 처리
-        prompt = PROMPT_REVISION.format(
-            section_title=section_title,
-            user_request=user_input,
-            original_draft=original_draft,
-            previous_sections=previous_sections_text,
-            topic=st.session_state.collected.get('user_topic', ''),
-            keywords=", ".join(st.session_state.collected.get('user_keywords', [])),
-            style=f"{st.session_state.collected.get('format_style', '')} / {st.session_state.collected.get('tone', '')} / {st.session_state.collected.get('audience', '')}"
-        )
-        bot_say(f"네, '{section_title}' 섹션을 수정해볼게요...")
-        revised_content = process_model_request(prompt)
-        if revised_content:
-            st.session_state.draft_section_content = revised_content
-            return True
-        return False
-    except Exception as e:
-        st.error(f"섹션 수정 중 오류가 발생했습니다: {str(e)}")
-        return False
\ No newline at end of file
+# 세션 체크포인트 저장과 유휴 세션 내보내기
+checkpoint_session()
+
+# 이번 재실행 시간 기록 (진행 상황 갱신을 위한 대기 시간 제외)
+get_metrics().record_rerun(time.perf_counter() - RERUN_STARTED_AT, st.session_state.step,
+                           st.session_state.session_id)
+
+# 첫 화면을 그린 뒤 SDK를 백그라운드에서 미리 불러오기 (프로세스당 한 번)
+if SDK_WARMUP:
+    start_sdk_warmup()
+
+# 사용자가 기다리는 작업이 있으면 잠시 후 다시 실행해 진행 상황 갱신
+# 화면에 보일 백그라운드 결과(추천 다듬기, 코드 예제 검사)만 남았으면 느리게 갱신하고,
+# 섹션 요약은 화면에 보이지 않으므로 다음 입력 때 반영
+if st.session_state.pending_jobs:
+    time.sleep(JOB_POLL_INTERVAL)
+    st.rerun()
+elif st.session_state.refine_jobs or st.session_state.code_check_jobs:
+    time.sleep(BACKGROUND_POLL_INTERVAL)
+    st.rerun()
@@ -0,0 +1,306 @@
+"""헤드리스 일괄 초안 생성 CLI
+
+JSONL 또는 YAML 파일에 적힌 글 사양(주제, 키워드, 스타일, 글 흐름)마다 도입부와
+섹션을 순서대로 작성해 마크다운 초안으로 저장합니다. 여러 글은 작업자 풀에서
+동시에 작성되고, 모든 모델 호출은 하나의 RequestScheduler를 거치므로 작업자 수를
+늘려도 분당 요청/토큰 한도를 넘지 않습니다.
+
+섹션을 하나 작성할 때마다 체크포인트를 남기므로, 중단된 실행을 같은 명령으로 다시
+시작하면 끝난 글은 건너뛰고 작성 중이던 글은 남은 섹션부터 이어서 작성합니다.
+
+    python batch_cli.py specs.jsonl --out drafts --workers 4
+
+사양 예시 (JSONL 한 줄):
+    {"id": "fastapi-intro", "topic": "FastAPI로 REST API 만들기", "keywords": ["FastAPI", "Pydantic"],
+     "style": "튜토리얼, 친근한, 초보자", "flow": ["서론", "설치", "라우팅", "마무리"]}
+
+keywords, style, flow는 문자열로 적어도 되고, flow가 없으면 모델이 제안한 흐름을 사용합니다.
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dotenv import load_dotenv
+
+from gemini_client import GeminiClient
+from generation import (MODEL_NAME, OutputBudgets, assemble_markdown, compose_previous_sections,
+                        compose_system_instruction, estimate_tokens, format_style_text, generate_text)
+from metrics import MetricsRecorder
+from prompts import (PROMPT_BLOG_TITLE, PROMPT_FLOW_GENERATE, PROMPT_INTRO_WRITE, PROMPT_SECTION_SUMMARY,
+                     PROMPT_SECTION_WRITE)
+from response_cache import ResponseCache
+from scheduler import PRIORITY_BATCH, RequestScheduler
+from step_engine import parse_flow, parse_keywords, parse_style
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+
+# 사양 파일 읽기
+def load_specs(path):
+    """JSONL 또는 YAML(목록 또는 posts 키) 파일에서 글 사양 목록을 읽는 함수"""
+    if path.endswith((".yaml", ".yml")):
+        if yaml is None:
+            raise SystemExit("YAML 사양 파일을 읽으려면 PyYAML이 필요합니다: pip install pyyaml")
+        with open(path, encoding="utf-8") as f:
+            data = yaml.safe_load(f) or []
+        return data.get("posts", []) if isinstance(data, dict) else data
+
+    specs = []
+    with open(path, encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                specs.append(json.loads(line))
+            except json.JSONDecodeError as e:
+                raise SystemExit(f"{path}:{line_number}: JSON 형식이 올바르지 않습니다 ({e})")
+    return specs
+
+
+# 사양을 앱의 collected 형식으로 변환
+def normalize_spec(raw, index):
+    """문자열/목록 어느 쪽으로 적어도 되는 사양 항목을 collected 형식으로 맞추는 함수"""
+    if not raw.get("topic"):
+        raise ValueError(f"{index + 1}번째 사양에 topic이 없습니다.")
+    keywords = raw.get("keywords", [])
+    style = raw.get("style", {})
+    flow = raw.get("flow", [])
+    if isinstance(keywords, str):
+        keywords = parse_keywords(keywords)
+    if isinstance(style, str):
+        style = parse_style(style)
+    if isinstance(flow, str):
+        flow = parse_flow(flow)
+
+    spec_id = raw.get("id") or f"{index + 1:03d}-{hashlib.sha1(raw['topic'].encode('utf-8')).hexdigest()[:8]}"
+    return {
+        "id": re.sub(r"[^\w.-]+", "-", str(spec_id)).strip("-"),
+        "title": raw.get("title"),
+        "user_topic": raw["topic"],
+        "user_keywords": list(keywords),
+        "format_style": style.get("format_style", ""),
+        "tone": style.get("tone", ""),
+        "audience": style.get("audience", ""),
+        "finalized_flow": list(flow),
+    }
+
+
+# 파일을 원자적으로 쓰기 (중단되어도 반쯤 쓴 파일이 남지 않도록)
+def write_atomic(path, text):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+
+class BatchRunner:
+    """글 사양 하나를 처음부터(또는 체크포인트부터) 끝까지 작성하는 실행기
+
+    모든 글이 같은 클라이언트, 스케줄러, 응답 캐시를 공유합니다. 확정된 섹션의
+    요약은 별도 풀에서 만들어 다음 섹션 작성과 겹쳐 실행합니다.
+    """
+
+    def __init__(self, client, scheduler, cache, out_dir, summary_workers=4, context_ttl=3600, metrics=None):
+        self.client = client
+        self.metrics = metrics
+        self.budgets = OutputBudgets()
+        self.scheduler = scheduler
+        self.cache = cache
+        self.out_dir = out_dir
+        self.checkpoint_dir = os.path.join(out_dir, ".checkpoints")
+        self.context_ttl = context_ttl
+        self.summary_pool = ThreadPoolExecutor(max_workers=summary_workers, thread_name_prefix="summary")
+        self._print_lock = threading.Lock()
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+
+    def log(self, message):
+        with self._print_lock:
+            print(message, file=sys.stderr, flush=True)
+
+    def output_path(self, spec):
+        return os.path.join(self.out_dir, f"{spec['id']}.md")
+
+    def checkpoint_path(self, spec):
+        return os.path.join(self.checkpoint_dir, f"{spec['id']}.json")
+
+    def load_checkpoint(self, spec):
+        try:
+            with open(self.checkpoint_path(spec), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {"flow": None, "sections": {}, "summaries": {}}
+
+    def save_checkpoint(self, spec, checkpoint):
+        write_atomic(self.checkpoint_path(spec), json.dumps(checkpoint, ensure_ascii=False))
+
+    def generate(self, prompt, session_context=None, tags=None):
+        text, _ = generate_text(self.client, prompt, cache=self.cache, scheduler=self.scheduler,
+                                priority=PRIORITY_BATCH, session_context=session_context,
+                                metrics=self.metrics, tags=tags, budgets=self.budgets)
+        if not text:
+            raise RuntimeError("모델이 빈 응답을 반환했습니다.")
+        return text
+
+    def run(self, spec):
+        """글 하나를 작성해 마크다운 파일로 저장하고 (경로, 새로 작성한 섹션 수)를 반환하는 함수"""
+        checkpoint = self.load_checkpoint(spec)
+        if not spec["finalized_flow"]:
+            if not checkpoint["flow"]:
+                checkpoint["flow"] = parse_flow(self.generate(PROMPT_FLOW_GENERATE.format(
+                    topic=spec["user_topic"],
+                    keywords=", ".join(spec["user_keywords"]),
+                    style=format_style_text(spec)
+                ), tags={"step": "batch_flow", "label": "flow", "session": spec["id"]}))
+                if not checkpoint["flow"]:
+                    raise RuntimeError("글 흐름을 만들지 못했습니다.")
+                self.save_checkpoint(spec, checkpoint)
+            spec = dict(spec, finalized_flow=checkpoint["flow"])
+
+        flow_items = spec["finalized_flow"]
+        sections = checkpoint["sections"]
+        summaries = checkpoint["summaries"]
+        pending_summaries = {}
+        written = 0
+
+        system_instruction = compose_system_instruction(spec)
+        session_context = self.client.register_context(
+            system_instruction, estimated_tokens=estimate_tokens(system_instruction), ttl=self.context_ttl
+        )
+        try:
+            for i, section_title in enumerate(flow_items):
+                if section_title not in sections:
+                    # 이 섹션의 컨텍스트에 필요한 요약(직전 섹션 이전)을 기다림
+                    for title in flow_items[:max(0, i - 1)]:
+                        if title in pending_summaries:
+                            summaries[title] = pending_summaries.pop(title).result()
+                    if i == 0:
+                        prompt = PROMPT_INTRO_WRITE.format(section_title=section_title)
+                    else:
+                        prompt = PROMPT_SECTION_WRITE.format(
+                            section_title=section_title,
+                            previous_sections=compose_previous_sections(flow_items, i, sections, summaries)
+                        )
+                    sections[section_title] = self.generate(prompt, session_context, tags={
+                        "step": "batch_section", "section": i, "label": "section_write", "session": spec["id"]})
+                    written += 1
+                    self.save_checkpoint(spec, checkpoint)
+                    self.log(f"  {spec['id']}: [{i + 1}/{len(flow_items)}] {section_title}")
+
+                # 다다음 섹션부터 쓰이는 요약을 미리 생성
+                if i < len(flow_items) - 2 and section_title not in summaries:
+                    pending_summaries[section_title] = self.summary_pool.submit(
+                        self.generate,
+                        PROMPT_SECTION_SUMMARY.format(section_title=section_title,
+                                                      section_content=sections[section_title]),
+                        tags={"step": "batch_summary", "section": i, "label": "section_summary",
+                              "session": spec["id"]},
+                    )
+
+            title = spec["title"] or checkpoint.get("title")
+            if not title:
+                title = self.generate(PROMPT_BLOG_TITLE.format(topic=spec["user_topic"]),
+                                      tags={"step": "batch_title", "label": "title", "session": spec["id"]})
+                title = next((line for line in title.splitlines() if line.strip()), title).strip().strip('#*" ')
+                checkpoint["title"] = title
+                self.save_checkpoint(spec, checkpoint)
+        finally:
+            for future in pending_summaries.values():
+                future.cancel()
+            self.client.release_context(session_context)
+
+        path = self.output_path(spec)
+        write_atomic(path, assemble_markdown(title, flow_items, sections))
+        os.remove(self.checkpoint_path(spec))
+        return path, written
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("specs", help="글 사양 파일 (.jsonl, .yaml, .yml)")
+    parser.add_argument("--out", default="drafts", help="초안을 저장할 디렉터리")
+    parser.add_argument("--workers", type=int, default=4, help="동시에 작성할 글 수")
+    parser.add_argument("--model", default=MODEL_NAME)
+    parser.add_argument("--api-endpoint", default=os.getenv("GEMINI_API_ENDPOINT"),
+                        help="Gemini API 주소 (로컬 대역 서버 등, 기본값은 공식 API)")
+    parser.add_argument("--rpm", type=int, default=int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "60")),
+                        help="분당 요청 수 한도")
+    parser.add_argument("--tpm", type=int, default=int(os.getenv("GEMINI_TOKENS_PER_MINUTE", "1000000")),
+                        help="분당 토큰 수 한도")
+    parser.add_argument("--no-cache", action="store_true", help="응답 캐시를 사용하지 않음")
+    parser.add_argument("--force", action="store_true", help="이미 저장된 초안도 다시 작성")
+    parser.add_argument("--metrics-log", help="모델 호출 지표를 JSONL로 남길 파일")
+    parser.add_argument("--metrics-prom", help="종료 시 Prometheus 텍스트 형식 지표를 쓸 파일")
+    args = parser.parse_args()
+
+    load_dotenv()
+    api_key = os.getenv("GOOGLE_API_KEY")
+    if not api_key:
+        parser.error("GOOGLE_API_KEY 환경 변수(.env)가 필요합니다.")
+
+    specs = [normalize_spec(raw, i) for i, raw in enumerate(load_specs(args.specs))]
+    if len({spec["id"] for spec in specs}) != len(specs):
+        parser.error("사양의 id가 중복됩니다.")
+
+    os.makedirs(args.out, exist_ok=True)
+    cache = None
+    if not args.no_cache:
+        cache = ResponseCache(path=os.getenv("RESPONSE_CACHE_PATH", os.path.join(".cache", "responses.sqlite3")),
+                              ttl=int(os.getenv("RESPONSE_CACHE_TTL", str(7 * 24 * 3600))))
+    scheduler = RequestScheduler(requests_per_minute=args.rpm, tokens_per_minute=args.tpm,
+                                 max_retries=int(os.getenv("GEMINI_MAX_RETRIES", "4")))
+    metrics = None
+    if args.metrics_log or args.metrics_prom:
+        metrics = MetricsRecorder(
+            log_path=args.metrics_log,
+            prometheus_path=args.metrics_prom,
+            prometheus_interval=60,
+            gauges=lambda: {f"scheduler_{key}": value for key, value in scheduler.metrics().items()},
+        )
+    runner = BatchRunner(
+        GeminiClient(api_key=api_key, default_model=args.model, api_endpoint=args.api_endpoint),
+        scheduler,
+        cache,
+        args.out,
+        summary_workers=args.workers,
+        metrics=metrics,
+    )
+
+    todo = [spec for spec in specs if args.force or not os.path.exists(runner.output_path(spec))]
+    runner.log(f"{len(specs)}개 중 {len(specs) - len(todo)}개는 이미 작성되어 건너뜁니다. "
+               f"{len(todo)}개를 작업자 {args.workers}개로 작성합니다.")
+
+    started_at = time.perf_counter()
+    failed = 0
+    with ThreadPoolExecutor(max_workers=args.workers, thread_name_prefix="post") as pool:
+        futures = {pool.submit(runner.run, spec): spec for spec in todo}
+        for future in as_completed(futures):
+            spec = futures[future]
+            try:
+                path, written = future.result()
+            except Exception as e:
+                failed += 1
+                runner.log(f"[실패] {spec['id']}: {e} (다시 실행하면 체크포인트부터 이어서 작성합니다)")
+                continue
+            runner.log(f"[완료] {spec['id']} → {path} (새로 작성한 섹션 {written}개)")
+    runner.summary_pool.shutdown(wait=False, cancel_futures=True)
+    if metrics is not None:
+        metrics.maybe_export(force=True)
+
+    elapsed = time.perf_counter() - started_at
+    stats = scheduler.metrics()
+    runner.log(f"{len(todo) - failed}개 완료, {failed}개 실패, {elapsed:.1f}초 "
+               f"(모델 호출 {stats['calls']}회, 재시도 {stats['retries']}회, 평균 대기 {stats['avg_wait']:.2f}초)")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
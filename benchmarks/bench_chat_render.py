@@ -0,0 +1,86 @@
+"""채팅 화면 재실행 비용 벤치마크
+
+메시지 수별로 app.py 한 번 재실행에 걸리는 시간과 화면으로 보내는 요소(protobuf) 크기를
+CHAT_WINDOW_SIZE 설정별로 측정합니다. Streamlit AppTest로 실행하므로 네트워크나
+API 키가 필요하지 않습니다.
+
+    python benchmarks/bench_chat_render.py
+    python benchmarks/bench_chat_render.py --messages 20 100 400 --windows 0 20
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from streamlit.testing.v1 import AppTest
+
+SECTION_BODY = (
+    "FastAPI는 타입 힌트를 기반으로 요청을 검증하는 Python 웹 프레임워크입니다. " * 20
+    + "\n\n```python\nfrom fastapi import FastAPI\n\napp = FastAPI()\n\n@app.get(\"/\")\n"
+    "def read_root():\n    return {\"hello\": \"world\"}\n```\n\n"
+    + "라우팅, 의존성 주입, 비동기 처리를 차례로 살펴봅니다. " * 20
+)
+
+
+def build_session(at, count):
+    """user/assistant 메시지를 번갈아 count개 만들고, 네 번째마다 섹션 초안 확인 메시지를 넣는 함수"""
+    store = at.session_state.draft_store
+    messages = []
+    for i in range(count):
+        if i % 2 == 0:
+            messages.append({"role": "user", "content": f"{i}번째 요청입니다. 이 섹션을 조금 더 자세히 써주세요."})
+        elif i % 4 == 3:
+            ref = store.put(f"## 섹션 {i}\n\n{SECTION_BODY}")
+            messages.append({"role": "assistant", "template": "section", "draft_ref": ref, "section": f"섹션 {i}"})
+        else:
+            messages.append({"role": "assistant", "content": f"네, {i}번째 응답입니다."})
+    at.session_state.messages = messages
+    at.session_state.draft_ref = messages[-1].get("draft_ref")
+
+
+def payload_bytes(node):
+    """요소 트리의 protobuf 크기 합계"""
+    proto = getattr(node, "proto", None)
+    size = proto.ByteSize() if proto is not None and hasattr(proto, "ByteSize") else 0
+    for child in getattr(node, "children", {}).values():
+        size += payload_bytes(child)
+    return size
+
+
+def measure(count, window, iterations):
+    os.environ["CHAT_WINDOW_SIZE"] = str(window)
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+    at.secrets["GOOGLE_API_KEY"] = "benchmark-placeholder-key"
+    at.run()
+    build_session(at, count)
+    timings = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        at.run()
+        timings.append((time.perf_counter() - started_at) * 1000)
+    print(
+        f"messages={count:<5} window={window or 'all':<4} "
+        f"p50={statistics.median(timings):8.1f}ms "
+        f"payload={payload_bytes(at._tree) / 1024:8.1f}KB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, nargs="+", default=[20, 100, 400])
+    parser.add_argument("--windows", type=int, nargs="+", default=[0, 20], help="0은 모든 메시지 표시")
+    parser.add_argument("--iterations", type=int, default=5)
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    for count in args.messages:
+        for window in args.windows:
+            measure(count, window, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Gemini 클라이언트 연결 설정 비용 벤치마크
+
+호출마다 genai.configure + GenerativeModel을 새로 만드는 기존 방식과
+GeminiClient 하나를 공유하는 방식의 설정 비용과 열린 파일 디스크립터 수를 비교합니다.
+
+    python benchmarks/bench_client_setup.py            # 설정 비용만 측정 (네트워크 없음)
+    python benchmarks/bench_client_setup.py --live     # count_tokens 호출까지 측정 (GOOGLE_API_KEY 필요)
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import google.generativeai as genai
+from google.generativeai import client as genai_client
+
+from gemini_client import GeminiClient
+
+MODEL_NAME = "gemini-1.5-pro"
+PROMPT = "FastAPI로 REST API를 만드는 방법을 한 문장으로 설명해주세요."
+
+
+def open_fds():
+    """현재 프로세스의 열린 파일 디스크립터 수 (리눅스 외에서는 None)"""
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+def per_call(api_key, live):
+    # 기존 방식: 재실행마다 configure, 호출마다 새 모델 (configure가 캐시된 채널을 버림)
+    genai.configure(api_key=api_key)
+    model = genai.GenerativeModel(MODEL_NAME)
+    if live:
+        model.count_tokens(PROMPT)
+    else:
+        genai_client.get_default_generative_client()
+
+
+def shared(client, live):
+    model = client.model(MODEL_NAME)
+    if live:
+        model.count_tokens(PROMPT)
+    else:
+        genai_client.get_default_generative_client()
+
+
+def measure(label, func, iterations):
+    fds_before = open_fds()
+    timings = []
+    for _ in range(iterations):
+        started_at = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - started_at) * 1000)
+    fds_after = open_fds()
+    timings.sort()
+    print(
+        f"{label:<10} p50={statistics.median(timings):8.2f}ms "
+        f"p95={timings[int(len(timings) * 0.95) - 1]:8.2f}ms "
+        f"mean={statistics.mean(timings):8.2f}ms "
+        f"fds={fds_before}->{fds_after}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--live", action="store_true", help="실제 API에 count_tokens 요청을 보냄")
+    args = parser.parse_args()
+
+    api_key = os.getenv("GOOGLE_API_KEY", "benchmark-placeholder-key")
+    if args.live and "GOOGLE_API_KEY" not in os.environ:
+        parser.error("--live에는 GOOGLE_API_KEY 환경 변수가 필요합니다.")
+
+    measure("per-call", lambda: per_call(api_key, args.live), args.iterations)
+    client = GeminiClient(api_key=api_key, default_model=MODEL_NAME)
+    measure("shared", lambda: shared(client, args.live), args.iterations)
+
+
+if __name__ == "__main__":
+    main()
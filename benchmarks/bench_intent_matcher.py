@@ -0,0 +1,91 @@
+"""의도 판별/단계 분기 벤치마크
+
+기존 handle_input처럼 의도마다 키워드 목록을 any()로 훑는 방식과, 모든 키워드를
+하나의 정규식으로 묶은 IntentMatcher + StepEngine 표 분기를 비교합니다.
+Streamlit 없이 실행됩니다.
+
+    python benchmarks/bench_intent_matcher.py
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from step_engine import GLOBAL_RULES, INTENT_WORDS, STEP_TABLE, Step, StepEngine
+
+INPUTS = [
+    "네 좋아요, 이대로 진행해주세요",
+    "두 번째 코드 예제를 비동기 버전으로 바꿔주세요",
+    "전체 초안 보여줘",
+    "한 번에 작성해줘",
+    "되돌려줘",
+    "FastAPI와 Flask의 성능 차이, 의존성 주입, 테스트 방법도 다뤄주세요" * 3,
+]
+
+
+def any_scan(step, text):
+    """기존 방식: 분기 순서대로 의도마다 any()로 키워드를 확인 (단계 표와 같은 순서의 if 체인)"""
+    lower = text.lower()
+    for rules in (GLOBAL_RULES, STEP_TABLE.get(step, ())):
+        for intent, action in rules:
+            if intent is None or any(word in lower for word in INTENT_WORDS[intent]):
+                return action
+    return None
+
+
+def any_intents(text):
+    """입력에 키워드가 들어 있는 의도를 모두 any()로 찾는 함수 (IntentMatcher 결과와 비교용)"""
+    lower = text.lower()
+    return {intent for intent, words in INTENT_WORDS.items() if any(word in lower for word in words)}
+
+
+def equivalence_inputs():
+    """모든 키워드 하나씩, 서로 다른 의도의 키워드 두 개를 붙이거나 띄운 입력, 벤치마크 입력"""
+    words = [(intent, word) for intent, intent_words in INTENT_WORDS.items() for word in intent_words]
+    inputs = [word for _, word in words] + [word.upper() for _, word in words]
+    for intent, word in words:
+        for other_intent, other in words:
+            if intent != other_intent:
+                inputs.extend([word + other, f"{word}, {other}"])
+    return inputs + INPUTS
+
+
+def check_equivalence(engine):
+    """모든 단계에서 StepEngine이 any() 방식과 같은 의도와 동작을 내는지 확인하는 함수"""
+    inputs = equivalence_inputs()
+    for text in inputs:
+        assert engine.matcher.match(text) == any_intents(text), text
+        for step in Step:
+            assert engine.resolve(step.value, text)[0] == any_scan(step.value, text), (step.value, text)
+    return len(inputs)
+
+
+def measure(label, func, iterations):
+    steps = [Step.FLOW_CONFIRM.value, Step.SECTION_CONFIRM.value]
+    started_at = time.perf_counter()
+    for _ in range(iterations):
+        for step in steps:
+            for text in INPUTS:
+                func(step, text)
+    elapsed = time.perf_counter() - started_at
+    calls = iterations * len(steps) * len(INPUTS)
+    print(f"{label:<12} {elapsed / calls * 1e6:7.2f}us/입력  ({calls}회)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    engine = StepEngine()
+    checked = check_equivalence(engine)
+    print(f"결과 일치 확인: 입력 {checked}개 x 단계 {len(Step)}개")
+
+    measure("any() scan", any_scan, args.iterations)
+    measure("StepEngine", lambda step, text: engine.resolve(step, text), args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""첫 화면 표시(콜드 스타트)와 재실행 비용 벤치마크
+
+새 Python 프로세스에서 app.py를 처음 실행해 첫 화면이 그려질 때까지의 시간(모듈 import 포함)과,
+같은 세션에서 입력 없이 다시 실행할 때의 시간을 측정하고 예산과 비교합니다.
+AppTest는 실행할 때마다 app.py를 다시 컴파일하므로(실제 서버는 컴파일 결과를 재사용)
+재실행 시간은 앱이 지표 로그에 남기는 스크립트 본문 실행 시간(rerun 이벤트)으로 잽니다.
+예산을 넘으면 종료 코드 1을 반환하므로 CI에서 회귀 확인용으로 쓸 수 있습니다.
+Streamlit AppTest로 실행하므로 네트워크나 API 키가 필요하지 않습니다.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --cold-runs 5 --cold-budget-ms 2500 --rerun-budget-ms 20
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 새 프로세스에서 실행할 측정 코드 (첫 실행 시간, 재실행 시간 목록, SDK import 여부를 JSON으로 출력)
+CHILD_SCRIPT = """
+import json, os, sys, time
+started_at = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+imported_at = time.perf_counter()
+at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=60)
+at.secrets["GOOGLE_API_KEY"] = "benchmark-placeholder-key"
+at.run()
+first_run_at = time.perf_counter()
+sdk_loaded = "google.generativeai" in sys.modules
+apptest_reruns = []
+for _ in range(RERUNS):
+    t = time.perf_counter()
+    at.run()
+    apptest_reruns.append(time.perf_counter() - t)
+with open(os.environ["METRICS_LOG_PATH"], encoding="utf-8") as f:
+    events = [json.loads(line) for line in f]
+reruns = [event["total"] for event in events if event["type"] == "rerun"][1:]
+print(json.dumps({
+    "streamlit_import": imported_at - started_at,
+    "first_run": first_run_at - imported_at,
+    "cold_total": first_run_at - started_at,
+    "sdk_loaded": sdk_loaded,
+    "reruns": reruns,
+    "apptest_reruns": apptest_reruns,
+    "exception": [str(e.value) for e in at.exception],
+}))
+"""
+
+
+def run_child(reruns):
+    code = f"ROOT = {ROOT!r}\nRERUNS = {reruns}\n" + CHILD_SCRIPT
+    started_at = time.perf_counter()
+    with tempfile.TemporaryDirectory() as directory:
+        # SDK 미리 불러오기를 끄고 첫 화면에서 SDK를 import하지 않는지 확인
+        env = dict(os.environ, METRICS_DEBUG_PANEL="0", SDK_WARMUP="0",
+                   METRICS_LOG_PATH=os.path.join(directory, "metrics.jsonl"),
+                   RESPONSE_CACHE_PATH=os.path.join(directory, "responses.sqlite3"),
+                   SESSION_STORE_PATH=os.path.join(directory, "sessions.sqlite3"),
+                   DRAFT_INDEX_PATH=os.path.join(directory, "draft_index.sqlite3"))
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=ROOT, env=env)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr[-2000:])
+    data = json.loads(result.stdout.strip().splitlines()[-1])
+    data["process_total"] = time.perf_counter() - started_at
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cold-runs", type=int, default=3, help="새 프로세스로 측정할 횟수")
+    parser.add_argument("--reruns", type=int, default=20, help="프로세스마다 측정할 재실행 횟수")
+    parser.add_argument("--cold-budget-ms", type=float, default=float(os.getenv("COLD_START_BUDGET_MS", "2500")),
+                        help="첫 화면까지(모듈 import 포함) 허용 시간의 중앙값")
+    parser.add_argument("--rerun-budget-ms", type=float, default=float(os.getenv("RERUN_BUDGET_MS", "30")),
+                        help="빈 세션 재실행 허용 시간의 중앙값")
+    args = parser.parse_args()
+
+    runs = [run_child(args.reruns) for _ in range(args.cold_runs)]
+    for data in runs:
+        if data["exception"]:
+            print(f"앱 실행 중 예외: {data['exception']}")
+            return 1
+
+    cold = statistics.median(data["cold_total"] for data in runs) * 1000
+    first_run = statistics.median(data["first_run"] for data in runs) * 1000
+    streamlit_import = statistics.median(data["streamlit_import"] for data in runs) * 1000
+    reruns = [seconds * 1000 for data in runs for seconds in data["reruns"]]
+    rerun = statistics.median(reruns)
+    apptest_rerun = statistics.median(seconds * 1000 for data in runs for seconds in data["apptest_reruns"])
+
+    print(f"Streamlit import      {streamlit_import:8.1f}ms")
+    print(f"app.py 첫 실행        {first_run:8.1f}ms  (SDK import: {'예' if runs[0]['sdk_loaded'] else '아니오'})")
+    print(f"첫 화면까지 합계      {cold:8.1f}ms  (예산 {args.cold_budget_ms:.0f}ms)")
+    print(f"재실행 p50            {rerun:8.1f}ms  (예산 {args.rerun_budget_ms:.0f}ms), "
+          f"p95 {sorted(reruns)[int(0.95 * (len(reruns) - 1))]:.1f}ms")
+    print(f"AppTest 재실행 p50    {apptest_rerun:8.1f}ms  (컴파일 포함, 참고용)")
+
+    over = []
+    if cold > args.cold_budget_ms:
+        over.append("첫 화면")
+    if rerun > args.rerun_budget_ms:
+        over.append("재실행")
+    if over:
+        print(f"예산 초과: {', '.join(over)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
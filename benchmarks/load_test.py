@@ -0,0 +1,192 @@
+"""동시 세션 부하 테스트
+
+로컬 Gemini 대역 서버(mock_gemini_server.py)를 띄우고, 사용자 N명이 각자의 Streamlit 세션(AppTest)으로
+주제 입력부터 전체 초안 완성까지 진행하게 합니다. 입력 한 번을 보내고 제출된 작업이 모두 끝나 화면이
+갱신될 때까지를 한 턴으로 보고 p50/p95 턴 지연, 처리량, 세션당 메모리 증가량을 출력합니다.
+실제 API 키나 네트워크가 필요하지 않습니다.
+
+AppTest는 한 프로세스에서 동시에 실행할 수 없어 스크립트 실행만 잠금으로 하나씩 돌립니다.
+모델 호출은 실제 서버처럼 공유 작업 큐와 스케줄러에서 동시에 처리되므로, 턴 지연에는
+다른 세션의 스크립트 실행을 기다린 시간도 포함됩니다.
+
+    python benchmarks/load_test.py --users 8
+    python benchmarks/load_test.py --users 16 --latency lognormal:1200,0.6 --error-rate 0.05
+    python benchmarks/load_test.py --users 4 --endpoint http://127.0.0.1:8765   # 따로 띄운 대역 서버 사용
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from mock_gemini_server import add_server_arguments, server_from_args
+
+# 단계별 사용자 입력 (없는 단계는 "네", {user}는 사용자 번호)
+STEP_INPUTS = {
+    "topic_question": "FastAPI로 REST API를 만드는 과정 {user}편을 블로그 글로 쓰고 싶어요",
+    "keyword_question": "FastAPI, Pydantic, Uvicorn",
+    "style_question": "튜토리얼, 친근한 톤, 초보자",
+}
+
+
+def rss_bytes():
+    """현재 프로세스의 상주 메모리(RSS) 크기, 확인할 수 없으면 None"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return None
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+# AppTest 스크립트 실행은 Streamlit 런타임을 전역으로 설정하므로 한 번에 하나만 실행
+SCRIPT_LOCK = threading.Lock()
+
+
+def run_script(at, user_input=None):
+    with SCRIPT_LOCK:
+        if user_input is None:
+            at.run()
+        else:
+            at.chat_input[0].set_value(user_input).run()
+
+
+def run_user(user, args, results, sessions):
+    """한 사용자가 전체 초안 완성(done 단계)까지 진행하며 턴 지연을 기록하는 함수"""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=args.turn_timeout)
+    at.secrets["GOOGLE_API_KEY"] = "load-test-placeholder-key"
+    run_script(at)
+    sessions.append(at)
+    turns = []
+    error = None
+    try:
+        for _ in range(args.max_turns):
+            step = at.session_state.step
+            if step == "done":
+                break
+            started_at = time.perf_counter()
+            run_script(at, STEP_INPUTS.get(step, "네").format(user=user))
+            deadline = started_at + args.turn_timeout
+            while at.session_state.pending_jobs:
+                if time.perf_counter() > deadline:
+                    raise TimeoutError(f"{step} 단계 작업이 {args.turn_timeout}초 안에 끝나지 않았습니다")
+                run_script(at)
+            if at.exception:
+                raise RuntimeError(at.exception[0].value)
+            turns.append((step, time.perf_counter() - started_at))
+        else:
+            error = f"{args.max_turns}턴 안에 완료되지 않았습니다 (단계: {at.session_state.step})"
+    except Exception as e:
+        error = str(e)
+    results[user] = {"turns": turns, "error": error, "done": at.session_state.step == "done"}
+
+
+def server_stats(endpoint):
+    try:
+        with urllib.request.urlopen(f"{endpoint}/stats", timeout=5) as response:
+            return json.load(response)
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=8, help="동시 사용자 수")
+    parser.add_argument("--ramp", type=float, default=0.0, help="사용자 시작 간격(초)")
+    parser.add_argument("--endpoint", help="이미 실행 중인 대역 서버 주소 (없으면 이 프로세스에서 실행)")
+    parser.add_argument("--max-turns", type=int, default=40)
+    parser.add_argument("--turn-timeout", type=float, default=120)
+    parser.add_argument("--poll-interval", default="0.05", help="JOB_POLL_INTERVAL (작업 완료 확인 간격)")
+    parser.add_argument("--background-poll-interval", default="0.05",
+                        help="BACKGROUND_POLL_INTERVAL (추천 다듬기, 코드 예제 검사 완료 확인 간격)")
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = None
+    endpoint = args.endpoint
+    if not endpoint:
+        server = server_from_args(args).start()
+        endpoint = server.endpoint
+
+    # app.py가 읽는 설정 (응답 캐시는 실행마다 새로 만들어 대역 서버까지 요청이 가도록 함)
+    cache_dir = tempfile.mkdtemp(prefix="load-test-")
+    os.environ["GEMINI_API_ENDPOINT"] = endpoint
+    os.environ["JOB_POLL_INTERVAL"] = args.poll_interval
+    os.environ["BACKGROUND_POLL_INTERVAL"] = args.background_poll_interval
+    os.environ["RESPONSE_CACHE_PATH"] = os.path.join(cache_dir, "responses.sqlite3")
+    os.environ["SESSION_STORE_PATH"] = os.path.join(cache_dir, "sessions.sqlite3")
+    os.environ["DRAFT_INDEX_PATH"] = os.path.join(cache_dir, "draft_index.sqlite3")
+    os.chdir(ROOT)
+
+    # AppTest는 st.rerun을 지원하지 않으므로, 앱의 자동 재실행 대신 run_user가 직접 다시 실행
+    import streamlit as st
+    from streamlit.testing.v1 import AppTest
+    st.rerun = lambda: None
+
+    # 모듈 import와 공유 자원 생성 비용이 세션당 메모리에 섞이지 않도록 한 번 미리 실행
+    warmup = AppTest.from_file(os.path.join(ROOT, "app.py"), default_timeout=args.turn_timeout)
+    warmup.secrets["GOOGLE_API_KEY"] = "load-test-placeholder-key"
+    run_script(warmup)
+    del warmup
+
+    rss_before = rss_bytes()
+    results = {}
+    sessions = []
+    threads = [threading.Thread(target=run_user, args=(user, args, results, sessions)) for user in range(args.users)]
+    started_at = time.perf_counter()
+    for thread in threads:
+        thread.start()
+        time.sleep(args.ramp)
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started_at
+    rss_after = rss_bytes()
+
+    latencies = [seconds * 1000 for result in results.values() for _, seconds in result["turns"]]
+    completed = sum(result["done"] for result in results.values())
+    print(f"대역 서버: {endpoint}  사용자: {args.users}  소요: {elapsed:.1f}s")
+    print(f"완료 세션: {completed}/{args.users}  턴: {len(latencies)}  "
+          f"처리량: {len(latencies) / elapsed:.2f} 턴/s, {completed / elapsed * 60:.1f} 초안/분")
+    if latencies:
+        print(f"턴 지연: p50={percentile(latencies, 0.5):.0f}ms p95={percentile(latencies, 0.95):.0f}ms "
+              f"max={max(latencies):.0f}ms mean={statistics.mean(latencies):.0f}ms")
+
+    by_step = {}
+    for result in results.values():
+        for step, seconds in result["turns"]:
+            by_step.setdefault(step, []).append(seconds * 1000)
+    for step, values in by_step.items():
+        print(f"  {step:<18} n={len(values):<4} p50={percentile(values, 0.5):7.0f}ms "
+              f"p95={percentile(values, 0.95):7.0f}ms")
+
+    if rss_before and rss_after:
+        print(f"메모리: RSS {rss_before / 2**20:.0f}MB → {rss_after / 2**20:.0f}MB, "
+              f"세션당 {(rss_after - rss_before) / max(1, len(sessions)) / 2**20:.1f}MB")
+    stats = server_stats(endpoint)
+    if stats:
+        print("대역 서버 통계: " + ", ".join(f"{key}={value}" for key, value in stats.items()))
+    for user, result in sorted(results.items()):
+        if result["error"]:
+            print(f"  사용자 {user} 실패: {result['error']}")
+
+    if server:
+        server.stop()
+    return 0 if completed == args.users else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
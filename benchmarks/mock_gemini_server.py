@@ -0,0 +1,308 @@
+"""로컬 Gemini 대역 서버
+
+google.generativeai의 REST 전송(transport="rest")이 호출하는
+/v1beta/models/{model}:generateContent, :streamGenerateContent 엔드포인트를 흉내 냅니다.
+앱이나 batch_cli.py를 이 서버로 돌리면 실제 할당량을 쓰지 않고 지연 시간과 처리량을 잴 수 있습니다.
+
+    python benchmarks/mock_gemini_server.py --port 8765 --latency lognormal:800,0.5 --tokens-per-sec 80
+    GEMINI_API_ENDPOINT=http://127.0.0.1:8765 streamlit run app.py
+
+- 첫 토큰 지연: fixed:MS, uniform:MIN-MAX, lognormal:MEDIAN,SIGMA (밀리초)
+- 스트리밍: --tokens-per-sec 속도로 --chunk-tokens 단위 청크 전송
+- 429 주입: --error-rate 확률, --server-rpm 분당 요청 한도 초과 시
+- 응답: 프롬프트 종류별 고정 응답 (같은 프롬프트에는 항상 같은 응답), --canned로 덮어쓰기
+- 출력 길이: generationConfig.maxOutputTokens를 넘으면 잘라서 MAX_TOKENS로 끝내고,
+  이어 쓰기 요청(PROMPT_CONTINUE)에는 원래 응답의 나머지를 돌려줍니다
+  (--section-repeat로 섹션 본문을 늘려 이어 쓰기를 확인할 수 있음)
+- 후보 여러 개: 스트리밍이 아닌 호출의 generationConfig.candidateCount만큼 후보를 돌려줌
+- GET /stats: 요청 수, 429 수, 동시 처리 수 등 집계
+"""
+import argparse
+import hashlib
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MODEL_PATH_PATTERN = re.compile(r"^/v1beta/models/(?P<model>[^:/]+):(?P<method>generateContent|streamGenerateContent)")
+
+CONTINUE_MARKER = "[지금까지 작성한 답변]"
+
+SECTION_TEMPLATE = """{title}의 핵심은 입력을 검증하고 결과를 일관된 형식으로 돌려주는 것입니다.
+이 섹션에서는 개념을 짧게 정리한 뒤 바로 실행해 볼 수 있는 예제로 넘어갑니다.
+
+```python
+def handle_{slug}(payload):
+    if not payload:
+        raise ValueError("빈 요청입니다")
+    return {{"ok": True, "size": len(payload)}}
+```
+
+위 코드는 요청이 비어 있으면 오류를 내고, 그렇지 않으면 크기를 담은 응답을 돌려줍니다.
+다른 방식과 비교하면 검증 로직이 한곳에 모여 있어 테스트하기 쉽다는 장점이 있습니다.
+"""
+
+
+def parse_latency(spec):
+    """지연 분포 문자열을 (밀리초를 뽑는 함수)로 바꾸는 함수"""
+    kind, _, args = spec.partition(":")
+    if kind == "fixed":
+        value = float(args or 0)
+        return lambda rng: value
+    if kind == "uniform":
+        low, high = (float(x) for x in args.split("-"))
+        return lambda rng: rng.uniform(low, high)
+    if kind == "lognormal":
+        median, sigma = (float(x) for x in args.split(","))
+        return lambda rng: rng.lognormvariate(math.log(median), sigma)
+    raise ValueError(f"알 수 없는 지연 분포입니다: {spec}")
+
+
+def canned_response(prompt, sections=4, overrides=(), section_repeat=1):
+    """프롬프트 종류에 맞는 고정 응답을 만드는 함수 (같은 프롬프트에는 항상 같은 응답)"""
+    if CONTINUE_MARKER in prompt:
+        # 이어 쓰기 요청: 원래 요청의 응답에서 이미 받은 부분을 뺀 나머지
+        request = prompt.split("[요청]\n", 1)[-1].split(f"\n\n{CONTINUE_MARKER}\n", 1)[0]
+        partial = prompt.split(f"{CONTINUE_MARKER}\n", 1)[-1].split(f"\n\n{CONTINUE_MARKER}이 끝난", 1)[0]
+        full = canned_response(request, sections, overrides, section_repeat)
+        return full[len(partial):] if full.startswith(partial) else full
+    for match, text in overrides:
+        if match in prompt:
+            return text
+    digest = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+    if "주제만 답해주세요" in prompt:
+        said = prompt.split("말했습니다:", 1)[-1].strip().splitlines()[0]
+        return said[:30]
+    if "핵심 키워드" in prompt:
+        return "\n".join(f"- 키워드{i + 1}" for i in range(6))
+    if '"1. 섹션 제목"' in prompt:
+        middle = [f"핵심 개념 {i}" for i in range(1, sections - 1)]
+        return "\n".join(f"{i + 1}. {title}" for i, title in enumerate(["도입부"] + middle + ["마무리"]))
+    if "요약해주세요" in prompt:
+        return f"이 섹션은 핵심 개념과 예제 코드를 다룹니다. (요약 {digest[:8]})"
+    if "블로그 제목을" in prompt:
+        return f"실전 가이드 {digest[:6]}"
+    if "<<<BLOCK" in prompt:
+        blocks = re.findall(r"<<<BLOCK (\d+)>>>", prompt)
+        return "\n".join(f"<<<BLOCK {n}>>>\n수정된 블록 {n} ({digest[:6]})\n<<<END BLOCK {n}>>>" for n in blocks)
+    title = re.search(r'"([^"]+)"', prompt)
+    title = title.group(1) if title else "이 섹션"
+    return "\n".join(SECTION_TEMPLATE.format(title=title, slug=f"s{digest[:6]}_{i}") for i in range(section_repeat))
+
+
+def prompt_text(body):
+    """요청 본문에서 사용자 프롬프트 텍스트를 꺼내는 함수"""
+    return "\n".join(
+        part.get("text", "")
+        for content in body.get("contents", [])
+        for part in content.get("parts", [])
+    )
+
+
+class MockGeminiServer:
+    """스레드에서 도는 Gemini 대역 서버"""
+
+    def __init__(self, host="127.0.0.1", port=0, latency="fixed:0", tokens_per_sec=0, chunk_tokens=8,
+                 error_rate=0.0, rpm=0, sections=4, canned=(), seed=0, section_repeat=1):
+        self.latency = parse_latency(latency)
+        self.tokens_per_sec = tokens_per_sec
+        self.chunk_tokens = chunk_tokens
+        self.error_rate = error_rate
+        self.rpm = rpm
+        self.sections = sections
+        self.section_repeat = section_repeat
+        self.canned = list(canned)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._recent = deque()
+        self.stats = {"requests": 0, "streamed": 0, "rate_limited": 0, "truncated": 0, "output_tokens": 0,
+                      "in_flight": 0, "max_in_flight": 0}
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self.httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def endpoint(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def admit(self):
+        """이번 요청을 429로 거절할지 정하고, (거절 여부, 첫 토큰 지연 초)를 반환하는 함수"""
+        now = time.monotonic()
+        with self._lock:
+            self.stats["requests"] += 1
+            while self._recent and now - self._recent[0] > 60:
+                self._recent.popleft()
+            limited = (self.rpm and len(self._recent) >= self.rpm) or self._rng.random() < self.error_rate
+            if limited:
+                self.stats["rate_limited"] += 1
+                return True, 0.0
+            self._recent.append(now)
+            return False, self.latency(self._rng) / 1000
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, status, payload):
+                data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def write_chunk(self, text):
+                data = text.encode("utf-8")
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def do_GET(self):
+                if self.path.startswith("/stats"):
+                    with server._lock:
+                        self.send_json(200, dict(server.stats))
+                    return
+                self.send_json(404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}})
+
+            def do_POST(self):
+                match = MODEL_PATH_PATTERN.match(self.path)
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                if not match:
+                    self.send_json(404, {"error": {"code": 404, "message": "not found", "status": "NOT_FOUND"}})
+                    return
+
+                limited, delay = server.admit()
+                if limited:
+                    self.send_json(429, {"error": {"code": 429, "message": "Resource has been exhausted",
+                                                   "status": "RESOURCE_EXHAUSTED"}})
+                    return
+
+                with server._lock:
+                    server.stats["in_flight"] += 1
+                    server.stats["max_in_flight"] = max(server.stats["max_in_flight"], server.stats["in_flight"])
+                try:
+                    self.respond(match.group("method") == "streamGenerateContent", body, delay)
+                finally:
+                    with server._lock:
+                        server.stats["in_flight"] -= 1
+
+            def respond(self, stream, body, delay):
+                prompt = prompt_text(body)
+                text = canned_response(prompt, server.sections, server.canned, server.section_repeat)
+                finish_reason = "STOP"
+                max_tokens = body.get("generationConfig", {}).get("maxOutputTokens")
+                if max_tokens and len(text) // 2 + 1 > max_tokens:
+                    text = text[:max_tokens * 2]
+                    finish_reason = "MAX_TOKENS"
+                prompt_tokens = len(prompt) // 2 + 1
+                output_tokens = len(text) // 2 + 1
+                with server._lock:
+                    server.stats["output_tokens"] += output_tokens
+                    server.stats["truncated"] += int(finish_reason == "MAX_TOKENS")
+                time.sleep(delay)
+
+                def payload(part, finish=None, usage=False):
+                    candidate = {"content": {"parts": [{"text": part}], "role": "model"}, "index": 0}
+                    if finish:
+                        candidate["finishReason"] = finish
+                    result = {"candidates": [candidate]}
+                    if usage:
+                        result["usageMetadata"] = {"promptTokenCount": prompt_tokens,
+                                                   "candidatesTokenCount": output_tokens,
+                                                   "totalTokenCount": prompt_tokens + output_tokens}
+                    return result
+
+                if not stream:
+                    if server.tokens_per_sec:
+                        time.sleep(output_tokens / server.tokens_per_sec)
+                    result = payload(text, finish_reason, usage=True)
+                    for index in range(1, body.get("generationConfig", {}).get("candidateCount", 1)):
+                        candidate = payload(f"{text}\n\n(후보 {index + 1})", finish_reason)["candidates"][0]
+                        candidate["index"] = index
+                        result["candidates"].append(candidate)
+                    self.send_json(200, result)
+                    return
+
+                with server._lock:
+                    server.stats["streamed"] += 1
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Transfer-Encoding", "chunked")
+                self.end_headers()
+                size = server.chunk_tokens * 2
+                pieces = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+                self.write_chunk("[")
+                for i, piece in enumerate(pieces):
+                    if i and server.tokens_per_sec:
+                        time.sleep(server.chunk_tokens / server.tokens_per_sec)
+                    last = i == len(pieces) - 1
+                    prefix = "," if i else ""
+                    self.write_chunk(prefix + json.dumps(payload(piece, finish_reason if last else None, usage=last),
+                                                         ensure_ascii=False))
+                self.write_chunk("]")
+                self.wfile.write(b"0\r\n\r\n")
+                self.wfile.flush()
+
+        return Handler
+
+
+def add_server_arguments(parser):
+    """대역 서버 설정 인자를 추가하는 함수 (부하 테스트 스크립트와 공유)"""
+    parser.add_argument("--latency", default="lognormal:800,0.5",
+                        help="첫 토큰 지연 분포 (fixed:MS, uniform:MIN-MAX, lognormal:MEDIAN,SIGMA)")
+    parser.add_argument("--tokens-per-sec", type=float, default=80, help="스트리밍 출력 속도 (0이면 지연 없음)")
+    parser.add_argument("--chunk-tokens", type=int, default=8)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="429를 돌려줄 확률")
+    parser.add_argument("--server-rpm", type=int, default=0, help="분당 요청 한도 (넘으면 429, 0이면 없음)")
+    parser.add_argument("--sections", type=int, default=4, help="제안할 글 흐름의 섹션 수")
+    parser.add_argument("--section-repeat", type=int, default=1, help="섹션 본문 반복 횟수 (긴 출력 흉내)")
+    parser.add_argument("--canned", help='덮어쓸 응답 JSON 파일 ([{"match": "...", "text": "..."}])')
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def server_from_args(args, host="127.0.0.1", port=0):
+    canned = []
+    if args.canned:
+        with open(args.canned, encoding="utf-8") as f:
+            canned = [(item["match"], item["text"]) for item in json.load(f)]
+    return MockGeminiServer(host=host, port=port, latency=args.latency, tokens_per_sec=args.tokens_per_sec,
+                            chunk_tokens=args.chunk_tokens, error_rate=args.error_rate, rpm=args.server_rpm,
+                            sections=args.sections, canned=canned, seed=args.seed,
+                            section_repeat=args.section_repeat)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_server_arguments(parser)
+    args = parser.parse_args()
+
+    server = server_from_args(args, args.host, args.port)
+    print(f"Gemini 대역 서버: {server.endpoint}  (GEMINI_API_ENDPOINT={server.endpoint})")
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
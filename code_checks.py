@@ -0,0 +1,222 @@
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from draft_blocks import CODE, split_blocks
+
+# 코드 펜스 언어 표기별 검사 방식 (그 밖의 언어는 건너뜀)
+LANGUAGE_CHECKS = {
+    "python": "python", "py": "python", "python3": "python",
+    "json": "json",
+    "yaml": "yaml", "yml": "yaml",
+    "bash": "shell", "sh": "shell", "shell": "shell",
+}
+
+# 검사 결과 상태
+OK = "ok"
+ERROR = "error"
+TIMEOUT = "timeout"
+SKIPPED = "skipped"
+
+# 별도 프로세스에서 실행할 문법 검사 코드 (코드를 실행하지 않고 구문만 분석)
+# 인자로 받은 메모리(MB)/CPU(초) 제한은 무엇보다 먼저 자기 프로세스에 겁니다.
+CHECK_SCRIPT = r"""
+import ast, json, sys
+try:
+    import resource
+except ImportError:
+    resource = None
+if resource is not None:
+    resource.setrlimit(resource.RLIMIT_AS, (int(sys.argv[1]) * 1024 * 1024,) * 2)
+    resource.setrlimit(resource.RLIMIT_CPU, (int(sys.argv[2]),) * 2)
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+def check(language, code):
+    if language == "python":
+        if code.lstrip().startswith(">>>"):
+            return "skipped", None, "대화형 셸 예제라 확인하지 않았어요"
+        # 노트북 명령(!pip, %timeit)은 줄 번호가 유지되도록 빈 줄로 바꿈
+        lines = ["" if line.lstrip().startswith(("!", "%")) else line for line in code.split("\n")]
+        try:
+            compile("\n".join(lines), "<code>", "exec", ast.PyCF_ONLY_AST, dont_inherit=True)
+        except SyntaxError as e:
+            return "error", e.lineno, e.msg
+    elif language == "json":
+        try:
+            json.loads(code)
+        except ValueError as e:
+            return "error", getattr(e, "lineno", None), getattr(e, "msg", str(e))
+    elif language == "yaml":
+        if yaml is None:
+            return "skipped", None, "PyYAML이 없어 확인하지 않았어요"
+        try:
+            list(yaml.safe_load_all(code))
+        except yaml.YAMLError as e:
+            mark = getattr(e, "problem_mark", None)
+            return "error", mark.line + 1 if mark else None, getattr(e, "problem", None) or str(e)
+    return "ok", None, ""
+
+results = []
+for item in json.load(sys.stdin):
+    try:
+        results.append(check(item["language"], item["code"]))
+    except Exception as e:
+        results.append(("error", None, f"구문을 분석하지 못했어요: {type(e).__name__}"))
+json.dump(results, sys.stdout)
+"""
+
+
+# 초안에서 코드 블록 꺼내기
+def extract_code_blocks(text):
+    """초안의 코드 펜스를 (블록 번호, 코드 순번, 언어, 코드) 목록으로 반환하는 함수
+
+    블록 번호는 split_blocks() 결과에서의 위치라 블록 단위 수정 대상으로 바로 쓸 수 있고,
+    코드 순번은 "N번째 코드"와 같은 1부터 시작하는 번호입니다.
+    """
+    extracted = []
+    for index, block in enumerate(split_blocks(text)):
+        if block.kind != CODE:
+            continue
+        lines = block.text.rstrip("\n").split("\n")
+        fence = lines[0].strip()
+        language = fence[3:].strip().split(" ")[0].lower()
+        body = lines[1:-1] if len(lines) > 1 and lines[-1].strip().startswith(fence[:3]) else lines[1:]
+        extracted.append((index, len(extracted) + 1, language, "\n".join(body)))
+    return extracted
+
+
+# 검사 결과를 한 줄로 표시
+def format_check_result(result):
+    location = f" {result['line']}번째 줄" if result.get("line") else ""
+    return f"{result['number']}번째 코드 ({result['language']}){location}: {result['message']}"
+
+
+# `bash -n` 앞에서 자원 제한을 거는 셸 코드 ($0은 bash 경로, $1/$2는 메모리 KB/CPU 초)
+SHELL_WRAPPER = 'ulimit -v "$1" -t "$2" || exit 125; exec "$0" --norc --noprofile -n'
+
+
+class CodeValidator:
+    """초안의 코드 예제 문법을 별도 프로세스에서 확인하는 검사기
+
+    Python은 ast로 구문만 분석하고(실행하지 않음), JSON/YAML은 파싱하며, 셸 스크립트는
+    `bash -n`으로 확인합니다. 검사는 max_workers개의 작업 스레드에서 돌아가고, 각 검사
+    프로세스는 빈 임시 디렉터리에서 최소한의 환경 변수와 메모리/CPU 제한, timeout초 제한으로
+    실행됩니다. 메모리/CPU 제한은 스레드가 있는 이 프로세스에서 preexec_fn으로 걸지 않고
+    자식 프로세스가 시작하자마자 스스로 겁니다 (CHECK_SCRIPT의 setrlimit, 셸은 ulimit).
+    같은 코드의 결과는 cache_size개까지 기억해 두고 다시 검사하지 않습니다.
+    """
+
+    def __init__(self, max_workers=2, timeout=5.0, memory_limit_mb=256, cache_size=1024):
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.cache_size = cache_size
+        self.checked = 0
+        self.failed = 0
+        self._bash = shutil.which("bash")
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self._workdir = tempfile.mkdtemp(prefix="code-check-")
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="code-check")
+
+    def submit(self, text):
+        """초안 검사를 작업 스레드에 맡기고 Future를 반환하는 함수 (결과는 validate()와 같음)"""
+        return self._executor.submit(self.validate, text)
+
+    def validate(self, text):
+        """초안의 코드 블록마다 검사 결과 dict(block, number, language, status, line, message) 목록을 반환하는 함수"""
+        results = []
+        pending = []
+        for index, number, language, code in extract_code_blocks(text):
+            result = {"block": index, "number": number, "language": language or "text"}
+            results.append(result)
+            check = LANGUAGE_CHECKS.get(language)
+            if check is None:
+                result.update(status=SKIPPED, line=None, message="확인하지 않는 언어예요")
+                continue
+            key = (check, hashlib.sha256(code.encode("utf-8")).hexdigest())
+            with self._lock:
+                cached = self._cache.get(key)
+                if cached is not None:
+                    self._cache.move_to_end(key)
+            if cached is not None:
+                result.update(cached)
+            else:
+                pending.append((key, check, code, result))
+
+        shell = [item for item in pending if item[1] == "shell"]
+        parsed = [item for item in pending if item[1] != "shell"]
+        checked = [(item, self._run_shell(item[2])) for item in shell]
+        if parsed:
+            checked.extend(zip(parsed, self._run_parser([(check, code) for _, check, code, _ in parsed])))
+        for (key, _, _, result), (status, line, message) in checked:
+            outcome = {"status": status, "line": line, "message": message}
+            result.update(outcome)
+            with self._lock:
+                self.checked += 1
+                self.failed += status == ERROR
+                if status in (OK, ERROR):
+                    self._cache[key] = outcome
+                    while len(self._cache) > self.cache_size:
+                        self._cache.popitem(last=False)
+        return results
+
+    def _cpu_seconds(self):
+        return max(1, int(self.timeout))
+
+    def _run(self, args, stdin):
+        """검사 프로세스를 제한된 환경에서 실행하는 함수 (시간 초과면 None)"""
+        try:
+            return subprocess.run(
+                args, input=stdin, capture_output=True, text=True, timeout=self.timeout, cwd=self._workdir,
+                env={"PATH": os.defpath, "LANG": "C.UTF-8", "PYTHONIOENCODING": "utf-8"},
+            )
+        except subprocess.TimeoutExpired:
+            return None
+
+    def _run_parser(self, items):
+        """Python/JSON/YAML 코드를 한 프로세스에서 함께 파싱하는 함수"""
+        stdin = json.dumps([{"language": check, "code": code} for check, code in items])
+        completed = self._run([sys.executable, "-I", "-c", CHECK_SCRIPT, str(self.memory_limit_mb),
+                               str(self._cpu_seconds())], stdin)
+        if completed is None:
+            return [(TIMEOUT, None, f"{self.timeout:g}초 안에 확인하지 못했어요")] * len(items)
+        try:
+            return [tuple(row) for row in json.loads(completed.stdout)]
+        except ValueError:
+            return [(SKIPPED, None, "검사 프로세스가 비정상 종료되었어요")] * len(items)
+
+    def _run_shell(self, code):
+        """셸 스크립트를 실행하지 않고 `bash -n`으로 문법만 확인하는 함수"""
+        if self._bash is None:
+            return SKIPPED, None, "bash가 없어 확인하지 않았어요"
+        completed = self._run([self._bash, "--norc", "--noprofile", "-c", SHELL_WRAPPER, self._bash,
+                               str(self.memory_limit_mb * 1024), str(self._cpu_seconds())], code + "\n")
+        if completed is None:
+            return TIMEOUT, None, f"{self.timeout:g}초 안에 확인하지 못했어요"
+        if completed.returncode == 0:
+            return OK, None, ""
+        if completed.returncode == 125:
+            return SKIPPED, None, "자원 제한을 걸지 못해 확인하지 않았어요"
+        # "bash: line 3: syntax error near unexpected token `fi'"
+        message = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "문법 오류"
+        line = None
+        if "line " in message:
+            number, _, rest = message.split("line ", 1)[1].partition(":")
+            if number.isdigit():
+                line, message = int(number), rest.strip()
+        return ERROR, line, message
+
+    def stats(self):
+        """검사한 코드 블록 수와 오류가 있던 블록 수를 반환하는 함수"""
+        with self._lock:
+            return {"checked": self.checked, "failed": self.failed, "cached": len(self._cache)}
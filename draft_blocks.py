@@ -0,0 +1,225 @@
+import difflib
+import re
+
+# 블록 종류
+HEADING = "heading"
+CODE = "code"
+PARAGRAPH = "paragraph"
+
+# 수정 요청에서 블록 종류를 가리키는 단어
+KIND_WORDS = {
+    CODE: ("코드", "예제 코드", "코드 예제", "스니펫", "code"),
+    PARAGRAPH: ("문단", "단락", "paragraph"),
+    HEADING: ("제목", "소제목", "헤딩"),
+}
+
+# 본문을 감싸는 코드 펜스
+def fence_block(text, language=""):
+    """본문 안의 어떤 백틱 줄보다 긴 펜스로 text를 감싸는 함수
+
+    수정된 코드 블록의 diff처럼 본문에 " ```" 줄이 들어 있어도 펜스가 중간에 닫히지 않습니다.
+    """
+    longest = max((len(run) for run in re.findall(r"`+", text)), default=0)
+    fence = "`" * max(3, longest + 1)
+    if not text.endswith("\n"):
+        text += "\n"
+    return f"{fence}{language}\n{text}{fence}"
+
+# 한국어 서수
+KOREAN_ORDINALS = {
+    "첫": 1, "한": 1, "두": 2, "둘": 2, "세": 3, "셋": 3, "네": 4, "넷": 4,
+    "다섯": 5, "여섯": 6, "일곱": 7, "여덟": 8, "아홉": 9, "열": 10,
+}
+
+ORDINAL_PATTERN = re.compile(
+    r"(\d+|" + "|".join(sorted(KOREAN_ORDINALS, key=len, reverse=True)) + r")\s*번째\s*"
+    r"(코드|예제|문단|단락|제목|소제목)?"
+)
+QUOTED_PATTERN = re.compile(r"[\"'“”‘’「」『』](.+?)[\"'“”‘’「」『』]")
+BLOCK_MARKER_PATTERN = re.compile(r"<<<BLOCK (\d+)>>>\n?(.*?)(?=\n?<<<END BLOCK \1>>>)", re.S)
+
+
+class Block:
+    """초안의 한 블록 (제목, 코드 펜스, 문단)
+
+    sep에는 블록 뒤의 빈 줄이 담기므로 모든 블록의 text + sep을 이으면
+    원본과 바이트 단위로 같은 텍스트가 됩니다.
+    """
+
+    def __init__(self, kind, text, sep=""):
+        self.kind = kind
+        self.text = text
+        self.sep = sep
+
+    def __repr__(self):
+        return f"Block({self.kind!r}, {self.text[:30]!r})"
+
+
+def split_blocks(text):
+    """마크다운 초안을 제목, 코드 펜스, 문단 블록으로 나누는 함수"""
+    blocks = []
+    lines = text.splitlines(keepends=True)
+    i = 0
+    leading = []
+    while i < len(lines) and not lines[i].strip():
+        leading.append(lines[i])
+        i += 1
+    if leading:
+        blocks.append(Block(PARAGRAPH, "", "".join(leading)))
+
+    while i < len(lines):
+        line = lines[i]
+        stripped = line.lstrip()
+        if stripped.startswith("```") or stripped.startswith("~~~"):
+            fence = stripped[:3]
+            chunk = [line]
+            i += 1
+            while i < len(lines):
+                chunk.append(lines[i])
+                i += 1
+                if lines[i - 1].lstrip().startswith(fence):
+                    break
+            kind = CODE
+        elif stripped.startswith("#"):
+            chunk = [line]
+            i += 1
+            kind = HEADING
+        else:
+            chunk = []
+            while i < len(lines) and lines[i].strip():
+                current = lines[i].lstrip()
+                if chunk and (current.startswith("#") or current.startswith("```") or current.startswith("~~~")):
+                    break
+                chunk.append(lines[i])
+                i += 1
+            kind = PARAGRAPH
+
+        sep = []
+        while i < len(lines) and not lines[i].strip():
+            sep.append(lines[i])
+            i += 1
+        blocks.append(Block(kind, "".join(chunk), "".join(sep)))
+    return blocks
+
+
+def join_blocks(blocks):
+    return "".join(block.text + block.sep for block in blocks)
+
+
+def _ordinal_value(token):
+    return int(token) if token.isdigit() else KOREAN_ORDINALS[token]
+
+
+def _kind_of(word):
+    for kind, words in KIND_WORDS.items():
+        if word and any(word in candidate or candidate in word for candidate in words):
+            return kind
+    return None
+
+
+def find_target_blocks(blocks, request):
+    """수정 요청이 가리키는 블록의 인덱스 목록을 찾는 함수 (찾지 못하면 빈 목록)
+
+    인용된 문구, "N번째 문단/코드", "마지막 코드", 소제목 이름, 종류 단어(코드, 예제)
+    순으로 확인합니다.
+    """
+    candidates = [i for i, block in enumerate(blocks) if block.text.strip()]
+    request_lower = request.lower()
+
+    # 인용된 문구가 들어 있는 블록
+    for quoted in QUOTED_PATTERN.findall(request):
+        matches = [i for i in candidates if quoted.strip() and quoted.strip() in blocks[i].text]
+        if matches:
+            return matches
+
+    # "두 번째 코드", "3번째 문단"
+    match = ORDINAL_PATTERN.search(request)
+    if match:
+        kind = _kind_of(match.group(2)) or _mentioned_kind(request_lower) or PARAGRAPH
+        of_kind = [i for i in candidates if blocks[i].kind == kind]
+        index = _ordinal_value(match.group(1)) - 1
+        if 0 <= index < len(of_kind):
+            return [of_kind[index]]
+
+    # "마지막 코드"
+    if "마지막" in request:
+        kind = _mentioned_kind(request_lower) or PARAGRAPH
+        of_kind = [i for i in candidates if blocks[i].kind == kind]
+        if of_kind:
+            return [of_kind[-1]]
+
+    # 소제목 이름이 언급된 경우 그 소제목 아래 블록들
+    for i in candidates:
+        if blocks[i].kind != HEADING:
+            continue
+        title = blocks[i].text.strip().lstrip("#").strip()
+        if title and title.lower() in request_lower:
+            section = [i]
+            for j in range(i + 1, len(blocks)):
+                if blocks[j].kind == HEADING:
+                    break
+                if blocks[j].text.strip():
+                    section.append(j)
+            return section
+
+    # 종류 단어만 있는 경우 (예: "코드 예제 고쳐줘")
+    kind = _mentioned_kind(request_lower)
+    if kind == CODE:
+        return [i for i in candidates if blocks[i].kind == CODE]
+    return []
+
+
+def _mentioned_kind(request_lower):
+    for kind in (CODE, HEADING, PARAGRAPH):
+        if any(word in request_lower for word in KIND_WORDS[kind]):
+            return kind
+    return None
+
+
+def format_target_blocks(blocks, targets):
+    """대상 블록들을 번호가 붙은 구분자로 감싸 프롬프트에 넣을 텍스트로 만드는 함수"""
+    return "\n\n".join(
+        f"<<<BLOCK {n}>>>\n{blocks[i].text.rstrip()}\n<<<END BLOCK {n}>>>"
+        for n, i in enumerate(targets, start=1)
+    )
+
+
+def context_around(blocks, targets):
+    """대상 블록 바로 앞뒤의 블록을 최소한의 문맥으로 모으는 함수"""
+    indices = set()
+    for i in targets:
+        for j in (i - 1, i + 1):
+            if 0 <= j < len(blocks) and j not in targets and blocks[j].text.strip():
+                indices.add(j)
+    return "\n\n".join(blocks[j].text.rstrip() for j in sorted(indices))
+
+
+def parse_revised_blocks(response, count):
+    """모델 응답에서 수정된 블록들을 꺼내는 함수 (형식이 맞지 않으면 None)"""
+    found = {int(n): text for n, text in BLOCK_MARKER_PATTERN.findall(response)}
+    if all(n in found for n in range(1, count + 1)):
+        return [found[n] for n in range(1, count + 1)]
+    if count == 1 and "<<<" not in response:
+        return [response.strip("\n")]
+    return None
+
+
+def patch_blocks(blocks, targets, revised):
+    """대상 블록만 교체한 새 텍스트를 만드는 함수 (나머지는 바이트 단위로 그대로)"""
+    patched = [Block(block.kind, block.text, block.sep) for block in blocks]
+    for i, text in zip(targets, revised):
+        original = patched[i].text
+        trailing = original[len(original.rstrip("\n")):]
+        patched[i].text = text.rstrip("\n") + trailing
+    return join_blocks(patched)
+
+
+def unified_diff(before, after):
+    """수정 전후의 unified diff 텍스트를 만드는 함수"""
+    return "".join(difflib.unified_diff(
+        before.splitlines(keepends=True),
+        after.splitlines(keepends=True),
+        fromfile="수정 전",
+        tofile="수정 후",
+        n=1,
+    ))
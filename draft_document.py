@@ -0,0 +1,239 @@
+import html
+import io
+import re
+import zipfile
+
+# 아직 작성되지 않은 섹션 자리에 넣을 문구
+MISSING_SECTION_TEXT = "_(아직 작성되지 않은 섹션입니다.)_"
+
+# 내보내기 형식별 MIME 타입
+EXPORT_MIME_TYPES = {
+    "md": "text/markdown",
+    "html": "text/html",
+    "zip": "application/zip",
+}
+
+HTML_HEAD = """<!DOCTYPE html>
+<html lang="ko">
+<head>
+<meta charset="utf-8">
+<title>{title}</title>
+<style>
+body {{ max-width: 760px; margin: 40px auto; padding: 0 16px; font-family: sans-serif; line-height: 1.7; }}
+pre {{ background: #f6f8fa; padding: 12px; overflow-x: auto; border-radius: 6px; }}
+code {{ font-family: monospace; }}
+</style>
+</head>
+<body>
+"""
+HTML_TAIL = "</body>\n</html>\n"
+
+_FENCE_PATTERN = re.compile(r"^\s*(```|~~~)\s*([\w+#.-]*)")
+_HEADING_PATTERN = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_LIST_PATTERN = re.compile(r"^\s*(?:([-*+])|\d+[.)])\s+(.*)$")
+_INLINE_CODE_PATTERN = re.compile(r"`([^`]+)`")
+_BOLD_PATTERN = re.compile(r"\*\*(.+?)\*\*")
+_LINK_PATTERN = re.compile(r"\[([^\]]+)\]\((https?://[^)\s]+)\)")
+_UNSAFE_FILENAME_PATTERN = re.compile(r"[\\/:*?\"<>|\s]+")
+
+
+# 모델이 생성한 제목 정리
+def clean_title(text):
+    """모델 응답에서 첫 줄을 제목으로 꺼내고 마크다운 기호와 따옴표를 떼는 함수"""
+    for line in text.splitlines():
+        line = line.strip().strip("#*\"'“”` ").strip()
+        if line:
+            return line
+    return ""
+
+
+# 문단 안의 마크다운 서식을 HTML로 변환
+def _inline_html(text):
+    parts = _INLINE_CODE_PATTERN.split(text)
+    converted = []
+    for i, part in enumerate(parts):
+        if i % 2:
+            converted.append(f"<code>{html.escape(part)}</code>")
+            continue
+        part = _BOLD_PATTERN.sub(r"<strong>\1</strong>", html.escape(part))
+        converted.append(_LINK_PATTERN.sub(r'<a href="\2">\1</a>', part))
+    return "".join(converted)
+
+
+# 마크다운 조각을 HTML로 변환
+def markdown_to_html(text):
+    """마크다운 한 조각을 HTML로 바꾸는 함수
+
+    초안에 쓰이는 제목, 코드 펜스, 목록, 문단과 굵은 글씨, 인라인 코드, 링크만 변환하며
+    그 밖의 문법은 문단 텍스트로 둡니다.
+    """
+    converted = []
+    paragraph = []
+    list_tag = None
+    lines = text.splitlines()
+    i = 0
+
+    def close_blocks():
+        nonlocal list_tag
+        if paragraph:
+            converted.append(f"<p>{_inline_html(' '.join(paragraph))}</p>\n")
+            paragraph.clear()
+        if list_tag:
+            converted.append(f"</{list_tag}>\n")
+            list_tag = None
+
+    while i < len(lines):
+        line = lines[i]
+        fence = _FENCE_PATTERN.match(line)
+        heading = _HEADING_PATTERN.match(line)
+        item = _LIST_PATTERN.match(line)
+        if fence:
+            close_blocks()
+            code = []
+            i += 1
+            while i < len(lines) and not lines[i].strip().startswith(fence.group(1)):
+                code.append(lines[i])
+                i += 1
+            language = f' class="language-{html.escape(fence.group(2))}"' if fence.group(2) else ""
+            converted.append(f"<pre><code{language}>{html.escape(chr(10).join(code))}</code></pre>\n")
+        elif heading:
+            close_blocks()
+            level = len(heading.group(1))
+            converted.append(f"<h{level}>{_inline_html(heading.group(2))}</h{level}>\n")
+        elif item:
+            tag = "ul" if item.group(1) else "ol"
+            if paragraph or list_tag != tag:
+                close_blocks()
+                converted.append(f"<{tag}>\n")
+                list_tag = tag
+            converted.append(f"<li>{_inline_html(item.group(2))}</li>\n")
+        elif not line.strip():
+            close_blocks()
+        else:
+            if list_tag:
+                close_blocks()
+            paragraph.append(line.strip())
+        i += 1
+    close_blocks()
+    return "".join(converted)
+
+
+class DraftDocument:
+    """글 흐름 순서대로 섹션 초안 참조를 담아 두고, 섹션이 확정될 때마다 그 섹션만 바꾸는 전체 초안
+
+    본문은 초안 저장소(DraftStore)에만 두고 여기에는 섹션별 참조와 조각 길이만 들고 있으므로
+    본문이 세션에 다시 복사되지 않습니다. 조각마다 시작 위치(offsets)를 색인해 두어 섹션 하나를
+    바꿀 때 뒤 조각들의 위치만 옮기고, 마크다운과 내보내기 결과는 필요할 때마다 load(참조)로
+    본문을 읽어 조각 단위로 만듭니다. 아직 없는 섹션은 MISSING_SECTION_TEXT로 채웁니다.
+    """
+
+    def __init__(self, title, flow_items, load, sections=None):
+        self.title = title
+        self.flow_items = []
+        self.version = 0
+        self._load = load
+        self._refs = dict(sections or {})
+        self._lengths = []
+        self._offsets = [0]
+        self._positions = {}
+        self.set_flow(flow_items)
+
+    def _section_chunk(self, section_title, text=None):
+        if text is None:
+            ref = self._refs.get(section_title)
+            text = self._load(ref) if ref else ""
+        return f"## {section_title}\n{text or MISSING_SECTION_TEXT}\n\n"
+
+    def _chunk(self, index):
+        return f"# {self.title}\n\n" if index == 0 else self._section_chunk(self.flow_items[index - 1])
+
+    def _resize_chunk(self, index, length):
+        """조각 하나의 길이를 바꾸고 뒤 조각들의 시작 위치를 맞추는 함수"""
+        delta = length - self._lengths[index]
+        self._lengths[index] = length
+        for i in range(index + 1, len(self._offsets)):
+            self._offsets[i] += delta
+        self.version += 1
+
+    def set_flow(self, flow_items):
+        """글 흐름을 바꾸고 조각 위치를 다시 색인하는 함수 (이미 받은 섹션 참조는 유지)"""
+        self.flow_items = list(flow_items)
+        self._positions = {section_title: i + 1 for i, section_title in enumerate(self.flow_items)}
+        self._lengths = [len(self._chunk(i)) for i in range(len(self.flow_items) + 1)]
+        self._offsets = [0]
+        for length in self._lengths:
+            self._offsets.append(self._offsets[-1] + length)
+        self.version += 1
+
+    def set_title(self, title):
+        """글 제목을 바꾸는 함수"""
+        self.title = title
+        if self._lengths:
+            self._resize_chunk(0, len(self._chunk(0)))
+
+    def set_section(self, section_title, ref, text=None):
+        """섹션 초안 참조를 넣거나 바꾸는 함수 (text를 주면 본문을 다시 읽지 않고 길이만 계산)
+
+        글 흐름에 없는 섹션은 참조만 기억합니다.
+        """
+        self._refs[section_title] = ref
+        index = self._positions.get(section_title)
+        if index is not None:
+            self._resize_chunk(index, len(self._section_chunk(section_title, text)))
+
+    def missing(self):
+        """글 흐름에서 아직 본문이 없는 섹션 목록을 반환하는 함수"""
+        return [section_title for section_title in self.flow_items if not self._refs.get(section_title)]
+
+    def section_span(self, section_title):
+        """섹션이 전체 마크다운에서 차지하는 (시작, 끝) 위치를 반환하는 함수"""
+        index = self._positions[section_title]
+        return self._offsets[index], self._offsets[index + 1]
+
+    def chunks(self):
+        """제목 조각과 섹션 조각을 순서대로 만들어 내는 함수"""
+        for index in range(len(self.flow_items) + 1):
+            yield self._chunk(index)
+
+    def markdown(self):
+        """전체 초안 마크다운을 반환하는 함수"""
+        return "".join(self.chunks())
+
+    def clear(self):
+        """담아 둔 섹션 참조를 모두 비우는 함수"""
+        self._refs.clear()
+        self.set_flow(self.flow_items)
+
+    def write_markdown(self, stream):
+        """마크다운을 조각 단위로 stream(바이너리)에 쓰는 함수"""
+        for chunk in self.chunks():
+            stream.write(chunk.encode("utf-8"))
+
+    def write_html(self, stream):
+        """HTML 문서를 조각 단위로 변환하며 stream(바이너리)에 쓰는 함수"""
+        stream.write(HTML_HEAD.format(title=html.escape(self.title)).encode("utf-8"))
+        for chunk in self.chunks():
+            stream.write(markdown_to_html(chunk).encode("utf-8"))
+        stream.write(HTML_TAIL.encode("utf-8"))
+
+    def file_stem(self):
+        """내보낼 파일 이름(확장자 제외)을 반환하는 함수"""
+        return _UNSAFE_FILENAME_PATTERN.sub("-", self.title).strip("-.")[:60] or "draft"
+
+    def export(self, fmt):
+        """md, html, zip 형식의 내보내기 내용을 만들어 bytes로 반환하는 함수 (결과는 보관하지 않음)"""
+        if fmt not in EXPORT_MIME_TYPES:
+            raise ValueError(f"지원하지 않는 내보내기 형식입니다: {fmt}")
+        buffer = io.BytesIO()
+        if fmt == "md":
+            self.write_markdown(buffer)
+        elif fmt == "html":
+            self.write_html(buffer)
+        else:
+            stem = self.file_stem()
+            with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as archive:
+                with archive.open(f"{stem}.md", "w") as stream:
+                    self.write_markdown(stream)
+                with archive.open(f"{stem}.html", "w") as stream:
+                    self.write_html(stream)
+        return buffer.getvalue()
@@ -0,0 +1,92 @@
+import difflib
+import hashlib
+import zlib
+
+
+class DraftStore:
+    """초안 본문을 내용 해시(sha256)로 한 번만 저장하는 세션별 저장소
+
+    메시지와 초안 목록은 본문 대신 참조(해시)만 들고 있으므로 같은 본문이
+    확인 메시지, 작성 중인 초안, 확정된 섹션에 중복 저장되지 않습니다.
+    compress_threshold 바이트 이상인 본문은 zlib으로 압축해 보관합니다.
+    """
+
+    def __init__(self, compress_threshold=512):
+        self.compress_threshold = compress_threshold
+        self._blobs = {}
+
+    def put(self, text):
+        """본문을 저장하고 참조를 반환하는 함수 (같은 본문은 같은 참조)"""
+        data = text.encode("utf-8")
+        ref = hashlib.sha256(data).hexdigest()
+        if ref not in self._blobs:
+            if len(data) >= self.compress_threshold:
+                self._blobs[ref] = (True, zlib.compress(data))
+            else:
+                self._blobs[ref] = (False, data)
+        return ref
+
+    def get(self, ref):
+        """참조에 해당하는 본문을 반환하는 함수 (없으면 None)"""
+        entry = self._blobs.get(ref)
+        if entry is None:
+            return None
+        compressed, data = entry
+        return (zlib.decompress(data) if compressed else data).decode("utf-8")
+
+    def collect(self, live_refs):
+        """live_refs에 없는 본문을 지우고 지운 개수를 반환하는 함수"""
+        live_refs = set(live_refs)
+        dead = [ref for ref in self._blobs if ref not in live_refs]
+        for ref in dead:
+            del self._blobs[ref]
+        return len(dead)
+
+    def clear(self):
+        """저장된 본문을 모두 지우는 함수"""
+        self._blobs.clear()
+
+    def snapshot(self):
+        """세션 저장용으로 참조별 본문 dict를 반환하는 함수"""
+        return {ref: self.get(ref) for ref in self._blobs}
+
+    @classmethod
+    def from_snapshot(cls, texts, compress_threshold=512):
+        """snapshot()으로 만든 dict에서 저장소를 복원하는 함수"""
+        store = cls(compress_threshold=compress_threshold)
+        for text in texts.values():
+            store.put(text)
+        return store
+
+    def stats(self):
+        """저장된 본문 수와 원본/저장 크기(바이트)를 반환하는 함수"""
+        raw_bytes = 0
+        stored_bytes = 0
+        for compressed, data in self._blobs.values():
+            stored_bytes += len(data)
+            raw_bytes += len(zlib.decompress(data)) if compressed else len(data)
+        return {"entries": len(self._blobs), "raw_bytes": raw_bytes, "stored_bytes": stored_bytes}
+
+
+# 수정 이력용 델타
+def make_delta(new, old):
+    """new를 old로 되돌리는 줄 단위 델타를 만드는 함수
+
+    델타는 (시작 줄, 끝 줄, 대체 텍스트) 목록으로, 바뀐 줄만 담습니다.
+    """
+    new_lines = new.splitlines(keepends=True)
+    old_lines = old.splitlines(keepends=True)
+    matcher = difflib.SequenceMatcher(None, new_lines, old_lines, autojunk=False)
+    return [
+        (i1, i2, "".join(old_lines[j1:j2]))
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes()
+        if tag != "equal"
+    ]
+
+
+def apply_delta(text, delta):
+    """make_delta로 만든 델타를 적용해 이전 본문을 복원하는 함수"""
+    lines = text.splitlines(keepends=True)
+    for i1, i2, replacement in reversed(delta):
+        lines[i1:i2] = replacement.splitlines(keepends=True)
+    return "".join(lines)
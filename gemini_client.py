@@ -0,0 +1,122 @@
+import datetime
+import threading
+from collections import OrderedDict
+
+_genai = None
+
+
+# google.generativeai 불러오기
+def load_sdk():
+    """grpc/protobuf까지 불러와 import 비용이 큰 SDK를 처음 필요할 때 한 번만 import하는 함수
+
+    앱의 첫 화면은 SDK 없이 그려지고, 첫 모델 호출(또는 미리 불러오기) 때 import됩니다.
+    """
+    global _genai
+    if _genai is None:
+        import google.generativeai as genai
+        _genai = genai
+    return _genai
+
+
+class GeminiClient:
+    """프로세스 전체에서 공유하는 Gemini 클라이언트
+
+    genai.configure는 호출될 때마다 SDK가 캐시한 서비스 클라이언트(gRPC 채널)를
+    버리므로 처음 사용할 때 한 번만 호출합니다. 이후 모든 호출은 같은 채널을 재사용하고,
+    GenerativeModel 인스턴스도 (모델 이름, system_instruction 또는 캐시된 컨텍스트) 별로
+    최대 max_models개까지 재사용합니다.
+
+    api_endpoint를 주면 REST 전송으로 해당 주소에 요청합니다
+    (예: benchmarks/mock_gemini_server.py 로컬 대역 서버).
+    """
+
+    def __init__(self, api_key, default_model="gemini-1.5-pro", transport=None, client_options=None,
+                 max_models=64, min_cache_tokens=32768, api_endpoint=None):
+        self.default_model = default_model
+        self.max_models = max_models
+        self.min_cache_tokens = min_cache_tokens
+        self._models = OrderedDict()
+        self._lock = threading.Lock()
+        if api_endpoint:
+            transport = transport or "rest"
+            client_options = dict(client_options or {}, api_endpoint=api_endpoint)
+        self._configure_options = {"api_key": api_key, "transport": transport, "client_options": client_options}
+        self._genai = None
+
+    def sdk(self):
+        """SDK를 불러와 한 번만 설정하고 반환하는 함수"""
+        if self._genai is None:
+            with self._lock:
+                if self._genai is None:
+                    genai = load_sdk()
+                    genai.configure(**self._configure_options)
+                    self._genai = genai
+        return self._genai
+
+    def _remember(self, key, factory):
+        with self._lock:
+            model = self._models.get(key)
+            if model is None:
+                model = factory()
+                self._models[key] = model
+            self._models.move_to_end(key)
+            while len(self._models) > self.max_models:
+                self._models.popitem(last=False)
+            return model
+
+    def model(self, model_name=None, system_instruction=None, cached_content=None):
+        """캐시된 GenerativeModel을 반환하는 함수"""
+        genai = self.sdk()
+        if cached_content:
+            return self._remember(
+                ("cached", cached_content),
+                lambda: genai.GenerativeModel.from_cached_content(cached_content=cached_content),
+            )
+        model_name = model_name or self.default_model
+        return self._remember(
+            (model_name, system_instruction),
+            lambda: genai.GenerativeModel(model_name, system_instruction=system_instruction),
+        )
+
+    def register_context(self, system_instruction, estimated_tokens=0, model_name=None, ttl=3600):
+        """세션 공통 컨텍스트를 등록하고 호출 시 넘길 정보를 반환하는 함수
+
+        컨텍스트가 API의 최소 캐시 크기(min_cache_tokens) 이상이면 CachedContent로
+        서버에 한 번만 올리고, 그보다 작거나 캐시 생성에 실패하면
+        system_instruction으로 매 호출에 함께 보냅니다.
+        """
+        context = {"system_instruction": system_instruction, "cached_content": None,
+                   "model_name": model_name or self.default_model}
+        if estimated_tokens < self.min_cache_tokens:
+            return context
+        try:
+            cached = self.sdk().caching.CachedContent.create(
+                model=model_name or self.default_model,
+                system_instruction=system_instruction,
+                ttl=datetime.timedelta(seconds=ttl),
+            )
+            context["cached_content"] = cached.name
+        except Exception:
+            pass
+        return context
+
+    def release_context(self, context):
+        """더 이상 쓰지 않는 세션 컨텍스트와 관련 모델 인스턴스를 정리하는 함수"""
+        # 이 컨텍스트의 모델만 정확한 키로 지움 (system_instruction이 없는 공용 모델은 남김)
+        if context["cached_content"]:
+            key = ("cached", context["cached_content"])
+        else:
+            key = (context.get("model_name") or self.default_model, context["system_instruction"])
+        with self._lock:
+            self._models.pop(key, None)
+        if context["cached_content"]:
+            try:
+                self.sdk().caching.CachedContent.get(context["cached_content"]).delete()
+            except Exception:
+                pass
+
+    def generate(self, prompt, model_name=None, generation_config=None, stream=False,
+                 system_instruction=None, cached_content=None):
+        """모델 이름, 생성 설정, 컨텍스트를 호출마다 지정해 generate_content를 호출하는 함수"""
+        model = self.model(model_name, system_instruction, cached_content)
+        return model.generate_content(prompt, generation_config=generation_config, stream=stream)
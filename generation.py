@@ -0,0 +1,467 @@
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from prompts import PROMPT_CANDIDATE_VARIANT, PROMPT_CONTINUE, PROMPT_SESSION_CONTEXT, REACT_SYSTEM_PROMPT
+from response_cache import ResponseCache
+from scheduler import PRIORITY_INTERACTIVE
+
+# 사용 모델 이름
+MODEL_NAME = "gemini-1.5-pro"
+
+# 이전 섹션 컨텍스트의 토큰 예산
+PREVIOUS_SECTIONS_TOKEN_BUDGET = int(os.getenv("PREVIOUS_SECTIONS_TOKEN_BUDGET", "3000"))
+
+# 요약이 아직 없을 때 대신 넣을 섹션 앞부분의 최대 글자 수
+SUMMARY_FALLBACK_CHARS = int(os.getenv("SUMMARY_FALLBACK_CHARS", "600"))
+
+# 모델 생성 설정
+GENERATION_CONFIG = {
+    "temperature": 0.7,
+    "top_p": 0.8,
+    "top_k": 40,
+    "max_output_tokens": 2048,
+}
+
+# 스트리밍 청크에서 텍스트 추출
+def _chunk_text(chunk):
+    """텍스트가 없는 청크(안전 필터 등)는 빈 문자열로 처리하는 함수"""
+    try:
+        return chunk.text or ""
+    except ValueError:
+        return ""
+
+# 대략적인 토큰 수 추정
+def estimate_tokens(text):
+    """한국어/영어 혼합 텍스트의 토큰 수를 글자 수로 대략 추정하는 함수"""
+    return len(text) // 2 + 1
+
+# 작업 종류별 출력 토큰 기본 예산 (없는 작업은 GENERATION_CONFIG의 max_output_tokens)
+STEP_OUTPUT_BUDGETS = {
+    "topic": 128,
+    "title": 128,
+    "keywords": 256,
+    "flow": 512,
+    "section_summary": 512,
+    "block_revision": 1024,
+}
+
+# 출력 토큰 예산 상한 (모델의 최대 출력 길이)
+MAX_OUTPUT_TOKENS_CEILING = int(os.getenv("MAX_OUTPUT_TOKENS_CEILING", "8192"))
+
+# 출력 길이 제한으로 끊긴 응답을 이어 쓰는 최대 횟수
+MAX_CONTINUATIONS = int(os.getenv("MAX_CONTINUATIONS", "3"))
+
+# 첫 줄만 쓰는 작업 (예산을 넘겨도 이어 쓰지 않음)
+SINGLE_LINE_LABELS = frozenset({"topic", "title"})
+
+# 이어 쓴 조각 앞부분이 기존 끝부분을 반복했다고 볼 최소 길이(글자)
+MIN_CONTINUATION_OVERLAP = 8
+
+FENCE_MARKERS = ("```", "~~~")
+
+
+class OutputBudgets:
+    """작업 종류(label)별 max_output_tokens 예산
+
+    관측한 출력 토큰 수가 min_samples개 이상 쌓이면 최근 window개의 p95에
+    headroom을 곱한 값(64 단위 올림, floor~ceiling)을 쓰고, 그 전에는 기본값을 씁니다.
+    예산이 모자라 끊긴 응답은 이어 쓰기로 완성되고 그 전체 길이가 다시 관측되므로
+    예산은 실제 출력 길이를 따라갑니다. 여러 스레드에서 함께 사용합니다.
+    """
+
+    def __init__(self, defaults=None, default=None, ceiling=None, floor=64, headroom=1.25,
+                 min_samples=20, window=200):
+        self.defaults = STEP_OUTPUT_BUDGETS if defaults is None else defaults
+        self.default = default or GENERATION_CONFIG["max_output_tokens"]
+        self.ceiling = ceiling or MAX_OUTPUT_TOKENS_CEILING
+        self.floor = floor
+        self.headroom = headroom
+        self.min_samples = min_samples
+        self.window = window
+        self._samples = {}
+        self._lock = threading.Lock()
+
+    def budget(self, label):
+        with self._lock:
+            samples = list(self._samples.get(label, ()))
+        if len(samples) < self.min_samples:
+            return self.defaults.get(label, self.default)
+        samples.sort()
+        p95 = samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+        budget = -(-int(p95 * self.headroom) // 64) * 64
+        return max(self.floor, min(self.ceiling, budget))
+
+    def observe(self, label, output_tokens):
+        if not output_tokens:
+            return
+        with self._lock:
+            self._samples.setdefault(label, deque(maxlen=self.window)).append(output_tokens)
+
+
+# 열린 코드 펜스 확인
+def open_fence(text):
+    """텍스트가 코드 블록 안에서 끝나면 여는 펜스 기호(``` 또는 ~~~)를, 아니면 None을 반환하는 함수"""
+    fence = None
+    for line in text.splitlines():
+        stripped = line.lstrip()
+        if fence is None:
+            fence = next((marker for marker in FENCE_MARKERS if stripped.startswith(marker)), None)
+        elif stripped.startswith(fence):
+            fence = None
+    return fence
+
+# 이어 쓴 조각 붙이기
+def stitch_continuation(text, piece):
+    """끊긴 응답 text 뒤에 이어 쓴 piece를 자연스럽게 붙이는 함수
+
+    - text가 코드 블록 안에서 끊겼는데 piece가 코드 블록을 다시 열면 먼저 그 펜스 줄을 뺍니다.
+    - piece가 text의 끝부분을 반복하며 시작하면 겹친 부분을 뺍니다.
+    - 다시 연 코드 블록은 새 줄에서 시작하므로, 겹친 부분 없이 text가 줄 중간에서 끊겼으면 줄을 바꿉니다.
+    """
+    reopened = False
+    fence = open_fence(text)
+    if fence:
+        body = piece.lstrip("\n")
+        first_line, newline, rest = body.partition("\n")
+        if first_line.strip().startswith(fence) and newline:
+            piece = rest
+            reopened = True
+
+    overlap = 0
+    limit = min(len(text), len(piece), 400)
+    for size in range(limit, MIN_CONTINUATION_OVERLAP - 1, -1):
+        if text.endswith(piece[:size]):
+            overlap = size
+            piece = piece[size:]
+            break
+
+    if reopened and not overlap and not text.endswith("\n") and not piece.startswith("\n"):
+        piece = "\n" + piece
+    return text + piece
+
+# 잘린 코드 블록 닫기
+def close_open_fence(text):
+    """코드 블록 안에서 끝난 텍스트에 닫는 펜스를 붙이는 함수"""
+    fence = open_fence(text)
+    if not fence:
+        return text
+    return text + ("" if text.endswith("\n") else "\n") + fence + "\n"
+
+# 응답의 종료 이유 확인
+def _finish_reason(response):
+    """응답 첫 후보의 종료 이유 이름(STOP, MAX_TOKENS 등)을 반환하는 함수 (알 수 없으면 None)"""
+    try:
+        reason = response.candidates[0].finish_reason
+    except (AttributeError, IndexError, TypeError, ValueError):
+        return None
+    return getattr(reason, "name", reason)
+
+# 모델 호출 (Streamlit 비의존)
+def generate_text(client, prompt, cache=None, use_cache=True, on_chunk=None,
+                  model_name=None, generation_config=None, scheduler=None, priority=PRIORITY_INTERACTIVE,
+                  session_context=None, metrics=None, tags=None, budgets=None, max_continuations=None,
+                  semantic_cache=None, semantic_text=None):
+    """Streamlit에 의존하지 않고 모델을 호출하는 함수 (작업 스레드에서 실행)
+
+    on_chunk가 주어지면 스트리밍으로 호출하고, 청크가 도착할 때마다
+    지금까지 누적된 텍스트로 on_chunk를 호출합니다.
+    model_name, generation_config를 주지 않으면 기본값을 사용하고,
+    budgets(OutputBudgets)가 주어지면 max_output_tokens를 작업 종류(tags의 label)별 예산으로 정합니다.
+    scheduler가 주어지면 속도 제한, 재시도, 중복 호출 합치기를 거쳐 호출합니다.
+    session_context가 주어지면 등록된 세션 컨텍스트(system_instruction 또는
+    캐시된 컨텍스트)와 함께 prompt에는 변경분만 보냅니다.
+    응답이 출력 길이 제한(MAX_TOKENS)으로 끊기면 최대 max_continuations번 이어 쓰기를
+    요청해 이어 붙이고, 그래도 끊겨 있으면 열린 코드 블록을 닫습니다.
+    semantic_cache(SemanticCache)와 semantic_text(프롬프트의 바뀌는 부분, 예: 주제)가 주어지고
+    작업 종류가 유사도 캐시를 쓰도록 설정되어 있으면, semantic_text가 거의 같은 이전 요청의
+    응답을 모델 호출 없이 돌려줍니다.
+    metrics(MetricsRecorder)가 주어지면 성공, 실패와 관계없이 호출 정보를
+    tags(step, section, label, session)와 함께 기록합니다.
+    (텍스트, 호출 정보) 튜플을 반환하며, 호출 실패 시 예외를 그대로 전달합니다.
+    """
+    started_at = time.perf_counter()
+    model_name = model_name or client.default_model
+    label = (tags or {}).get("label")
+    if generation_config is None:
+        generation_config = GENERATION_CONFIG
+        if budgets is not None:
+            generation_config = dict(generation_config, max_output_tokens=budgets.budget(label))
+    if max_continuations is None:
+        max_continuations = 0 if label in SINGLE_LINE_LABELS else MAX_CONTINUATIONS
+    info = {"ttft": None, "total": None, "cache_hit": False, "prompt_tokens": None, "output_tokens": None,
+            "finish_reason": None, "continuations": 0, "truncated": False, "semantic_hit": False, "similarity": None}
+    session_context = session_context or {"system_instruction": None, "cached_content": None}
+    # 끊긴 응답은 이어 쓰기로 완성하므로 출력 예산이 달라도 같은 응답으로 취급
+    key_config = {key: value for key, value in generation_config.items() if key != "max_output_tokens"}
+    cache_key = ResponseCache.make_key(model_name, prompt, key_config, session_context["system_instruction"])
+
+    def record(ok, error=None):
+        if metrics is not None:
+            metrics.record_call(info, ok=ok, error=error, model=model_name, stream=on_chunk is not None,
+                                **(tags or {}))
+
+    # 캐시된 응답 확인
+    if cache is not None and use_cache:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            info["ttft"] = info["total"] = time.perf_counter() - started_at
+            info["cache_hit"] = True
+            record(True)
+            return cached, info
+
+    # 입력이 거의 같은 이전 요청의 응답 확인 (작업 종류별로 켠 경우만)
+    use_semantic = semantic_cache is not None and bool(semantic_text) and semantic_cache.enabled(label)
+    if use_semantic and use_cache:
+        cached, info["similarity"] = semantic_cache.get((label, model_name), semantic_text)
+        if cached is not None:
+            info["ttft"] = info["total"] = time.perf_counter() - started_at
+            info["cache_hit"] = info["semantic_hit"] = True
+            record(True)
+            return cached, info
+
+    stream = on_chunk is not None
+
+    # 응답 생성 (prefix는 이어 쓰기 전까지의 텍스트)
+    def call(call_prompt, prefix):
+        response = client.generate(
+            call_prompt,
+            model_name=model_name,
+            generation_config=generation_config,
+            stream=stream,
+            system_instruction=session_context["system_instruction"],
+            cached_content=session_context["cached_content"]
+        )
+
+        if stream:
+            text = ""
+            for chunk in response:
+                chunk_text = _chunk_text(chunk)
+                if not chunk_text:
+                    continue
+                if info["ttft"] is None:
+                    info["ttft"] = time.perf_counter() - started_at
+                text += chunk_text
+                on_chunk(stitch_continuation(prefix, text) if prefix else text)
+        else:
+            text = response.text if response else ""
+        finish_reason = _finish_reason(response)
+
+        # 토큰 사용량 기록 (이어 쓰기 호출까지 합산)
+        usage = getattr(response, "usage_metadata", None)
+        if not usage:
+            return (text, finish_reason), None
+        info["prompt_tokens"] = (info["prompt_tokens"] or 0) + usage.prompt_token_count
+        info["output_tokens"] = (info["output_tokens"] or 0) + usage.candidates_token_count
+        return (text, finish_reason), usage.prompt_token_count + usage.candidates_token_count
+
+    def run(call_prompt, prefix="", key=None):
+        if scheduler is None:
+            result, _ = call(call_prompt, prefix)
+            return result
+        cost_tokens = estimate_tokens(call_prompt) + generation_config.get("max_output_tokens", 0)
+        if session_context["system_instruction"] and not session_context["cached_content"]:
+            cost_tokens += estimate_tokens(session_context["system_instruction"])
+        return scheduler.call(lambda: call(call_prompt, prefix), priority=priority, cost_tokens=cost_tokens,
+                              key=key)
+
+    try:
+        text, finish_reason = run(prompt, key=cache_key)
+        # 출력 길이 제한으로 끊겼으면 끊긴 지점부터 이어 쓰기
+        while text and finish_reason == "MAX_TOKENS" and info["continuations"] < max_continuations:
+            info["continuations"] += 1
+            piece, finish_reason = run(PROMPT_CONTINUE.format(prompt=prompt, partial=text), prefix=text)
+            if not piece:
+                break
+            text = stitch_continuation(text, piece)
+            if stream:
+                on_chunk(text)
+    except BaseException as e:
+        info["total"] = time.perf_counter() - started_at
+        record(False, type(e).__name__)
+        raise
+    info["finish_reason"] = finish_reason
+    if finish_reason == "MAX_TOKENS":
+        info["truncated"] = True
+        text = close_open_fence(text)
+
+    # 이어 쓰기로도 완성하지 못한 응답은 다시 요청할 수 있도록 캐시하지 않음
+    if text and not info["truncated"]:
+        if cache is not None:
+            cache.set(cache_key, text)
+        if use_semantic:
+            semantic_cache.set((label, model_name), semantic_text, text)
+    if budgets is not None:
+        budgets.observe(label, info["output_tokens"] or estimate_tokens(text))
+    if info["ttft"] is None:
+        info["ttft"] = time.perf_counter() - started_at
+    info["total"] = time.perf_counter() - started_at
+    record(bool(text), None if text else "EmptyResponse")
+    return text, info
+
+# 응답의 후보별 텍스트 추출
+def _candidate_texts(response):
+    """응답의 모든 후보에서 (텍스트, 종료 이유)를 뽑는 함수 (텍스트가 없는 후보는 제외)"""
+    results = []
+    for candidate in getattr(response, "candidates", None) or []:
+        parts = getattr(getattr(candidate, "content", None), "parts", None) or []
+        text = "".join(getattr(part, "text", "") or "" for part in parts)
+        reason = getattr(candidate, "finish_reason", None)
+        if text:
+            results.append((text, getattr(reason, "name", reason)))
+    return results
+
+# 후보 여러 개 생성 (Streamlit 비의존)
+def generate_candidates(client, prompt, count, parallel=False, scheduler=None, priority=PRIORITY_INTERACTIVE,
+                        session_context=None, metrics=None, tags=None, budgets=None):
+    """같은 요청에 대한 후보 count개를 만들어 (텍스트 목록, 호출 정보)를 반환하는 함수 (작업 스레드에서 실행)
+
+    먼저 generate_content 한 번에 candidate_count=count로 요청하고, 모델이 지원하지 않거나
+    후보가 모자라면 모자란 만큼 동시에 따로 호출해 채웁니다 (parallel=True면 처음부터 동시 호출).
+    동시 호출은 프롬프트에 후보 번호를 붙여 서로 다른 답을 유도하고, 스케줄러가 같은 호출로
+    합치지 않게 합니다. 후보는 서로 달라야 하므로 응답 캐시는 쓰지 않습니다.
+    """
+    started_at = time.perf_counter()
+    model_name = client.default_model
+    label = (tags or {}).get("label")
+    session_context = session_context or {"system_instruction": None, "cached_content": None}
+    info = {"ttft": None, "total": None, "cache_hit": False, "prompt_tokens": None, "output_tokens": None,
+            "finish_reason": None, "continuations": 0, "truncated": False, "candidates": 0, "fallback": None}
+    texts = []
+
+    if not parallel and count > 1:
+        generation_config = dict(GENERATION_CONFIG, candidate_count=count)
+        if budgets is not None:
+            generation_config["max_output_tokens"] = budgets.budget(label)
+
+        def call():
+            response = client.generate(
+                prompt,
+                model_name=model_name,
+                generation_config=generation_config,
+                system_instruction=session_context["system_instruction"],
+                cached_content=session_context["cached_content"]
+            )
+            usage = getattr(response, "usage_metadata", None)
+            if not usage:
+                return response, None
+            info["prompt_tokens"] = usage.prompt_token_count
+            info["output_tokens"] = usage.candidates_token_count
+            return response, usage.prompt_token_count + usage.candidates_token_count
+
+        try:
+            if scheduler is None:
+                response, _ = call()
+            else:
+                cost_tokens = estimate_tokens(prompt) + generation_config["max_output_tokens"] * count
+                response = scheduler.call(call, priority=priority, cost_tokens=cost_tokens)
+        except Exception as e:
+            # candidate_count를 지원하지 않는 모델 등은 동시 호출로 대신함 (실패한 호출이 아니라 대체로 기록)
+            info["fallback"] = type(e).__name__
+            info["total"] = time.perf_counter() - started_at
+        else:
+            for text, reason in _candidate_texts(response)[:count]:
+                info["truncated"] = info["truncated"] or reason == "MAX_TOKENS"
+                texts.append(close_open_fence(text) if reason == "MAX_TOKENS" else text)
+                if budgets is not None:
+                    budgets.observe(label, estimate_tokens(text))
+            info["total"] = info["ttft"] = time.perf_counter() - started_at
+            if metrics is not None:
+                metrics.record_call(info, ok=bool(texts), error=None if texts else "EmptyResponse",
+                                    model=model_name, **(tags or {}))
+            if len(texts) < count and info["fallback"] is None:
+                info["fallback"] = "MissingCandidates"
+        if info["fallback"] and metrics is not None:
+            metrics.record_count("candidate_fallbacks", (tags or {}).get("step"), (tags or {}).get("session"))
+
+    # 모자란 후보를 동시 호출로 채우기
+    missing = range(len(texts), count)
+    if missing:
+        with ThreadPoolExecutor(max_workers=len(missing), thread_name_prefix="candidate") as pool:
+            futures = [
+                pool.submit(generate_text, client, prompt + PROMPT_CANDIDATE_VARIANT.format(index=i + 1, count=count),
+                            scheduler=scheduler, priority=priority, session_context=session_context,
+                            metrics=metrics, tags=tags, budgets=budgets)
+                for i in missing
+            ]
+            for future in futures:
+                text, call_info = future.result()
+                if text:
+                    texts.append(text)
+                    info["truncated"] = info["truncated"] or call_info["truncated"]
+
+    info["candidates"] = len(texts)
+    info["total"] = time.perf_counter() - started_at
+    if info["ttft"] is None:
+        info["ttft"] = info["total"]
+    return texts, info
+
+# 이전 섹션 컨텍스트 구성
+def compose_previous_sections(flow_items, current_index, drafts, summaries, token_budget=None):
+    """current_index 이전 섹션들로 프롬프트용 컨텍스트를 만드는 함수
+
+    drafts와 summaries는 섹션 제목 → 본문/요약 dict입니다.
+    직전 섹션은 전문을, 그 이전 섹션들은 요약을 사용하고(요약이 아직 없거나 실패했으면
+    본문 앞부분), 가까운 섹션부터 token_budget 안에 들어가는 만큼만 포함합니다.
+    """
+    if token_budget is None:
+        token_budget = PREVIOUS_SECTIONS_TOKEN_BUDGET
+
+    parts = []
+    used = 0
+    for i in range(current_index - 1, -1, -1):
+        prev_title = flow_items[i]
+        prev_content = drafts.get(prev_title)
+        if not prev_content:
+            continue
+        summary = summaries.get(prev_title)
+        if summary:
+            short_block = f"## {prev_title} (요약)\n{summary}"
+        else:
+            short_block = f"## {prev_title} (앞부분)\n{section_excerpt(prev_content)}"
+        block = short_block
+        if i == current_index - 1:
+            block = f"## {prev_title}\n{prev_content}"
+            if used + estimate_tokens(block) > token_budget:
+                block = short_block
+        cost = estimate_tokens(block)
+        if parts and used + cost > token_budget:
+            break
+        parts.append(block)
+        used += cost
+    return "\n\n".join(reversed(parts))
+
+# 섹션 앞부분 발췌
+def section_excerpt(text, max_chars=None):
+    """요약 대신 쓸 섹션 앞부분을 max_chars 글자 안에서 줄 단위로 잘라 반환하는 함수"""
+    if max_chars is None:
+        max_chars = SUMMARY_FALLBACK_CHARS
+    text = text.strip()
+    if len(text) <= max_chars:
+        return text
+    cut = text.rfind("\n", 0, max_chars)
+    return text[:cut if cut > max_chars // 2 else max_chars].rstrip() + " …"
+
+# 스타일 문자열 구성
+def format_style_text(collected):
+    return f"{collected.get('format_style', '')} / {collected.get('tone', '')} / {collected.get('audience', '')}"
+
+# 세션 컨텍스트 구성
+def compose_system_instruction(collected):
+    """시스템 프롬프트와 주제, 키워드, 스타일, 글 흐름을 합치는 함수"""
+    outline = "\n".join(f"{i + 1}. {title}" for i, title in enumerate(collected.get("finalized_flow", [])))
+    return REACT_SYSTEM_PROMPT + PROMPT_SESSION_CONTEXT.format(
+        topic=collected.get('user_topic', ''),
+        keywords=", ".join(collected.get('user_keywords', [])),
+        style=format_style_text(collected),
+        outline=outline
+    )
+
+# 전체 초안 조립
+def assemble_markdown(title, flow_items, drafts):
+    """제목과 섹션 본문들로 전체 초안 마크다운을 만드는 함수"""
+    parts = [f"# {title}\n\n"]
+    parts.extend(f"## {section_title}\n{drafts[section_title]}\n\n" for section_title in flow_items)
+    return "".join(parts)
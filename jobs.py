@@ -0,0 +1,180 @@
+import heapq
+import itertools
+import threading
+import time
+from concurrent.futures import CancelledError, Future
+
+from scheduler import PRIORITY_INTERACTIVE
+
+
+class JobCancelled(Exception):
+    """실행 중인 작업이 취소되었을 때 작업 내부에서 발생하는 예외"""
+
+
+class Job:
+    """작업 큐에 제출된 작업 하나의 핸들
+
+    partial에는 스트리밍 중 지금까지 누적된 텍스트가 담기며,
+    취소나 시간 초과가 요청되면 다음 update 호출에서 JobCancelled가 발생합니다.
+    """
+
+    def __init__(self, job_id, label=None, timeout=None):
+        self.id = job_id
+        self.label = label
+        self.timeout = timeout
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self.partial = ""
+        self.future = None
+        self.timed_out = False
+        self._cancel_event = threading.Event()
+
+    def update(self, text):
+        """스트리밍 중 누적 텍스트를 갱신하는 함수 (취소되었으면 중단)"""
+        if self._cancel_event.is_set():
+            raise JobCancelled(self.id)
+        self.partial = text
+
+    def cancel(self):
+        """작업을 취소하는 함수 (시작 전이면 즉시, 실행 중이면 다음 청크에서 중단)"""
+        self._cancel_event.set()
+        cancelled = self.future.cancel()
+        if cancelled:
+            self.finished_at = time.time()
+        return cancelled
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def check_timeout(self):
+        """시간 제한을 넘긴 작업을 취소 처리하는 함수"""
+        if self.timeout and not self.done() and time.time() - self.submitted_at > self.timeout:
+            self.timed_out = True
+            self.cancel()
+        return self.timed_out
+
+    def done(self):
+        return self.future.done()
+
+    def status(self):
+        """작업 상태 문자열을 반환하는 함수"""
+        if self.timed_out:
+            return "timeout"
+        if not self.future.done():
+            return "cancelling" if self.cancelled else ("running" if self.future.running() else "pending")
+        if self.future.cancelled() or self.cancelled:
+            return "cancelled"
+        return "failed" if self.future.exception() is not None else "done"
+
+    def result(self):
+        """작업 결과를 반환하는 함수 (실패, 취소 시 예외 발생)"""
+        try:
+            return self.future.result()
+        except CancelledError:
+            raise JobCancelled(self.id)
+
+
+class JobQueue:
+    """프로세스 전체에서 공유하는 작업 큐
+
+    모든 세션의 모델 호출은 제한된 수의 작업 스레드에서 실행되고,
+    세션에는 작업 ID만 저장됩니다. 완료된 작업은 retention초 동안 보관됩니다.
+    대기 중인 작업은 우선순위(숫자가 작을수록 먼저) 순으로 작업 스레드에 들어가며,
+    그중 reserved_workers개는 대화형(PRIORITY_INTERACTIVE) 작업만 실행합니다. 일괄/미리 생성
+    작업이 속도 제한을 기다리며 나머지 스레드를 모두 잡고 있어도 대화형 작업은 바로 시작됩니다.
+    """
+
+    def __init__(self, max_workers=8, retention=600, reserved_workers=None):
+        if reserved_workers is None:
+            reserved_workers = max(1, max_workers // 4)
+        self.retention = retention
+        self.max_workers = max_workers
+        self.reserved_workers = min(reserved_workers, max_workers - 1)
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._pending = []
+        self._tickets = itertools.count()
+        self._cond = threading.Condition()
+        self._threads = []
+
+    def _start_workers(self):
+        """작업 스레드를 처음 제출할 때 만드는 함수 (잠금 안에서 호출)"""
+        for i in range(self.max_workers):
+            thread = threading.Thread(target=self._work, args=(i < self.reserved_workers,),
+                                      name=f"model-job-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _work(self, interactive_only):
+        while True:
+            with self._cond:
+                while not self._pending or (interactive_only and self._pending[0][0] != PRIORITY_INTERACTIVE):
+                    self._cond.wait()
+                _, _, future, run = heapq.heappop(self._pending)
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                result = run()
+            except BaseException as e:
+                future.set_exception(e)
+            else:
+                future.set_result(result)
+
+    def submit(self, fn, *args, label=None, timeout=None, priority=PRIORITY_INTERACTIVE, **kwargs):
+        """fn(job, *args, **kwargs)를 실행하는 작업을 우선순위에 따라 제출하고 핸들을 반환하는 함수"""
+        with self._lock:
+            self._cleanup()
+            job = Job(f"job-{next(self._ids)}", label=label, timeout=timeout)
+            self._jobs[job.id] = job
+
+        def run():
+            if job.cancelled:
+                raise JobCancelled(job.id)
+            try:
+                return fn(job, *args, **kwargs)
+            finally:
+                job.finished_at = time.time()
+
+        job.future = Future()
+        with self._cond:
+            if not self._threads:
+                self._start_workers()
+            heapq.heappush(self._pending, (priority, next(self._tickets), job.future, run))
+            self._cond.notify_all()
+        return job
+
+    def get(self, job_id):
+        """작업 ID로 핸들을 찾는 함수 (없거나 정리되었으면 None)"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None:
+            job.check_timeout()
+        return job
+
+    def cancel(self, job_id):
+        """작업 ID로 작업을 취소하는 함수"""
+        job = self.get(job_id)
+        if job is not None:
+            job.cancel()
+        return job
+
+    def _cleanup(self):
+        now = time.time()
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and now - job.finished_at > self.retention
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def stats(self):
+        """상태별 작업 수를 반환하는 함수"""
+        with self._lock:
+            jobs = list(self._jobs.values())
+        counts = {}
+        for job in jobs:
+            status = job.status()
+            counts[status] = counts.get(status, 0) + 1
+        return counts
@@ -0,0 +1,243 @@
+import bisect
+import json
+import os
+import threading
+import time
+from collections import deque
+
+# 지연 시간 히스토그램 구간(초)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+# Prometheus 라벨 값 이스케이프
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+# 라벨 dict를 Prometheus 표기로 변환
+def _format_labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels) + "}"
+
+# 백분위수 계산
+def percentile(values, q):
+    """정렬되지 않은 값 목록의 q(0~1) 백분위수를 반환하는 함수 (없으면 None)"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+class Histogram:
+    """Prometheus 누적 히스토그램 (구간별 개수, 합계, 개수)"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def lines(self, name, labels):
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            cumulative += count
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            yield f"{name}_bucket{_format_labels(labels + (('le', le),))} {cumulative}"
+        yield f"{name}_sum{_format_labels(labels)} {self.sum:.6f}"
+        yield f"{name}_count{_format_labels(labels)} {self.count}"
+
+
+class MetricsRecorder:
+    """모델 호출과 화면 재실행의 지연 시간, 토큰 사용량을 모으는 프로세스 공용 기록기
+
+    호출마다 전체 시간, 첫 토큰 도착 시간(TTFT), 프롬프트/출력 토큰 수, 캐시 적중,
+    오류를 단계(step)와 섹션 번호 태그와 함께 기록합니다.
+    - 누적 값은 prometheus_text()로 Prometheus 텍스트 형식으로 내보냅니다.
+      prometheus_path를 주면 prometheus_interval초마다 파일로 써서
+      node_exporter textfile 수집기 등이 읽을 수 있게 합니다.
+    - log_path를 주면 이벤트마다 JSON 한 줄씩 덧붙입니다.
+    - 최근 recent_events개의 이벤트는 메모리에 남겨 화면의 디버그 패널에서 씁니다.
+    - gauges에 (이름 → 숫자) dict를 반환하는 함수를 주면 스케줄러, 응답 캐시 등의
+      현재 값을 내보낼 때 함께 씁니다.
+    """
+
+    def __init__(self, log_path=None, prometheus_path=None, prometheus_interval=15, recent_events=500,
+                 gauges=None):
+        self.log_path = log_path
+        self.gauges = gauges
+        self.prometheus_path = prometheus_path
+        self.prometheus_interval = prometheus_interval
+        self.started_at = time.time()
+        self._recent = deque(maxlen=recent_events)
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self._last_export = 0.0
+        for path in (log_path, prometheus_path):
+            directory = os.path.dirname(path) if path else ""
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+
+    def _count(self, name, labels, amount=1):
+        key = (name, labels)
+        self._counters[key] = self._counters.get(key, 0) + amount
+
+    def _observe(self, name, labels, value):
+        key = (name, labels)
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            histogram = self._histograms[key] = Histogram()
+        histogram.observe(value)
+
+    def _emit(self, event):
+        """이벤트를 최근 목록과 JSONL 로그에 남기는 함수 (잠금 안에서 호출)"""
+        self._recent.append(event)
+        if self.log_path:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def record_call(self, info, ok=True, error=None, step=None, section=None, label=None, session=None,
+                    model=None, stream=False):
+        """모델 호출 한 번을 기록하는 함수
+
+        info는 generate_text가 반환하는 호출 정보(ttft, total, cache_hit, prompt_tokens, output_tokens,
+        finish_reason, continuations, truncated, semantic_hit, similarity)이며, 실패한 호출은 error에
+        오류 종류를 넘깁니다. 유사도 캐시 적중은 cache="semantic" 라벨로 따로 셉니다.
+        """
+        step = step or "unknown"
+        status = "ok" if ok else "error"
+        cache = "semantic" if info.get("semantic_hit") else "hit" if info.get("cache_hit") else "miss"
+        event = {
+            "type": "model_call",
+            "time": time.time(),
+            "step": step,
+            "section": section,
+            "label": label,
+            "session": session,
+            "model": model,
+            "stream": stream,
+            "status": status,
+            "error": error,
+            "cache_hit": bool(info.get("cache_hit")),
+            "semantic_hit": bool(info.get("semantic_hit")),
+            "similarity": info.get("similarity"),
+            "total": info.get("total"),
+            "ttft": info.get("ttft"),
+            "prompt_tokens": info.get("prompt_tokens"),
+            "output_tokens": info.get("output_tokens"),
+            "finish_reason": info.get("finish_reason"),
+            "continuations": info.get("continuations", 0),
+        }
+        with self._lock:
+            self._count("model_calls_total", (("step", step), ("status", status), ("cache", cache)))
+            if error:
+                self._count("model_errors_total", (("step", step), ("error", error)))
+            if info.get("total") is not None:
+                self._observe("model_call_seconds", (("step", step), ("cache", cache)), info["total"])
+            if info.get("ttft") is not None and not info.get("cache_hit"):
+                self._observe("model_ttft_seconds", (("step", step),), info["ttft"])
+            if info.get("continuations"):
+                self._count("model_continuations_total", (("step", step),), info["continuations"])
+            if info.get("truncated"):
+                self._count("model_truncated_total", (("step", step),))
+            for direction in ("prompt", "output"):
+                tokens = info.get(f"{direction}_tokens")
+                if tokens:
+                    self._count("model_tokens_total", (("step", step), ("direction", direction)), tokens)
+            self._emit(event)
+        self.maybe_export()
+
+    def record_count(self, name, step=None, session=None, amount=1):
+        """작업 시간 초과처럼 호출 단위로 잡히지 않는 사건의 횟수(또는 낭비된 토큰 같은 양)를 기록하는 함수"""
+        step = step or "unknown"
+        with self._lock:
+            self._count(f"{name}_total", (("step", step),), amount)
+            self._emit({"type": name, "time": time.time(), "step": step, "session": session, "amount": amount})
+        self.maybe_export()
+
+    def record_rerun(self, seconds, step=None, session=None):
+        """Streamlit 스크립트 재실행 한 번에 걸린 시간을 기록하는 함수"""
+        step = step or "unknown"
+        with self._lock:
+            self._observe("rerun_seconds", (("step", step),), seconds)
+            self._emit({"type": "rerun", "time": time.time(), "step": step, "session": session,
+                        "total": seconds})
+        self.maybe_export()
+
+    def recent(self, event_type=None, session=None):
+        """최근 이벤트 목록을 반환하는 함수 (종류, 세션으로 거를 수 있음)"""
+        with self._lock:
+            events = list(self._recent)
+        return [
+            event for event in events
+            if (event_type is None or event["type"] == event_type)
+            and (session is None or event.get("session") == session)
+        ]
+
+    def step_summary(self, session=None):
+        """최근 모델 호출을 단계별로 모아 호출 수, 지연 백분위수, 토큰, 캐시 적중, 오류를 반환하는 함수"""
+        rows = {}
+        for event in self.recent("model_call", session):
+            row = rows.setdefault(event["step"], {"step": event["step"], "calls": 0, "totals": [], "ttfts": [],
+                                                  "prompt_tokens": 0, "output_tokens": 0,
+                                                  "cache_hits": 0, "errors": 0})
+            row["calls"] += 1
+            row["cache_hits"] += int(event["cache_hit"])
+            row["errors"] += int(event["status"] != "ok")
+            row["prompt_tokens"] += event["prompt_tokens"] or 0
+            row["output_tokens"] += event["output_tokens"] or 0
+            if event["total"] is not None:
+                row["totals"].append(event["total"])
+            if event["ttft"] is not None and not event["cache_hit"]:
+                row["ttfts"].append(event["ttft"])
+        summary = []
+        for row in rows.values():
+            totals, ttfts = row.pop("totals"), row.pop("ttfts")
+            row["p50"] = percentile(totals, 0.5)
+            row["p95"] = percentile(totals, 0.95)
+            row["ttft_p50"] = percentile(ttfts, 0.5)
+            row["seconds"] = sum(totals)
+            summary.append(row)
+        return sorted(summary, key=lambda row: row["seconds"], reverse=True)
+
+    def prometheus_text(self, prefix="blog_draft_"):
+        """누적 지표와 게이지 값을 Prometheus 텍스트 형식으로 반환하는 함수"""
+        gauges = self.gauges() if self.gauges else {}
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items(), key=lambda item: item[0])
+            seen = set()
+            for (name, labels), value in counters:
+                if name not in seen:
+                    lines.append(f"# TYPE {prefix}{name} counter")
+                    seen.add(name)
+                lines.append(f"{prefix}{name}{_format_labels(labels)} {value}")
+            for (name, labels), histogram in histograms:
+                if name not in seen:
+                    lines.append(f"# TYPE {prefix}{name} histogram")
+                    seen.add(name)
+                lines.extend(histogram.lines(prefix + name, labels))
+        for name, value in sorted(gauges.items()):
+            lines.append(f"# TYPE {prefix}{name} gauge")
+            lines.append(f"{prefix}{name} {float(value)}")
+        return "\n".join(lines) + "\n"
+
+    def maybe_export(self, force=False):
+        """prometheus_path가 설정되어 있으면 prometheus_interval초마다 파일로 내보내는 함수"""
+        if not self.prometheus_path:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_export < self.prometheus_interval:
+                return
+            self._last_export = now
+        temp_path = f"{self.prometheus_path}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            f.write(self.prometheus_text())
+        os.replace(temp_path, self.prometheus_path)
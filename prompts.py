@@ -0,0 +1,342 @@
+# 시스템 프롬프트
+REACT_SYSTEM_PROMPT = """
+당신은 기술 블로그 작성을 도와주는 챗봇입니다.
+사용자의 입력을 이해하고, 자연스러운 대화를 통해 사용자가 블로그 글을 작성할 수 있도록 도와주세요.
+
+사용자의 의견과 요청을 항상 확인하고, 모호하거나 불명확한 내용은 추가 질문을 통해 명확히 해주세요.
+다음 단계로 넘어가기 전에 항상 현재 내용이 맞는지 사용자에게 확인을 받으세요.
+
+블로그 작성은 다음 순서로 진행됩니다:
+1. 주제 파악하기
+2. 키워드 추천 및 선택하기
+3. 문체와 스타일 설정하기
+4. 글의 흐름 제안하기
+5. 도입부 작성하기
+6. 각 섹션 작성하기
+7. 전체 초안 확인하기
+
+기술 블로그 작성 시 다음 사항을 고려해주세요:
+- 기술적 정확성을 유지하세요.
+- 실제 작동하는 코드 예제를 포함하세요.
+- 다른 기술이나 접근법과 비교 분석해주세요.
+- 실무에서의 활용 사례를 포함하세요.
+- 이전 섹션과의 일관성을 유지하세요.
+
+사용자와 자연스러운 대화를 통해 단계별로 블로그 작성을 도와주세요.
+모든 응답은 구조화된 형식(1, 2, 3 번호 매기기)이나 특수 이모지 없이 자연스러운 대화체로 작성해주세요.
+"""
+
+# 단계별 프롬프트 템플릿
+
+PROMPT_TOPIC_QUESTION = """
+안녕하세요! 저는 기술 블로그 초안 작성을 도와드리는 챗봇입니다. 😊
+먼저, 어떤 주제로 블로그를 작성하고 싶으신가요?
+간단히 말씀해 주세요.
+"""
+
+PROMPT_TOPIC_CONFIRM = """
+제가 이해한 주제는 다음과 같습니다:  
+**"{inferred_topic}"**
+
+이 주제로 블로그를 작성하시는 게 맞을까요?
+맞으면 "네", 아니면 다시 말씀해주세요.
+"""
+
+PROMPT_KEYWORD_QUESTION = """
+주제 "**{topic}**"와 관련해서 아래와 같은 키워드를 추천드려요:
+
+🔎 추천 키워드:
+{recommended_keywords}
+
+이 중에서 다루고 싶은 키워드를 **복수로 선택**해주시고,
+추천 키워드에 없더라도 추가하고 싶은 키워드가 있다면 자유롭게 말씀해주세요!
+예: "API, Mock 서버, 실습 예제"
+"""
+
+PROMPT_KEYWORDS_REFINED = """
+✨ 추천 키워드를 한 번 더 다듬었어요:
+{recommended_keywords}
+
+위 목록이나 앞의 목록에서 다루고 싶은 키워드를 골라 말씀해주세요.
+"""
+
+PROMPT_KEYWORD_CONFIRM = """
+제가 이해한 최종 키워드는 다음과 같습니다:  
+{selected_keywords}
+
+이 키워드를 중심으로 글을 작성해도 괜찮을까요?
+수정하거나 추가하고 싶은 키워드가 있다면 알려주세요!
+"""
+
+PROMPT_STYLE_QUESTION = """
+이번엔 블로그의 스타일을 정해볼게요.
+아래는 참고할 수 있는 예시입니다:
+
+- 형식: 튜토리얼, 기술 리뷰, 문제 해결 사례
+- 문체: 친근한, 공식적인, 중립적
+- 독자 대상: 초보자, 중급 개발자, 전문가
+
+예시에서 골라도 좋고, 자유롭게 원하는 스타일로 작성해주셔도 괜찮습니다.
+예: "튜토리얼 형식, 친근한 톤, 초보자 대상"
+"""
+
+PROMPT_STYLE_CONFIRM = """
+제가 이해한 스타일은 다음과 같습니다:
+
+- 형식: **{format_style}**
+- 문체: **{tone}**
+- 대상 독자: **{audience}**
+
+이 스타일로 글을 작성해도 괜찮을까요?
+자유롭게 수정하거나 추가하고 싶은 요소가 있다면 말씀해주세요.
+"""
+
+PROMPT_FLOW_SUGGEST = """
+위의 주제, 키워드, 스타일을 바탕으로 아래와 같은 글 흐름을 제안드려요:
+
+📝 제안된 흐름:
+{suggested_flow}
+
+이 흐름은 참고용이니, 마음껏 수정하셔도 좋아요!
+섹션을 추가하거나 순서를 바꾸고 싶으시면 알려주세요.
+"""
+
+PROMPT_FLOW_REFINED = """
+✨ 주제에 맞게 글 흐름을 다듬어봤어요:
+
+📝 제안된 흐름:
+{suggested_flow}
+
+이 흐름으로 진행하시려면 '네'라고 답해주시고, 수정하고 싶은 부분이 있으면 알려주세요.
+"""
+
+PROMPT_FLOW_CONFIRM = """
+아래는 각 섹션의 흐름입니다:
+
+흐름 목록:
+{finalized_flow}
+
+이 흐름대로 글을 작성해도 괜찮을까요?
+수정하거나 추가하고 싶은 항목이 있다면 말씀해주세요!
+모든 섹션을 한 번에 작성하시려면 "한 번에 작성해줘"라고 말씀해주세요.
+"""
+
+PROMPT_SECTION_EDIT = """
+섹션 "{section_title}"에 대해 다음과 같은 수정을 제안해드릴게요:
+
+```
+{suggested_changes}
+```
+
+이 수정이 마음에 드시나요?
+수정하거나 다시 작성하고 싶으면 말씀해주세요!
+"""
+
+PROMPT_INTRO_WRITE = """
+이 글의 서론 부분인 "{section_title}"에 대한 초안을 작성해주세요.
+
+다음 요소를 포함해주세요:
+1. 주제에 대한 간결한 소개와 중요성
+2. 독자가 이 글을 읽어야 하는 이유
+3. 글에서 다룰 내용에 대한 간략한 개요
+4. 독자의 관심을 끌 수 있는 흥미로운 시작점
+"""
+
+PROMPT_INTRO_CONFIRM = """
+제가 이해한 도입부는 다음과 같습니다:
+
+```
+{intro_content}
+```
+
+이 도입부로 글을 작성해도 괜찮을까요?
+수정하거나 추가하고 싶은 요소가 있다면 말씀해주세요.
+여러 버전을 나란히 비교해보고 싶으시면 '여러 버전 보여줘'라고 말씀해주세요.
+"""
+
+PROMPT_SECTION_WRITE = """
+이 글의 본문 부분인 "{section_title}"에 대한 초안을 작성해주세요.
+
+다음 요소를 포함해주세요:
+1. 해당 섹션의 핵심 개념 설명
+2. 실제 작동하는 코드 예제와 설명
+3. 다른 접근법과의 비교 분석
+4. 실무 적용 사례 또는 예시
+
+이전 섹션 내용을 참고하여 일관성을 유지하세요:
+{previous_sections}
+"""
+
+PROMPT_SECTION_CONFIRM = """
+제가 이해한 섹션은 다음과 같습니다:
+
+```
+{section_content}
+```
+
+이 섹션으로 진행해도 괜찮을까요?
+수정하거나 추가하고 싶은 요소가 있다면 말씀해주세요.
+여러 버전을 나란히 비교해보고 싶으시면 '여러 버전 보여줘'라고 말씀해주세요.
+"""
+
+# 수정 요청에 대한 프롬프트
+PROMPT_REVISION = """
+다음 섹션의 초안을 수정해주세요:
+섹션 제목: {section_title}
+
+사용자 요청: {user_request}
+
+기존 초안:
+{original_draft}
+
+이전 섹션 내용:
+{previous_sections}
+
+수정 시 다음 사항을 고려해주세요:
+1. 사용자의 요청사항을 정확히 반영해주세요.
+2. 기술적 정확성을 유지하면서도 이해하기 쉽게 작성해주세요.
+3. 글의 전체적인 흐름과 일관성을 유지해주세요.
+4. 코드 예제가 있다면 정확하고 실행 가능하게 수정해주세요.
+5. 기존 초안의 좋은 부분은 그대로 유지해주세요.
+6. 사용자가 특정 부분만 수정을 요청했다면, 그 부분만 수정하고 나머지는 그대로 두세요.
+
+수정된 내용은 마크다운 형식으로 작성해주세요.
+"""
+
+# 일부 블록(문단, 코드 블록)만 수정하는 프롬프트
+PROMPT_BLOCK_REVISION = """
+"{section_title}" 섹션 초안의 일부 블록만 수정해주세요.
+
+사용자 요청: {user_request}
+
+수정할 블록:
+{target_blocks}
+
+앞뒤 문맥 (참고만 하고 출력하지 마세요):
+{surrounding}
+
+수정 시 다음 사항을 지켜주세요:
+1. 사용자의 요청사항을 정확히 반영해주세요.
+2. 앞뒤 문맥과 자연스럽게 이어지도록 작성해주세요.
+3. 코드 블록은 정확하고 실행 가능하게, 코드 펜스(```)를 포함해 작성해주세요.
+4. 수정한 블록만 <<<BLOCK n>>>과 <<<END BLOCK n>>> 구분자로 감싸 같은 번호로 출력하고, 다른 설명은 붙이지 마세요.
+"""
+
+# 전체 섹션 동시 작성용 프롬프트 (이전 섹션 본문 대신 세션 컨텍스트의 글 흐름을 참고)
+PROMPT_SECTION_WRITE_BATCH = """
+이 글의 본문 부분인 "{section_title}"에 대한 초안을 작성해주세요.
+
+다음 요소를 포함해주세요:
+1. 해당 섹션의 핵심 개념 설명
+2. 실제 작동하는 코드 예제와 설명
+3. 다른 접근법과의 비교 분석
+4. 실무 적용 사례 또는 예시
+
+이 섹션은 글 흐름의 {section_number}번째 섹션입니다.
+다른 섹션에서 다룰 내용은 반복하지 말고, 흐름에 맞게 이어지도록 작성해주세요.
+"""
+
+# 세션 컨텍스트 (시스템 프롬프트 뒤에 붙여 system_instruction으로 한 번만 등록)
+PROMPT_SESSION_CONTEXT = """
+현재 작성 중인 블로그 정보입니다. 모든 작성 요청은 이 정보를 바탕으로 해주세요.
+
+주제: {topic}
+키워드: {keywords}
+스타일: {style}
+
+글 흐름:
+{outline}
+"""
+
+# 확정된 섹션 요약 프롬프트
+PROMPT_SECTION_SUMMARY = """
+다음은 기술 블로그의 "{section_title}" 섹션입니다.
+이후 섹션을 작성할 때 일관성을 유지하기 위한 참고 자료로 쓸 수 있도록
+핵심 개념, 사용한 코드 예제(언어와 목적), 주요 결론을 3~5문장으로 요약해주세요.
+
+{section_content}
+"""
+
+# 주제 파악 프롬프트
+PROMPT_TOPIC_INFER = """
+사용자가 기술 블로그로 쓰고 싶은 주제를 다음과 같이 말했습니다:
+{user_input}
+
+블로그 주제를 한 문장(30자 이내)으로 정리해 주제만 답해주세요.
+"""
+
+# 키워드 추천 프롬프트
+PROMPT_KEYWORD_RECOMMEND = """
+기술 블로그 주제 "{topic}"에서 다룰 만한 핵심 키워드를 6~8개 추천해주세요.
+설명 없이 한 줄에 하나씩 "- 키워드" 형식으로만 답해주세요.
+"""
+
+# 로컬 추천 키워드 다듬기 프롬프트
+PROMPT_KEYWORD_REFINE = """
+기술 블로그 주제 "{topic}"에서 다룰 핵심 키워드를 6~8개 추천해주세요.
+비슷한 주제의 이전 글에서 쓴 키워드는 다음과 같습니다: {local_keywords}
+이 중 주제에 맞는 것은 남기고, 맞지 않는 것은 빼거나 더 알맞은 키워드로 바꿔주세요.
+설명 없이 한 줄에 하나씩 "- 키워드" 형식으로만 답해주세요.
+"""
+
+# 글 흐름 생성 프롬프트
+PROMPT_FLOW_GENERATE = """
+다음 기술 블로그의 글 흐름(섹션 제목 목록)을 만들어주세요.
+
+주제: {topic}
+키워드: {keywords}
+스타일: {style}
+
+첫 섹션은 도입부이고, 4~7개 섹션으로 구성해주세요.
+설명 없이 한 줄에 하나씩 "1. 섹션 제목" 형식으로만 답해주세요.
+"""
+
+# 로컬 추천 글 흐름 다듬기 프롬프트
+PROMPT_FLOW_REFINE = """
+다음 기술 블로그의 글 흐름(섹션 제목 목록)을 만들어주세요.
+
+주제: {topic}
+키워드: {keywords}
+스타일: {style}
+
+비슷한 주제의 이전 글은 다음 흐름으로 작성되었습니다:
+{reference_flow}
+
+이 흐름을 참고하되 위 주제와 키워드에 맞게 섹션을 고치거나 더하고 빼주세요.
+첫 섹션은 도입부이고, 4~7개 섹션으로 구성해주세요.
+설명 없이 한 줄에 하나씩 "1. 섹션 제목" 형식으로만 답해주세요.
+"""
+
+# 글 흐름 수정 프롬프트
+PROMPT_FLOW_REVISE = """
+다음은 기술 블로그 "{topic}"의 현재 글 흐름입니다:
+{current_flow}
+
+사용자 요청: {user_request}
+
+요청을 반영한 글 흐름을 설명 없이 한 줄에 하나씩 "1. 섹션 제목" 형식으로만 답해주세요.
+"""
+
+# 블로그 제목 생성 프롬프트
+PROMPT_BLOG_TITLE = """다음 주제에 대한 기술 블로그 제목을 하나만 만들어주세요: {topic}
+
+여러 후보나 설명 없이 제목 한 줄만 답해주세요."""
+
+# 출력 길이 제한으로 끊긴 응답 이어 쓰기 프롬프트
+PROMPT_CONTINUE = """아래 요청에 대한 답변을 작성하다가 출력 길이 제한으로 중간에 끊겼습니다.
+
+[요청]
+{prompt}
+
+[지금까지 작성한 답변]
+{partial}
+
+[지금까지 작성한 답변]이 끝난 바로 그 지점부터 이어서 작성해주세요.
+- 이미 작성한 내용을 반복하지 말고, 설명이나 머리말 없이 이어질 내용만 출력해주세요.
+- 코드 블록 안에서 끊겼다면 코드 블록을 다시 열지 말고 코드부터 이어서 작성해주세요.
+"""
+
+# 병렬로 후보를 만들 때 후보마다 덧붙이는 안내 (후보끼리 겹치지 않게)
+PROMPT_CANDIDATE_VARIANT = """
+
+(후보 {index}/{count}: 다른 후보와 구성, 설명 방식, 예시가 겹치지 않도록 작성해주세요.)"""
@@ -0,0 +1,141 @@
+import heapq
+import json
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+
+# BM25 가중치 매개변수
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_LATIN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+_HANGUL_PATTERN = re.compile(r"[가-힣]+")
+
+
+# 검색용 토큰 추출
+def tokenize(text):
+    """영문/숫자 단어와 한글 두 글자 묶음(bigram)을 토큰으로 뽑는 함수
+
+    한글은 조사가 붙어 단어 단위로는 잘 맞지 않으므로 두 글자씩 겹쳐 자르고,
+    한 글자 한글(주로 조사)은 버립니다.
+    """
+    text = text.lower()
+    tokens = [word.rstrip(".") for word in _LATIN_PATTERN.findall(text)]
+    for run in _HANGUL_PATTERN.findall(text):
+        tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return [token for token in tokens if token]
+
+
+class DraftIndex:
+    """완성된 초안의 주제/키워드/글 흐름을 색인해 비슷한 주제의 추천을 바로 찾는 로컬 색인
+
+    문서는 주제와 키워드 토큰으로 만든 TF-IDF(BM25) 역색인에 들어가며,
+    add()로 한 건씩 추가할 때 문서 빈도만 갱신하므로 다시 만들 필요가 없습니다.
+    점수는 질의를 문서로 보았을 때의 점수로 나눠 0~1 범위의 유사도로 씁니다.
+    path를 주면 SQLite에 저장해 두고 시작할 때 불러옵니다.
+    """
+
+    def __init__(self, path=None, min_similarity=0.3, max_entries=20000):
+        self.path = path
+        self.min_similarity = min_similarity
+        self.max_entries = max_entries
+        self._docs = []
+        self._postings = {}
+        self._total_length = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS drafts ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, topic TEXT NOT NULL, "
+                "keywords TEXT NOT NULL, flow TEXT NOT NULL, created_at REAL NOT NULL)"
+            )
+            self._conn.commit()
+            rows = self._conn.execute(
+                "SELECT topic, keywords, flow FROM drafts ORDER BY id DESC LIMIT ?", (max_entries,)
+            ).fetchall()
+            for topic, keywords, flow in reversed(rows):
+                self._index(topic, json.loads(keywords), json.loads(flow))
+
+    def __len__(self):
+        return len(self._docs)
+
+    def _index(self, topic, keywords, flow):
+        """문서 하나를 역색인에 추가하는 함수 (잠금 안에서 호출)"""
+        counts = Counter(tokenize(" ".join([topic] + list(keywords))))
+        doc_id = len(self._docs)
+        self._docs.append({"topic": topic, "keywords": list(keywords), "flow": list(flow),
+                           "length": sum(counts.values())})
+        self._total_length += sum(counts.values())
+        for token, count in counts.items():
+            self._postings.setdefault(token, []).append((doc_id, count))
+
+    def add(self, topic, keywords, flow):
+        """완성된 초안의 주제, 키워드, 글 흐름을 색인과 저장소에 추가하는 함수"""
+        if not topic or not flow:
+            return
+        with self._lock:
+            self._index(topic, keywords, flow)
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT INTO drafts (topic, keywords, flow, created_at) VALUES (?, ?, ?, ?)",
+                    (topic, json.dumps(list(keywords), ensure_ascii=False),
+                     json.dumps(list(flow), ensure_ascii=False), time.time()),
+                )
+                self._conn.commit()
+
+    def _idf(self, token):
+        frequency = len(self._postings.get(token, ()))
+        return math.log(1 + (len(self._docs) - frequency + 0.5) / (frequency + 0.5))
+
+    def search(self, query, limit=5):
+        """질의와 비슷한 문서를 (유사도, 문서) 목록으로 반환하는 함수 (min_similarity 미만은 제외)"""
+        counts = Counter(tokenize(query))
+        with self._lock:
+            if not counts or not self._docs:
+                return []
+            average_length = self._total_length / len(self._docs)
+            # 질의 자체의 점수 (색인에 없는 토큰도 포함해야 일부 토큰만 겹친 문서의 유사도가 낮아짐)
+            query_length = sum(counts.values())
+            query_norm = BM25_K1 * (1 - BM25_B + BM25_B * query_length / average_length)
+            best = sum(self._idf(token) * count * (BM25_K1 + 1) / (count + query_norm)
+                       for token, count in counts.items())
+            scores = {}
+            for token in counts:
+                postings = self._postings.get(token)
+                if not postings:
+                    continue
+                idf = self._idf(token) * (BM25_K1 + 1)
+                for doc_id, count in postings:
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self._docs[doc_id]["length"] / average_length)
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * count / (count + norm)
+            if not scores or best <= 0:
+                return []
+            ranked = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+            return [(min(1.0, score / best), self._docs[doc_id]) for doc_id, score in ranked
+                    if score / best >= self.min_similarity]
+
+    def suggest_keywords(self, topic, limit=8):
+        """비슷한 주제의 초안에서 쓴 키워드를 유사도로 가중해 추천하는 함수"""
+        weights = {}
+        labels = {}
+        for similarity, doc in self.search(topic):
+            for keyword in doc["keywords"]:
+                key = keyword.lower()
+                labels.setdefault(key, keyword)
+                weights[key] = weights.get(key, 0.0) + similarity
+        ranked = sorted(weights, key=lambda key: weights[key], reverse=True)
+        return [labels[key] for key in ranked[:limit]]
+
+    def suggest_flow(self, topic, keywords=()):
+        """주제와 키워드가 가장 비슷한 초안의 글 흐름을 반환하는 함수 (없으면 빈 목록)"""
+        results = self.search(" ".join([topic] + list(keywords)), limit=1)
+        return list(results[0][1]["flow"]) if results else []
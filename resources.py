@@ -0,0 +1,135 @@
+"""프로세스 전체에서 공유하는 자원
+
+app.py는 재실행마다 처음부터 다시 실행되므로, 한 번만 만들면 되는 자원과 환경 변수
+로드를 이 모듈로 옮겨 import될 때(프로세스당 한 번) 정의되게 합니다.
+"""
+import os
+import threading
+
+import streamlit as st
+from dotenv import load_dotenv
+
+from code_checks import CodeValidator
+from gemini_client import GeminiClient, load_sdk
+from generation import MODEL_NAME, OutputBudgets
+from jobs import JobQueue
+from metrics import MetricsRecorder
+from recommender import DraftIndex
+from response_cache import ResponseCache
+from scheduler import RequestScheduler
+from semantic_cache import SemanticCache
+from session_store import SessionStore
+
+# 환경 변수 로드 (프로세스당 한 번)
+load_dotenv()
+
+# 첫 화면을 그린 뒤 SDK를 백그라운드에서 미리 불러올지 여부
+SDK_WARMUP = os.getenv("SDK_WARMUP", "1") == "1"
+
+
+# Gemini 클라이언트 불러오기 (프로세스당 한 번 설정하고 연결을 재사용)
+@st.cache_resource
+def get_gemini_client():
+    return GeminiClient(api_key=st.secrets["GOOGLE_API_KEY"], default_model=MODEL_NAME,
+                        api_endpoint=os.getenv("GEMINI_API_ENDPOINT"))
+
+# SDK 미리 불러오기
+@st.cache_resource
+def start_sdk_warmup():
+    """첫 모델 호출이 SDK import를 기다리지 않도록 백그라운드 스레드에서 import를 시작하는 함수"""
+    thread = threading.Thread(target=load_sdk, name="sdk-warmup", daemon=True)
+    thread.start()
+    return thread
+
+# 응답 캐시 불러오기 (재실행과 프로세스 재시작 후에도 유지)
+@st.cache_resource
+def get_response_cache():
+    return ResponseCache(
+        path=os.getenv("RESPONSE_CACHE_PATH", ".cache/responses.sqlite3"),
+        ttl=int(os.getenv("RESPONSE_CACHE_TTL", str(7 * 24 * 3600))),
+        max_memory_entries=int(os.getenv("RESPONSE_CACHE_MEMORY_ENTRIES", "256")),
+        max_disk_entries=int(os.getenv("RESPONSE_CACHE_DISK_ENTRIES", "5000")),
+    )
+
+# 유사도 캐시 불러오기 (입력이 거의 같은 주제/제목/키워드 요청의 응답 재사용)
+@st.cache_resource
+def get_semantic_cache():
+    labels = os.getenv("SEMANTIC_CACHE_LABELS", "topic,title,keywords")
+    return SemanticCache(
+        labels=[label.strip() for label in labels.split(",") if label.strip()],
+        threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.8")),
+        max_entries=int(os.getenv("SEMANTIC_CACHE_ENTRIES", "2000")),
+        word_overlap=float(os.getenv("SEMANTIC_CACHE_WORD_OVERLAP", "0.6")),
+    )
+
+# 요청 스케줄러 불러오기 (모든 세션이 공유하는 속도 제한)
+@st.cache_resource
+def get_request_scheduler():
+    return RequestScheduler(
+        requests_per_minute=int(os.getenv("GEMINI_REQUESTS_PER_MINUTE", "60")),
+        tokens_per_minute=int(os.getenv("GEMINI_TOKENS_PER_MINUTE", "1000000")),
+        max_retries=int(os.getenv("GEMINI_MAX_RETRIES", "4")),
+    )
+
+# 작업 큐 불러오기 (프로세스 전체에서 공유)
+@st.cache_resource
+def get_job_queue():
+    reserved = os.getenv("MODEL_JOB_RESERVED_WORKERS")
+    return JobQueue(max_workers=int(os.getenv("MODEL_JOB_WORKERS", "8")),
+                    reserved_workers=int(reserved) if reserved else None)
+
+# 작업 종류별 출력 토큰 예산 불러오기 (모든 세션의 출력 길이를 함께 관측)
+@st.cache_resource
+def get_output_budgets():
+    return OutputBudgets()
+
+# 이전 초안 색인 불러오기 (완성된 초안이 쌓일 때마다 키워드/글 흐름 추천에 사용)
+@st.cache_resource
+def get_draft_index():
+    return DraftIndex(
+        path=os.getenv("DRAFT_INDEX_PATH", ".cache/draft_index.sqlite3"),
+        min_similarity=float(os.getenv("DRAFT_INDEX_MIN_SIMILARITY", "0.3")),
+    )
+
+# 코드 예제 검사기 불러오기 (모든 세션이 검사 프로세스 수 제한을 공유)
+@st.cache_resource
+def get_code_validator():
+    return CodeValidator(
+        max_workers=int(os.getenv("CODE_CHECK_WORKERS", "2")),
+        timeout=float(os.getenv("CODE_CHECK_TIMEOUT", "5")),
+        memory_limit_mb=int(os.getenv("CODE_CHECK_MEMORY_MB", "256")),
+    )
+
+# 세션 저장소 불러오기 (단계마다 저장하고 오래 쓰지 않은 세션은 메모리에서 내보냄)
+@st.cache_resource
+def get_session_store():
+    return SessionStore(
+        path=os.getenv("SESSION_STORE_PATH", ".cache/sessions.sqlite3"),
+        idle_timeout=int(os.getenv("SESSION_IDLE_TIMEOUT", "1800")),
+        ttl=int(os.getenv("SESSION_TTL", str(30 * 24 * 3600))),
+    )
+
+# 지표 기록기 불러오기 (모든 세션이 공유, 설정 시 JSONL/Prometheus 파일로 내보냄)
+@st.cache_resource
+def get_metrics():
+    scheduler = get_request_scheduler()
+    cache = get_response_cache()
+    sessions = get_session_store()
+    semantic = get_semantic_cache()
+    validator = get_code_validator()
+
+    def gauges():
+        values = {f"scheduler_{key}": value for key, value in scheduler.metrics().items()}
+        values.update(response_cache_hits=cache.hits, response_cache_misses=cache.misses)
+        values.update({f"session_{key}": value for key, value in sessions.stats().items()})
+        values.update({f"code_check_{key}": value for key, value in validator.stats().items()})
+        for label, row in semantic.stats().items():
+            values.update({f"semantic_cache_{label}_{key}": value for key, value in row.items()})
+        return values
+
+    return MetricsRecorder(
+        log_path=os.getenv("METRICS_LOG_PATH"),
+        prometheus_path=os.getenv("METRICS_PROMETHEUS_PATH"),
+        prometheus_interval=int(os.getenv("METRICS_PROMETHEUS_INTERVAL", "15")),
+        gauges=gauges,
+    )
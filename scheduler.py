@@ -0,0 +1,195 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+
+# 요청 우선순위 (숫자가 작을수록 먼저 처리)
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BATCH = 1
+PRIORITY_SPECULATIVE = 2
+
+# 재시도할 HTTP 상태 코드 (google.api_core 예외의 code 속성)
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def error_status_code(exc):
+    """예외에서 HTTP 상태 코드를 꺼내는 함수 (없으면 None)"""
+    code = getattr(exc, "code", None)
+    return code if isinstance(code, int) else None
+
+
+def is_rate_limit_error(exc):
+    """할당량 초과(429) 오류인지 확인하는 함수"""
+    return error_status_code(exc) == 429
+
+
+class TokenBucket:
+    """분당 허용량을 기준으로 채워지는 토큰 버킷
+
+    consume은 잔량이 부족해도 차감하므로(음수 허용) 실제 사용량을
+    사후에 반영할 수 있습니다.
+    """
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self.level = self.capacity
+        self._updated_at = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def wait_time(self, amount):
+        """amount만큼 사용하려면 기다려야 하는 시간(초)"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def consume(self, amount):
+        self._refill()
+        self.level -= amount
+
+
+class _Flight:
+    """같은 요청을 기다리는 호출들이 공유하는 진행 중 요청"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+        self.followers = 0
+
+
+class RequestScheduler:
+    """모든 세션의 모델 호출 앞에 놓이는 공유 스케줄러
+
+    - 분당 요청 수/토큰 수 토큰 버킷으로 호출 속도를 제한합니다.
+    - 대기 중인 호출은 우선순위(대화형 > 일괄 > 미리 생성) 순으로 통과합니다.
+    - 429/5xx 오류는 지터를 섞은 지수 백오프로 재시도합니다.
+    - 같은 키의 호출이 진행 중이면 새로 호출하지 않고 그 결과를 함께 사용합니다.
+    """
+
+    def __init__(self, requests_per_minute=60, tokens_per_minute=1000000,
+                 max_retries=4, base_delay=1.0, max_delay=30.0):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._cond = threading.Condition()
+        self._waiting = []
+        self._tickets = itertools.count()
+        self._flights = {}
+        self._metrics = {
+            "calls": 0,
+            "retries": 0,
+            "failures": 0,
+            "coalesced": 0,
+            "throttled": 0,
+            "max_queue_depth": 0,
+            "total_wait": 0.0,
+            "max_wait": 0.0,
+        }
+
+    def call(self, fn, priority=PRIORITY_INTERACTIVE, cost_tokens=0, key=None):
+        """속도 제한, 재시도, 중복 호출 합치기를 적용해 fn()을 실행하는 함수
+
+        fn은 (결과, 실제 토큰 사용량 또는 None) 튜플을 반환해야 하며,
+        key가 같은 호출이 진행 중이면 그 결과를 그대로 반환합니다.
+        """
+        if key is None:
+            return self._call_with_retry(fn, priority, cost_tokens)
+
+        with self._cond:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = self._flights[key] = _Flight()
+                leader = True
+            else:
+                flight.followers += 1
+                self._metrics["coalesced"] += 1
+                leader = False
+
+        if not leader:
+            flight.event.wait()
+            if flight.error is None:
+                return flight.result
+            # 대표 호출이 실패(취소 포함)하면 직접 호출
+            return self._call_with_retry(fn, priority, cost_tokens)
+
+        try:
+            flight.result = self._call_with_retry(fn, priority, cost_tokens)
+            return flight.result
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._cond:
+                self._flights.pop(key, None)
+            flight.event.set()
+
+    def _call_with_retry(self, fn, priority, cost_tokens):
+        attempt = 0
+        while True:
+            self._acquire(priority, cost_tokens)
+            try:
+                result, used_tokens = fn()
+            except Exception as e:
+                if error_status_code(e) not in RETRYABLE_STATUS_CODES or attempt >= self.max_retries:
+                    with self._cond:
+                        self._metrics["failures"] += 1
+                    raise
+                # 지수 백오프 + 전체 지터
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+                attempt += 1
+                with self._cond:
+                    self._metrics["retries"] += 1
+                time.sleep(delay)
+                continue
+            if used_tokens:
+                # 예상치와 실제 사용량의 차이를 반영
+                with self._cond:
+                    self.tokens.consume(used_tokens - cost_tokens)
+            return result
+
+    def _acquire(self, priority, cost_tokens):
+        """우선순위 순서와 토큰 버킷 잔량에 따라 호출 차례를 기다리는 함수"""
+        enqueued_at = time.monotonic()
+        with self._cond:
+            ticket = (priority, next(self._tickets))
+            heapq.heappush(self._waiting, ticket)
+            self._metrics["max_queue_depth"] = max(self._metrics["max_queue_depth"], len(self._waiting))
+            throttled = False
+            while True:
+                if self._waiting[0] == ticket:
+                    wait = max(self.requests.wait_time(1), self.tokens.wait_time(cost_tokens))
+                    if wait <= 0:
+                        break
+                    throttled = True
+                    self._cond.wait(timeout=wait)
+                else:
+                    self._cond.wait()
+            heapq.heappop(self._waiting)
+            self.requests.consume(1)
+            self.tokens.consume(cost_tokens)
+
+            waited = time.monotonic() - enqueued_at
+            self._metrics["calls"] += 1
+            self._metrics["throttled"] += int(throttled)
+            self._metrics["total_wait"] += waited
+            self._metrics["max_wait"] = max(self._metrics["max_wait"], waited)
+            self._cond.notify_all()
+
+    def metrics(self):
+        """대기열 길이, 대기 시간, 재시도 등의 지표를 반환하는 함수"""
+        with self._cond:
+            metrics = dict(self._metrics)
+            metrics["queue_depth"] = len(self._waiting)
+            metrics["in_flight_keys"] = len(self._flights)
+        metrics["avg_wait"] = metrics["total_wait"] / metrics["calls"] if metrics["calls"] else 0.0
+        return metrics
@@ -0,0 +1,152 @@
+import re
+import threading
+import unicodedata
+import zlib
+
+import numpy as np
+
+_LATIN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#.]*")
+_HANGUL_PATTERN = re.compile(r"[가-힣]+")
+# 같은 단어로 보기 위해 떼어 내는 조사 (긴 것부터 비교)
+_PARTICLES = ("에서", "으로", "하기", "은", "는", "이", "가", "을", "를", "의", "에", "로", "와", "과", "도", "만")
+
+
+# 비교용 텍스트 정규화
+def _normalize(text):
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text).lower()).strip()
+
+# 문자 n-gram 해싱 벡터
+def hash_embedding(text, dim=1024, ngram_sizes=(2, 3)):
+    """문자 n-gram을 해싱해 길이 1인 dim차원 벡터를 만드는 함수 (외부 모델 없이 계산)
+
+    n-gram마다 crc32로 자리와 부호를 정하므로 프로세스가 바뀌어도 같은 벡터가 나옵니다.
+    """
+    padded = f" {_normalize(text)} "
+    vector = np.zeros(dim, dtype=np.float32)
+    for size in ngram_sizes:
+        for i in range(len(padded) - size + 1):
+            value = zlib.crc32(f"{size}:{padded[i:i + size]}".encode("utf-8"))
+            vector[value % dim] += 1.0 if value & 0x80000000 else -1.0
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+# 한글 단어에서 조사 떼기
+def _strip_particle(word):
+    for particle in _PARTICLES:
+        if len(word) > len(particle) + 1 and word.endswith(particle):
+            return word[:-len(particle)]
+    return word
+
+# 단어 서명
+def word_signature(text):
+    """텍스트에 들어 있는 (영문/숫자 단어 집합, 조사를 뗀 한글 단어 집합)을 반환하는 함수
+
+    "FastAPI로 REST API 만들기"와 "Flask로 REST API 만들기", "Python 비동기 프로그래밍 입문"과
+    "Python 동기 프로그래밍 입문"처럼 문자 n-gram은 비슷해도 다루는 내용이 다른 입력을
+    구분하는 데 씁니다.
+    """
+    normalized = _normalize(text)
+    latin = frozenset(word.rstrip(".") for word in _LATIN_PATTERN.findall(normalized))
+    # "FastAPI로"처럼 영문 뒤에 붙은 조사는 단어로 치지 않음
+    hangul = frozenset(_strip_particle(word) for word in _HANGUL_PATTERN.findall(normalized)
+                       if word not in _PARTICLES)
+    return latin, hangul
+
+# 두 단어 서명이 같은 내용을 가리키는지 판단
+def signatures_match(first, second, word_overlap=0.6):
+    """영문 기술 이름은 정확히 같고, 한글 단어는 한쪽이 다른 쪽을 포함하거나
+    자카드 유사도가 word_overlap 이상이면 True를 반환하는 함수
+
+    "FastAPI 튜토리얼"과 "FastAPI 입문 튜토리얼"은 같다고 보고, "비동기/동기"처럼
+    핵심 단어 하나가 바뀐 입력(자카드 0.5)은 다르다고 봅니다.
+    """
+    if first[0] != second[0]:
+        return False
+    words, other = first[1], second[1]
+    if words <= other or other <= words:
+        return True
+    return len(words & other) / len(words | other) >= word_overlap
+
+
+class SemanticCache:
+    """입력이 거의 같은 요청의 응답을 재사용하는 유사도 캐시
+
+    작업 종류(label)와 모델별 공간마다 최근 max_entries개의 (입력 벡터, 응답)을
+    NumPy 행렬에 두고, 새 입력과의 코사인 유사도를 한 번의 행렬 곱으로 구해
+    threshold 이상이면서 영문 기술 이름이 같고 한글 단어가 충분히 겹치는(signatures_match)
+    가장 가까운 응답을 돌려줍니다.
+    labels에 들어 있는 작업 종류만 사용합니다 (작업 종류별 선택 사용).
+    """
+
+    def __init__(self, labels=(), threshold=0.8, dim=1024, max_entries=2000, word_overlap=0.6):
+        self.labels = frozenset(labels)
+        self.threshold = threshold
+        self.word_overlap = word_overlap
+        self.dim = dim
+        self.max_entries = max_entries
+        self.hits = {}
+        self.misses = {}
+        self._spaces = {}
+        self._lock = threading.Lock()
+
+    def enabled(self, label):
+        """작업 종류가 유사도 캐시를 쓰도록 설정되었는지 반환하는 함수"""
+        return label in self.labels
+
+    def get(self, namespace, text):
+        """비슷한 입력의 응답과 유사도를 반환하는 함수 (없으면 (None, 가장 높은 유사도))"""
+        vector = hash_embedding(text, self.dim)
+        signature = word_signature(text)
+        label = namespace[0]
+        with self._lock:
+            space = self._spaces.get(namespace)
+            similarity = 0.0
+            if space is not None and space["count"]:
+                scores = space["vectors"][:space["count"]] @ vector
+                for index in np.argsort(scores)[::-1]:
+                    if scores[index] < self.threshold:
+                        similarity = max(similarity, float(scores[index]))
+                        break
+                    if signatures_match(space["signatures"][index], signature, self.word_overlap):
+                        self.hits[label] = self.hits.get(label, 0) + 1
+                        return space["values"][index], float(scores[index])
+                    similarity = max(similarity, float(scores[index]))
+            self.misses[label] = self.misses.get(label, 0) + 1
+            return None, similarity
+
+    def set(self, namespace, text, value):
+        """입력과 응답을 저장하는 함수 (가득 차면 가장 오래된 항목을 덮어씀)"""
+        vector = hash_embedding(text, self.dim)
+        with self._lock:
+            space = self._spaces.get(namespace)
+            if space is None:
+                space = self._spaces[namespace] = {
+                    "vectors": np.zeros((min(64, self.max_entries), self.dim), dtype=np.float32),
+                    "signatures": [],
+                    "values": [],
+                    "count": 0,
+                    "next": 0,
+                }
+            index = space["next"]
+            # 가득 찰 때까지는 행렬을 두 배씩 늘리고, 그 뒤로는 오래된 자리부터 덮어씀
+            if index == len(space["vectors"]) and index < self.max_entries:
+                grown = np.zeros((min(index * 2, self.max_entries), self.dim), dtype=np.float32)
+                grown[:index] = space["vectors"]
+                space["vectors"] = grown
+            if index == len(space["values"]):
+                space["signatures"].append(None)
+                space["values"].append(None)
+            space["vectors"][index] = vector
+            space["signatures"][index] = word_signature(text)
+            space["values"][index] = value
+            space["next"] = (index + 1) % self.max_entries
+            space["count"] = min(space["count"] + 1, self.max_entries)
+
+    def stats(self):
+        """작업 종류별 적중/미스 횟수와 적중률을 반환하는 함수"""
+        with self._lock:
+            stats = {}
+            for label in sorted(set(self.hits) | set(self.misses)):
+                hits, misses = self.hits.get(label, 0), self.misses.get(label, 0)
+                stats[label] = {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses)}
+            return stats
@@ -0,0 +1,143 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+
+class SessionStore:
+    """세션 스냅샷을 SQLite에 저장하고, 오래 쓰지 않은 세션을 메모리에서 내보내는 저장소
+
+    - 스냅샷은 JSON을 zlib으로 압축해 이어쓰기 토큰(resume token)을 키로 저장하며,
+      ttl초 동안 갱신되지 않은 스냅샷은 지웁니다. path가 없으면 프로세스 메모리에 압축해 둡니다.
+    - 화면을 다시 실행할 때마다 activate()로 세션이 쓰이고 있음을 알리고, 실행이 끝나면
+      checkpoint()로 스냅샷과 메모리 해제 함수(release)를 넘깁니다.
+    - evict_idle()은 idle_timeout초 동안 쓰이지 않았고 마지막 스냅샷이 최신인 세션의
+      release를 호출해 메모리를 비웁니다. 내보낸 세션은 다음 실행 때 activate()가
+      False를 반환하므로 load()로 복원하면 됩니다.
+    """
+
+    def __init__(self, path=None, idle_timeout=1800, ttl=30 * 24 * 3600, sweep_interval=60):
+        self.path = path
+        self.idle_timeout = idle_timeout
+        self.ttl = ttl
+        self.sweep_interval = sweep_interval
+        self.saves = 0
+        self.restores = 0
+        self.evictions = 0
+        self._active = {}
+        self._memory = {}
+        self._lock = threading.Lock()
+        self._last_sweep = time.monotonic()
+        self._conn = None
+        if path:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "token TEXT PRIMARY KEY, data BLOB NOT NULL, updated_at REAL NOT NULL)"
+            )
+            if ttl is not None:
+                self._conn.execute("DELETE FROM sessions WHERE updated_at < ?", (time.time() - ttl,))
+            self._conn.commit()
+
+    def save(self, token, snapshot):
+        """스냅샷(JSON으로 바꿀 수 있는 dict)을 압축해 저장하는 함수"""
+        data = zlib.compress(json.dumps(snapshot, ensure_ascii=False).encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sessions (token, data, updated_at) VALUES (?, ?, ?)",
+                    (token, data, now),
+                )
+                self._conn.commit()
+            else:
+                self._memory[token] = data
+            self.saves += 1
+        return len(data)
+
+    def load(self, token):
+        """저장된 스냅샷을 반환하는 함수 (없거나 만료되었으면 None)"""
+        with self._lock:
+            if self._conn is not None:
+                row = self._conn.execute(
+                    "SELECT data, updated_at FROM sessions WHERE token = ?", (token,)
+                ).fetchone()
+                if row is None or (self.ttl is not None and time.time() - row[1] > self.ttl):
+                    return None
+                data = row[0]
+            else:
+                data = self._memory.get(token)
+                if data is None:
+                    return None
+            self.restores += 1
+        return json.loads(zlib.decompress(data).decode("utf-8"))
+
+    def delete(self, token):
+        """저장된 스냅샷과 활성 세션 기록을 지우는 함수"""
+        with self._lock:
+            self._active.pop(token, None)
+            self._memory.pop(token, None)
+            if self._conn is not None:
+                self._conn.execute("DELETE FROM sessions WHERE token = ?", (token,))
+                self._conn.commit()
+
+    def activate(self, token):
+        """세션이 쓰이고 있음을 기록하고, 메모리에 남아 있던 세션이면 True를 반환하는 함수
+
+        처음 보는 세션이나 evict_idle()로 내보낸 세션은 False를 반환합니다.
+        """
+        with self._lock:
+            entry = self._active.get(token)
+            if entry is None:
+                self._active[token] = {"last_seen": time.monotonic(), "release": None, "clean": False}
+                return False
+            entry["last_seen"] = time.monotonic()
+            return True
+
+    def checkpoint(self, token, release, snapshot=None, clean=True):
+        """실행이 끝난 세션의 메모리 해제 함수를 등록하고, snapshot이 있으면 저장하는 함수
+
+        clean이 False이면(진행 중인 작업이 있는 등) 마지막 스냅샷이 최신이 아니므로
+        evict_idle()이 이 세션을 내보내지 않습니다.
+        """
+        if snapshot is not None:
+            self.save(token, snapshot)
+        with self._lock:
+            entry = self._active.setdefault(token, {"last_seen": time.monotonic()})
+            entry["release"] = release
+            entry["clean"] = clean
+
+    def evict_idle(self, force=False):
+        """idle_timeout초 동안 쓰이지 않은 세션을 메모리에서 내보내고 내보낸 개수를 반환하는 함수
+
+        sweep_interval초에 한 번만 실제로 확인합니다 (force=True면 바로 확인).
+        """
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_sweep < self.sweep_interval:
+                return 0
+            self._last_sweep = now
+            idle = [
+                token for token, entry in self._active.items()
+                if entry["clean"] and entry["release"] is not None
+                and now - entry["last_seen"] > self.idle_timeout
+            ]
+            for token in idle:
+                self._active.pop(token)["release"]()
+            self.evictions += len(idle)
+        return len(idle)
+
+    def stats(self):
+        """메모리에 있는 세션 수와 저장/복원/내보내기 횟수를 반환하는 함수"""
+        with self._lock:
+            return {
+                "active_sessions": len(self._active),
+                "saves": self.saves,
+                "restores": self.restores,
+                "evictions": self.evictions,
+            }
@@ -0,0 +1,233 @@
+import re
+from enum import Enum
+
+
+# Step 상수 정의
+class Step(Enum):
+    TOPIC_QUESTION = "topic_question"
+    TOPIC_CONFIRM = "topic_confirm"
+    KEYWORD_QUESTION = "keyword_question"
+    KEYWORD_CONFIRM = "keyword_confirm"
+    STYLE_QUESTION = "style_question"
+    STYLE_CONFIRM = "style_confirm"
+    FLOW_SUGGEST = "flow_suggest"           # 새로운 단계: 글 흐름 제안
+    FLOW_CONFIRM = "flow_confirm"           # 새로운 단계: 글 흐름 확인
+    SECTION_EDIT = "section_edit"           # 새로운 단계: 섹션 수정
+    INTRO_WRITE = "intro_write"             # 새로운 단계: 도입부 작성
+    INTRO_CONFIRM = "intro_confirm"         # 새로운 단계: 도입부 확인
+    SECTION_WRITE = "section_write"         # 새로운 단계: 섹션 작성
+    SECTION_CONFIRM = "section_confirm"     # 새로운 단계: 섹션 확인
+    FULL_DRAFT = "full_draft"
+    DONE = "done"
+
+
+# 의도별 키워드 (입력에 포함되어 있으면 해당 의도로 판단)
+INTENT_WORDS = {
+    "show_draft": ["전체 초안", "모든 초안", "전체 내용", "결과 보기"],
+    "batch": ["한번에", "한 번에", "전체 작성", "모두 작성", "일괄"],
+    "undo": ["되돌", "실행 취소", "이전 버전", "원래대로", "undo"],
+    "candidates": ["여러 버전", "다른 버전", "후보"],
+    "revise": ["수정", "바꿔", "다시", "다른", "변경", "고치", "고쳐", "아니"],
+    "confirm": ["네", "좋아", "괜찮", "진행", "시작", "다음"],
+}
+
+# 확인 단계의 동작 (되돌리기 > 후보 여러 개 > 수정 > 진행 순으로 확인)
+CONFIRM_RULES = [
+    ("undo", "undo"),
+    ("candidates", "request_candidates"),
+    ("revise", "revise_section"),
+    ("confirm", "accept_section"),
+    (None, "confirm_help"),
+]
+
+# 작성 중인 단계의 동작
+BUSY_RULES = [(None, "busy")]
+
+# 단계별 (의도, 동작) 표. 위에서부터 확인하며, 의도가 None이면 그 밖의 모든 입력
+# 확인 단계는 "네, 근데 바꿔줘"가 수정 요청이 되도록 수정을 진행보다 먼저 확인
+STEP_TABLE = {
+    Step.TOPIC_QUESTION.value: [(None, "infer_topic")],
+    Step.TOPIC_CONFIRM.value: [("confirm", "recommend_keywords"), (None, "infer_topic")],
+    Step.KEYWORD_QUESTION.value: [(None, "select_keywords")],
+    Step.KEYWORD_CONFIRM.value: [
+        ("revise", "ask_keywords"),
+        ("confirm", "accept_keywords"),
+        (None, "select_keywords"),
+    ],
+    Step.STYLE_QUESTION.value: [(None, "select_style")],
+    Step.STYLE_CONFIRM.value: [
+        ("revise", "ask_style"),
+        ("confirm", "suggest_flow"),
+        (None, "select_style"),
+    ],
+    Step.FLOW_SUGGEST.value: [("confirm", "confirm_flow"), (None, "edit_flow")],
+    Step.FLOW_CONFIRM.value: [
+        ("batch", "start_batch"),
+        ("revise", "edit_flow"),
+        ("confirm", "start_intro"),
+        (None, "flow_help"),
+    ],
+    Step.SECTION_EDIT.value: CONFIRM_RULES,
+    Step.INTRO_WRITE.value: BUSY_RULES,
+    Step.INTRO_CONFIRM.value: CONFIRM_RULES,
+    Step.SECTION_WRITE.value: BUSY_RULES,
+    Step.SECTION_CONFIRM.value: CONFIRM_RULES,
+    Step.FULL_DRAFT.value: BUSY_RULES,
+    Step.DONE.value: [(None, "done_help")],
+}
+
+# 모든 단계에서 먼저 확인하는 동작
+GLOBAL_RULES = [("show_draft", "show_saved_draft")]
+
+
+class IntentMatcher:
+    """모든 의도 키워드를 하나의 정규식으로 묶어 입력을 한 번만 훑는 매처
+
+    전방 탐색으로 위치마다 가장 긴 키워드를 찾고, 그 키워드와 그 앞부분이 되는 더 짧은
+    키워드들의 의도를 미리 모아 둔 표에서 꺼내므로, "다시작"이나 "다른 버전"(후보 + 수정)처럼
+    키워드가 겹쳐 있어도 각각의 의도를 모두 찾습니다. 키워드 첫 글자 집합으로 먼저
+    걸러 대부분의 위치는 바로 건너뜁니다.
+    """
+
+    def __init__(self, intent_words):
+        owners = {}
+        for intent, words in intent_words.items():
+            for word in words:
+                owners.setdefault(word.lower(), set()).add(intent)
+        # 같은 위치에서 함께 일치하는 더 짧은 키워드는 모두 가장 긴 키워드의 앞부분
+        self._intents = {
+            word: frozenset().union(*(owners[prefix] for prefix in owners if word.startswith(prefix)))
+            for word in owners
+        }
+        alternatives = "|".join(re.escape(word) for word in sorted(owners, key=len, reverse=True))
+        prefilter = "".join(re.escape(char) for char in sorted({word[0] for word in owners}))
+        self._pattern = re.compile(f"(?=[{prefilter}])(?=({alternatives}))")
+
+    def match(self, text):
+        """입력에 들어 있는 의도 이름의 집합을 반환하는 함수"""
+        intents = set()
+        for m in self._pattern.finditer(text.lower()):
+            intents.update(self._intents[m.group(1)])
+        return intents
+
+
+class StepEngine:
+    """현재 단계와 입력의 의도로 실행할 동작을 고르는 표 기반 상태 기계
+
+    동작 이름만 다루므로 Streamlit 없이도 단계별 분기를 확인할 수 있고,
+    실제 동작은 dispatch에 넘긴 actions(이름 → 함수)가 수행합니다.
+    """
+
+    def __init__(self, table=None, global_rules=None, intent_words=None):
+        self.table = STEP_TABLE if table is None else table
+        self.global_rules = GLOBAL_RULES if global_rules is None else global_rules
+        self.matcher = IntentMatcher(INTENT_WORDS if intent_words is None else intent_words)
+
+    def resolve(self, step, text):
+        """(동작 이름 또는 None, 의도 집합)을 반환하는 함수"""
+        intents = self.matcher.match(text)
+        for rules in (self.global_rules, self.table.get(step, ())):
+            for intent, action in rules:
+                if intent is None or intent in intents:
+                    return action, intents
+        return None, intents
+
+    def dispatch(self, step, text, actions):
+        """선택된 동작을 actions[동작](text, intents)로 실행하고 동작 이름을 반환하는 함수"""
+        action, intents = self.resolve(step, text)
+        if action is not None:
+            actions[action](text, intents)
+        return action
+
+    def action_names(self):
+        names = {action for _, action in self.global_rules}
+        for rules in self.table.values():
+            names.update(action for _, action in rules)
+        return names
+
+    def validate(self, actions):
+        """모든 단계가 표에 있고, 표의 모든 동작이 등록되어 있는지 확인하는 함수"""
+        missing_steps = [step.value for step in Step if step.value not in self.table]
+        missing_actions = sorted(self.action_names() - set(actions))
+        if missing_steps or missing_actions:
+            raise ValueError(f"단계 표가 완전하지 않습니다: 단계 {missing_steps}, 동작 {missing_actions}")
+
+
+# 기본 단계 표와 의도 매처로 만든 상태 기계 (모듈 import 시 한 번 컴파일)
+STEP_ENGINE = StepEngine()
+
+
+# 스타일 선택지 (항목 → [(입력에서 찾을 단어, 표시 이름)])
+STYLE_OPTIONS = {
+    "format_style": [("튜토리얼", "튜토리얼"), ("리뷰", "기술 리뷰"), ("문제 해결", "문제 해결 사례"),
+                     ("트러블슈팅", "문제 해결 사례")],
+    "tone": [("친근", "친근한"), ("공식", "공식적인"), ("중립", "중립적")],
+    "audience": [("초보", "초보자"), ("입문", "초보자"), ("중급", "중급 개발자"), ("전문가", "전문가"),
+                 ("고급", "전문가")],
+}
+
+LIST_SEPARATOR_PATTERN = re.compile(r"[,\n、·]")
+LIST_MARKER_PATTERN = re.compile(r"^\s*(?:[-*•]|\d+[.)]|\d+\s*단계[:.]?)\s*")
+
+
+def parse_keywords(text):
+    """쉼표, 줄바꿈 등으로 구분된 키워드 목록을 중복 없이 반환하는 함수"""
+    keywords = []
+    for part in LIST_SEPARATOR_PATTERN.split(text):
+        keyword = LIST_MARKER_PATTERN.sub("", part).strip().strip("\"'")
+        if keyword and keyword not in keywords:
+            keywords.append(keyword)
+    return keywords
+
+
+def parse_style(text):
+    """입력에서 형식, 문체, 대상 독자를 찾아 반환하는 함수
+
+    선택지에 없는 부분은 쉼표로 나눈 순서대로 비어 있는 항목에 채웁니다.
+    """
+    style = {}
+    leftovers = []
+    for part in (part.strip() for part in text.split(",")):
+        if not part:
+            continue
+        matched = False
+        for field, options in STYLE_OPTIONS.items():
+            if field in style:
+                continue
+            for word, label in options:
+                if word in part:
+                    style[field] = label
+                    matched = True
+                    break
+        if not matched:
+            leftovers.append(part)
+    for field in STYLE_OPTIONS:
+        if field not in style:
+            style[field] = leftovers.pop(0) if leftovers else "자유"
+    return style
+
+
+def parse_flow(text):
+    """번호/글머리 목록이나 쉼표, 화살표로 구분된 섹션 제목 목록을 반환하는 함수"""
+    lines = [line for line in text.splitlines() if line.strip()]
+    listed = [line for line in lines if LIST_MARKER_PATTERN.match(line)]
+    if len(listed) >= 2:
+        # 목록 앞뒤의 설명 문장은 제외
+        lines = listed
+    elif len(lines) < 2:
+        lines = re.split(r"\s*(?:,|→|->|>)\s*", text)
+    sections = []
+    for line in lines:
+        title = LIST_MARKER_PATTERN.sub("", line).strip().strip("*").strip()
+        if title and title not in sections:
+            sections.append(title)
+    return sections
+
+
+def looks_like_flow(text):
+    """입력이 섹션 목록(여러 줄 또는 화살표 구분)처럼 보이는지 확인하는 함수"""
+    return "\n" in text.strip() or "→" in text or "->" in text
+
+
+def format_numbered(items):
+    return "\n".join(f"{i + 1}. {item}" for i, item in enumerate(items))
@@ -0,0 +1,131 @@
+"""화면에서 쓰는 정적 자원
+
+CSS 압축과 사이드바 단계 표시 HTML처럼 세션 상태와 관계없는 값을 import 시 한 번만
+만들어 두고, app.py는 재실행마다 만들어 둔 문자열을 그대로 출력합니다.
+"""
+import re
+
+from step_engine import Step
+
+
+# CSS 공백과 주석을 줄여 재실행마다 보내는 크기를 줄임
+def minify_css(css):
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{}:;,>])\s*", r"\1", css).replace(";}", "}").strip()
+
+# 앱 전체 스타일 - 챗봇 작성중 애니메이션 포함
+APP_CSS = minify_css("""
+@keyframes bounce-dots {
+    0%, 20% { transform: translateY(0); }
+    50% { transform: translateY(-4px); }
+    80%, 100% { transform: translateY(0); }
+}
+
+.typing-indicator {
+    color: #888888;
+    font-size: 14px;
+    padding: 8px 12px;
+    border-radius: 18px;
+    background-color: #f1f1f1;
+    display: inline-flex;
+    align-items: center;
+    margin-bottom: 5px;
+}
+
+.typing-text {
+    font-style: italic;
+}
+
+.dots {
+    display: flex;
+    margin-left: 5px;
+}
+
+.dot {
+    width: 6px;
+    height: 6px;
+    border-radius: 50%;
+    background-color: #888888;
+    margin: 0 1px;
+    display: inline-block;
+    animation: bounce-dots 1.5s infinite;
+}
+
+.dot:nth-child(2) {
+    animation-delay: 0.2s;
+}
+
+.dot:nth-child(3) {
+    animation-delay: 0.4s;
+}
+
+/* 단계 표시 스타일 */
+.step-current {
+    margin-left: 0px; 
+    padding: 5px 10px; 
+    background-color: #E6F0FF; 
+    color: #0066CC; 
+    font-weight: bold; 
+    font-size: 16px;
+    border-radius: 5px;
+    margin-bottom: 5px;
+}
+
+.step-other {
+    padding: 5px 10px;
+    margin-bottom: 5px; 
+    color: #555555;
+}
+""")
+
+# 스타일 태그 (재실행마다 같은 문자열을 출력)
+STYLE_HTML = f"<style>{APP_CSS}</style>"
+
+# 사이드바에 표시할 진행 단계 (묶음 이름, 표시 이름)
+SIDEBAR_STEPS = [
+    ("topic", "1. 주제 입력"),
+    ("keyword", "2. 키워드 선택"),
+    ("style", "3. 스타일 설정"),
+    ("flow", "4. 글 흐름 제안"),
+    ("intro", "5. 도입부 작성"),
+    ("section", "6. 섹션 작성"),
+    ("full_draft", "7. 전체 초안 확인"),
+]
+
+# 단계별 사이드바 묶음 매핑
+STEP_SIDEBAR_GROUP = {
+    Step.TOPIC_QUESTION.value: "topic",
+    Step.TOPIC_CONFIRM.value: "topic",
+    Step.KEYWORD_QUESTION.value: "keyword",
+    Step.KEYWORD_CONFIRM.value: "keyword",
+    Step.STYLE_QUESTION.value: "style",
+    Step.STYLE_CONFIRM.value: "style",
+    Step.FLOW_SUGGEST.value: "flow",
+    Step.FLOW_CONFIRM.value: "flow",
+    Step.INTRO_WRITE.value: "intro",
+    Step.INTRO_CONFIRM.value: "intro",
+    Step.SECTION_WRITE.value: "section",
+    Step.SECTION_CONFIRM.value: "section",
+    Step.SECTION_EDIT.value: "section",
+    Step.FULL_DRAFT.value: "full_draft",
+    Step.DONE.value: "full_draft",
+}
+
+
+# 현재 묶음을 강조한 진행 단계 HTML 만들기
+def _render_sidebar_steps(current_group):
+    return "".join(
+        f'<div class="step-current">→ {label}</div>' if key == current_group else f'<div class="step-other">{label}</div>'
+        for key, label in SIDEBAR_STEPS
+    )
+
+# 묶음별 진행 단계 HTML (매핑에 없는 단계는 강조 없이 표시)
+_SIDEBAR_STEPS_HTML = {group: _render_sidebar_steps(group) for group, _ in SIDEBAR_STEPS}
+_SIDEBAR_STEPS_HTML[""] = _render_sidebar_steps("")
+
+
+# 사이드바 진행 단계 HTML 가져오기
+def sidebar_steps_html(step):
+    """현재 단계에 맞춰 미리 만들어 둔 진행 단계 HTML을 반환하는 함수"""
+    return _SIDEBAR_STEPS_HTML[STEP_SIDEBAR_GROUP.get(step, "")]